@@ -1,35 +1,151 @@
+import atexit
 import logging
 import os
+import threading
+import time
+from collections import Counter
 
 from confluent_kafka import Producer, KafkaError
 
 kafka_conf = {
     "bootstrap.servers": f"{os.environ.get('TAILSCALE_VPN_IP')}:9092",
     "message.timeout.ms": 60000,  # 1 minute
+    # wait briefly so that messages produced by concurrent requests are sent
+    # to the broker in one batch
+    "linger.ms": int(os.environ.get("KAFKA_LINGER_MS", 5)),
+    "batch.num.messages": int(os.environ.get("KAFKA_BATCH_NUM_MESSAGES", 1000)),
+    # bound of the in-memory queue of messages waiting for delivery
+    "queue.buffering.max.messages": int(
+        os.environ.get("KAFKA_QUEUE_MAX_MESSAGES", 10000)
+    ),
 }
 
+# seconds produce_message waits for room in a full queue before giving up
+ENQUEUE_TIMEOUT = float(os.environ.get("KAFKA_ENQUEUE_TIMEOUT", 1))
+# seconds to wait for outstanding messages on shutdown
+SHUTDOWN_FLUSH_TIMEOUT = float(os.environ.get("KAFKA_SHUTDOWN_FLUSH_TIMEOUT", 10))
+
 
 class KafkaProducerSingleton:
+    """
+    Process-wide, non-blocking Kafka producer.
+
+    `produce_message` only enqueues the message; it never waits for the
+    broker. Delivery callbacks are served by `poll(0)` after every produce
+    and by a background thread that keeps polling the producer. When the
+    in-memory queue is full, producing waits up to `ENQUEUE_TIMEOUT` seconds
+    for room before failing. Outstanding messages are flushed when the
+    process exits.
+
+    `stats()` reports how many messages were produced, delivered and failed,
+    how often the queue was full and how many messages are still queued.
+    """
+
     _instance = None
+    _lock = threading.Lock()
+    _poller = None
+    _stopped = threading.Event()
+    metrics = Counter()
 
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            cls._instance = Producer(kafka_conf)
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = Producer(kafka_conf)
+                cls._stopped.clear()
+                cls._poller = threading.Thread(
+                    target=cls._poll,
+                    args=(cls._instance,),
+                    name="kafka-producer-poller",
+                    daemon=True,
+                )
+                cls._poller.start()
+                atexit.register(cls.shutdown)
         return cls._instance
 
     @classmethod
-    def produce_message(cls, topic, value, callback=None):
+    def _poll(cls, producer):
+        """
+        Serve delivery callbacks until the producer is shut down or replaced.
+        """
+        while not cls._stopped.is_set() and cls._instance is producer:
+            producer.poll(0.1)
+
+    @classmethod
+    def _on_delivery(cls, callback):
+        def on_delivery(err, msg):
+            cls.metrics["failed" if err else "delivered"] += 1
+            if err:
+                logging.error(f"Kafka message delivery failed: {err}")
+            if callback is not None:
+                callback(err, msg)
+
+        return on_delivery
+
+    @classmethod
+    def produce_message(cls, topic, value, callback=None, key=None):
         if os.getenv("GITHUB_ACTIONS", "false") == "true":
             logging.info("Skipping Kafka message production in GitHub Actions")
             return
         producer = cls.get_instance()
+        deadline = time.monotonic() + ENQUEUE_TIMEOUT
         try:
-            producer.produce(topic, value, callback=callback)
-            producer.flush()  # Ensure all messages are sent
+            while True:
+                try:
+                    producer.produce(
+                        topic, value, key=key, on_delivery=cls._on_delivery(callback)
+                    )
+                    break
+                except BufferError:
+                    # the local queue is full: apply backpressure by serving
+                    # delivery reports until there is room again
+                    cls.metrics["queue_full"] += 1
+                    if time.monotonic() >= deadline:
+                        raise
+                    producer.poll(0.1)
+            cls.metrics["produced"] += 1
+            producer.poll(0)
+        except BufferError as e:
+            # raised as is, so that batch producers can tell a full queue
+            # apart from a message that cannot be produced
+            logging.error(f"Kafka producer queue is full: {e}")
+            raise
         except KafkaError as e:
             logging.error(f"Kafka error occurred: {e}")
             raise Exception("Failed to send message to Kafka") from e
         except Exception as e:
             logging.error(f"An error occurred: {e}")
             raise Exception("An unexpected error occurred while sending message") from e
+
+    @classmethod
+    def flush(cls, timeout):
+        """
+        Wait for outstanding messages, for callers that publish in batches.
+        Returns the number of messages still queued.
+        """
+        return cls.get_instance().flush(timeout)
+
+    @classmethod
+    def stats(cls):
+        stats = {
+            key: cls.metrics[key]
+            for key in ("produced", "delivered", "failed", "queue_full")
+        }
+        stats["queued"] = len(cls._instance) if cls._instance is not None else 0
+        return stats
+
+    @classmethod
+    def shutdown(cls, timeout=SHUTDOWN_FLUSH_TIMEOUT):
+        """
+        Stop the background poller and wait for outstanding messages.
+        """
+        with cls._lock:
+            if cls._instance is None:
+                return
+            cls._stopped.set()
+            cls._poller.join()
+            remaining = cls._instance.flush(timeout)
+            if remaining:
+                logging.error(f"{remaining} Kafka messages were not delivered")
+            logging.info(f"Kafka producer stats: {cls.stats()}")
+            cls._instance = None
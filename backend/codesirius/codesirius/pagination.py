@@ -0,0 +1,100 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.urls import replace_query_param
+
+
+class CreatedAtCursorPagination:
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    A page is fetched with `WHERE (created_at, id) < cursor ORDER BY
+    created_at DESC, id DESC LIMIT page_size + 1`, so every page costs the
+    same however deep it is, and rows created meanwhile do not shift pages.
+    The total count is only computed when asked for with `count=true`.
+
+    Query parameters:
+        cursor: Opaque position returned in the `next` link.
+        page_size: Number of results per page, at most `max_page_size`.
+        count: If "true", the total number of results is included.
+    """
+
+    page_size = 10
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+
+    def __init__(self, page_size: Optional[int] = None):
+        if page_size is not None:
+            self.page_size = page_size
+        self.request: Optional[Request] = None
+        self.next_cursor: Optional[str] = None
+        self.count: Optional[int] = None
+
+    @staticmethod
+    def encode_cursor(created_at, pk) -> str:
+        position = json.dumps([created_at.isoformat(), pk])
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor: str):
+        try:
+            created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            created_at = parse_datetime(created_at)
+            if created_at is None or not isinstance(pk, int):
+                raise ValueError
+        except (binascii.Error, ValueError, TypeError):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor"})
+        return created_at, pk
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request) -> list:
+        """
+        Return the page of `queryset` at the requested cursor. Works with
+        model querysets and with `values()` querysets including created_at.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        if request.query_params.get(self.count_query_param) == "true":
+            self.count = queryset.count()
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+            )
+
+        rows = list(queryset.order_by("-created_at", "-id")[: page_size + 1])
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            if isinstance(last, dict):
+                self.next_cursor = self.encode_cursor(last["created_at"], last["id"])
+            else:
+                self.next_cursor = self.encode_cursor(last.created_at, last.id)
+        return rows
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_pagination_data(self) -> dict:
+        return {"count": self.count, "next": self.get_next_link()}
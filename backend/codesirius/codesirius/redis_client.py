@@ -1,25 +1,48 @@
+import threading
 from typing import Optional
 
 import redis
+from django.conf import settings
 
 
 class RedisClientSingleton:
     """
-    Singleton class to manage a single Redis connection.
+    Singleton class to manage a single Redis connection pool.
+
+    The client is shared by all threads of the process. Each command borrows
+    a connection from a bounded pool, waiting up to `REDIS_POOL_TIMEOUT`
+    seconds for one to be free. Idle connections are checked before reuse
+    and commands time out instead of hanging on an unresponsive server, see
+    the `REDIS_*` settings.
     """
 
     _instance: Optional["RedisClientSingleton"] = None
+    _lock = threading.Lock()
 
     def __new__(
         cls, host: str = "localhost", port: int = 6379, db: int = 0
     ) -> "RedisClientSingleton":
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._init_connection(host, port, db)
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._init_connection(host, port, db)
+                    cls._instance = instance
         return cls._instance
 
     def _init_connection(self, host: str, port: int, db: int) -> None:
-        self._redis = redis.Redis(host=host, port=port, db=db, decode_responses=True)
+        self._pool = redis.BlockingConnectionPool(
+            host=host,
+            port=port,
+            db=db,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        self._redis = redis.Redis(connection_pool=self._pool)
 
     def get_client(self) -> redis.Redis:
         return self._redis
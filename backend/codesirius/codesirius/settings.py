@@ -34,6 +34,15 @@ DEBUG = environ.get("DJANGO_DEBUG", "False") == "True"
 
 GRPC_SERVER = environ.get("GRPC_SERVER", "localhost:50051")
 
+# Redis connection pool shared by the threads of a worker
+REDIS_MAX_CONNECTIONS = int(environ.get("REDIS_MAX_CONNECTIONS", 50))
+# seconds to wait for a free connection when all of them are in use
+REDIS_POOL_TIMEOUT = float(environ.get("REDIS_POOL_TIMEOUT", 2))
+REDIS_SOCKET_TIMEOUT = float(environ.get("REDIS_SOCKET_TIMEOUT", 2))
+REDIS_SOCKET_CONNECT_TIMEOUT = float(environ.get("REDIS_SOCKET_CONNECT_TIMEOUT", 2))
+# seconds a connection may be idle before it is checked with a PING
+REDIS_HEALTH_CHECK_INTERVAL = int(environ.get("REDIS_HEALTH_CHECK_INTERVAL", 30))
+
 AWS_ACCESS_KEY_ID = environ.get("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = environ.get("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = environ.get("AWS_REGION")
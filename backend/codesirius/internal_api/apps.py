@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class InternalApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "internal_api"
+
+    def ready(self):
+        import internal_api.signals  # noqa
@@ -2,12 +2,15 @@ from django.utils import timezone
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed, ValidationError
 
+from internal_api.cache import APIKeyCache
 from internal_api.models import APIKey
 
 
 class APIAuthentication(BaseAuthentication):
     """
     Custom API authentication class to interact with internal API
+
+    Active keys are cached by `internal_api.cache.APIKeyCache`.
     """
 
     def authenticate(self, request):
@@ -16,11 +19,16 @@ class APIAuthentication(BaseAuthentication):
             raise AuthenticationFailed()
 
         api_key_hash = APIKey.hash_key(api_key)
-        try:
-            api_key_obj = APIKey.objects.get(key=api_key_hash, is_active=True)
-            if api_key_obj.expires_at and api_key_obj.expires_at < timezone.now():
-                raise ValidationError({"x-api-key": "API key has expired"})
-        except APIKey.DoesNotExist:
-            raise AuthenticationFailed()
+        cache = APIKeyCache()
+        api_key_obj = cache.get(api_key_hash)
+        if api_key_obj is None:
+            try:
+                api_key_obj = APIKey.objects.get(key=api_key_hash, is_active=True)
+            except APIKey.DoesNotExist:
+                raise AuthenticationFailed()
+            cache.set(api_key_obj)
+
+        if api_key_obj.expires_at and api_key_obj.expires_at < timezone.now():
+            raise ValidationError({"x-api-key": "API key has expired"})
 
         return api_key_obj, None
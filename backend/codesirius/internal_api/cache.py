@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import redis
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from codesirius.redis_client import RedisClientSingleton
+from internal_api.models import APIKey
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "api-key"
+
+
+class APIKeyCache:
+    """
+    Cache of active API keys by hash, so that authenticating the requests of
+    internal services rarely touches the database.
+
+    A key is looked up in a small LRU in the memory of the process first,
+    then in Redis (`api-key:<hash>`), which all workers share, and only then
+    in the database. Only keys found active are cached; whether they expired
+    is still checked on every request.
+
+    Deactivating or deleting a key removes it from Redis and from the
+    memory of the process doing it, see `internal_api.signals`. Other
+    processes may keep accepting it for up to `LOCAL_TTL` seconds.
+    """
+
+    # seconds an entry is kept in the memory of a process
+    LOCAL_TTL = 10
+    # seconds an entry is kept in Redis
+    REDIS_TTL = 300
+    # entries kept in the memory of a process
+    LOCAL_SIZE = 1024
+
+    # hash -> (monotonic time it expires at, entry), least recently used first
+    _local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("GITHUB_ACTIONS", "false") != "true"
+
+    @staticmethod
+    def redis_key(key_hash: str) -> str:
+        return f"{KEY_PREFIX}:{key_hash}"
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = RedisClientSingleton(host="redis", port=6379).get_client()
+        return self._client
+
+    def get(self, key_hash: str) -> Optional[APIKey]:
+        """
+        The active API key with hash `key_hash`, or None if it is not cached.
+        """
+        entry = self._get_local(key_hash)
+        if entry is None and self.enabled():
+            try:
+                cached = self.client.get(self.redis_key(key_hash))
+            except redis.RedisError as e:
+                logger.warning(f"API key cache unavailable: {e}")
+                cached = None
+            if cached is not None:
+                entry = json.loads(cached)
+                self._set_local(key_hash, entry)
+        if entry is None:
+            return None
+        return APIKey(
+            id=entry["id"],
+            name=entry["name"],
+            key=key_hash,
+            is_active=True,
+            expires_at=entry["expires_at"] and parse_datetime(entry["expires_at"]),
+        )
+
+    def set(self, api_key: APIKey) -> None:
+        """
+        Cache an API key that was found active in the database.
+        """
+        entry = {
+            "id": api_key.id,
+            "name": api_key.name,
+            "expires_at": api_key.expires_at and api_key.expires_at.isoformat(),
+        }
+        self._set_local(api_key.key, entry)
+        if not self.enabled():
+            return
+        try:
+            self.client.set(
+                self.redis_key(api_key.key), json.dumps(entry), ex=self.REDIS_TTL
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Failed to cache API key: {e}")
+
+    def invalidate(self, key_hash: str) -> None:
+        with self._lock:
+            self._local.pop(key_hash, None)
+        if not self.enabled():
+            return
+        try:
+            self.client.delete(self.redis_key(key_hash))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to invalidate cached API key: {e}")
+
+    @classmethod
+    def clear_local(cls) -> None:
+        with cls._lock:
+            cls._local.clear()
+
+    def _get_local(self, key_hash: str) -> Optional[dict]:
+        with self._lock:
+            cached = self._local.get(key_hash)
+            if cached is None:
+                return None
+            expires, entry = cached
+            if expires < time.monotonic():
+                del self._local[key_hash]
+                return None
+            self._local.move_to_end(key_hash)
+            return entry
+
+    def _set_local(self, key_hash: str, entry: dict) -> None:
+        with self._lock:
+            self._local[key_hash] = (time.monotonic() + self.LOCAL_TTL, entry)
+            self._local.move_to_end(key_hash)
+            while len(self._local) > self.LOCAL_SIZE:
+                self._local.popitem(last=False)
+
+
+def invalidate_api_key(key_hash: str) -> None:
+    """
+    Remove an API key from the cache, now and again once the current
+    transaction commits, so that no request caches it in between.
+    """
+    APIKeyCache().invalidate(key_hash)
+    transaction.on_commit(lambda: APIKeyCache().invalidate(key_hash))
@@ -1,8 +1,14 @@
+import re
+
 from rest_framework import serializers
 
 from problems.models import HiddenTestBundle, Problem
 
 
+# hex SHA-256 of the contents of a file
+DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
 class HiddenTestBundleSerializer(serializers.ModelSerializer):
     """
     Serializer for the HiddenTestBundle model.
@@ -16,5 +22,29 @@ class HiddenTestBundleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = HiddenTestBundle
-        fields = ["id", "problem_id", "s3_path", "test_count"]
+        fields = ["id", "problem_id", "s3_path", "test_count", "manifest"]
         read_only_fields = ["id"]
+
+    def validate_manifest(self, manifest: dict) -> dict:
+        if not manifest:
+            return manifest
+        tests = manifest.get("tests")
+        if not isinstance(tests, list) or not tests:
+            raise serializers.ValidationError("tests must be a non-empty list")
+        for test in tests:
+            if not isinstance(test, dict) or set(test) != {"input", "output"}:
+                raise serializers.ValidationError(
+                    "Every test must have an input and an output"
+                )
+            for digest in test.values():
+                if not isinstance(digest, str) or not DIGEST.match(digest):
+                    raise serializers.ValidationError(f"Invalid digest: {digest}")
+        return manifest
+
+    def validate(self, attrs: dict) -> dict:
+        manifest = attrs.get("manifest")
+        if manifest and len(manifest["tests"]) != attrs.get("test_count"):
+            raise serializers.ValidationError(
+                {"test_count": "test_count does not match the manifest"}
+            )
+        return attrs
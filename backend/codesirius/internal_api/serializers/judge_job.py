@@ -0,0 +1,57 @@
+from rest_framework import serializers
+
+from problems.models import Submission
+
+
+class JudgeJobSerializer(serializers.ModelSerializer):
+    """
+    Everything a consumer needs to judge a submission.
+
+    Expects a submission from `JudgeJobRetrieveAPIView.get_queryset`, i.e. with
+    the language and the hidden test bundle selected and the execution
+    constraint of the submission's language annotated.
+    """
+
+    submission_id = serializers.IntegerField(source="id")
+    language = serializers.SerializerMethodField()
+    constraints = serializers.SerializerMethodField()
+    hidden_test_bundle = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Submission
+        fields = [
+            "submission_id",
+            "problem_id",
+            "code",
+            "language",
+            "constraints",
+            "hidden_test_bundle",
+        ]
+
+    def get_language(self, submission: Submission) -> dict:
+        language = submission.language
+        return {
+            "id": language.id,
+            "name": language.name,
+            "version": language.version,
+            # key of the language in the consumers' language image map
+            "key": f"{language.name.lower()}:{language.version.lower()}",
+        }
+
+    def get_constraints(self, submission: Submission) -> dict | None:
+        if submission.constraint_time_limit is None:
+            return None
+        return {
+            "time_limit": submission.constraint_time_limit,
+            "memory_limit": submission.constraint_memory_limit,
+        }
+
+    def get_hidden_test_bundle(self, submission: Submission) -> dict | None:
+        if not hasattr(submission.problem, "hidden_test_bundle"):
+            return None
+        bundle = submission.problem.hidden_test_bundle
+        return {
+            "s3_path": bundle.s3_path,
+            "test_count": bundle.test_count,
+            "manifest": bundle.manifest,
+        }
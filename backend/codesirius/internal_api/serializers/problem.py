@@ -18,7 +18,7 @@ class SampleTestSerializer(serializers.ModelSerializer):
 class HiddenTestBundleSerializer(serializers.ModelSerializer):
     class Meta:
         model = HiddenTestBundle
-        fields = ["id", "s3_path", "test_count"]
+        fields = ["id", "s3_path", "test_count", "manifest"]
 
 
 class ExecutionConstraintSerializer(serializers.ModelSerializer):
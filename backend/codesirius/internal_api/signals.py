@@ -0,0 +1,16 @@
+# internal_api/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from internal_api.cache import invalidate_api_key
+from internal_api.models import APIKey
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_cached_api_key(sender, instance, **kwargs):
+    """
+    Signal handler that removes an API key from the authentication cache
+    when it is changed (e.g. deactivated) or deleted.
+    """
+    invalidate_api_key(instance.key)
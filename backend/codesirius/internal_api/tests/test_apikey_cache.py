@@ -0,0 +1,165 @@
+"""
+Test cases for the API key authentication cache
+"""
+
+import json
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import redis
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.test import APIClient, APIRequestFactory
+
+from internal_api.auth import APIAuthentication
+from internal_api.cache import APIKeyCache
+from internal_api.models.apikey import APIKey
+
+fake = Faker()
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.unique.email(),
+        "username": fake.unique.user_name(),
+        "password": "testpass123",
+        "is_staff": True,
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+def create_apikey(**params):
+    """Create a sample API key and return it with its raw key."""
+    raw_key, hashed_key = APIKey.generate_key()
+    defaults = {
+        "name": fake.word(),
+        "key": hashed_key,
+        "created_by": create_user(),
+    }
+    defaults.update(params)
+    return APIKey.objects.create(**defaults), raw_key
+
+
+@patch.dict("os.environ", {"GITHUB_ACTIONS": "true"})
+class APIKeyAuthenticationCacheTests(TestCase):
+    """Test case for authenticating with cached API keys."""
+
+    def setUp(self):
+        APIKeyCache.clear_local()
+        self.factory = APIRequestFactory()
+        self.auth = APIAuthentication()
+
+    def authenticate(self, raw_key):
+        return self.auth.authenticate(
+            self.factory.get("/", HTTP_X_API_KEY=raw_key)
+        )
+
+    def test_cached_key_authenticates_without_query(self):
+        """Test only the first request with a key queries the database."""
+        api_key, raw_key = create_apikey()
+
+        with self.assertNumQueries(1):
+            self.authenticate(raw_key)
+        with self.assertNumQueries(0):
+            cached, _ = self.authenticate(raw_key)
+
+        self.assertEqual(cached.id, api_key.id)
+        self.assertEqual(cached.name, api_key.name)
+
+    def test_deactivated_key_is_rejected(self):
+        """Test deactivating a key removes it from the cache."""
+        api_key, raw_key = create_apikey()
+        self.authenticate(raw_key)
+
+        api_key.is_active = False
+        api_key.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(raw_key)
+
+    def test_deleted_key_is_rejected(self):
+        """Test deleting a key through the API removes it from the cache."""
+        api_key, raw_key = create_apikey()
+        self.authenticate(raw_key)
+        client = APIClient()
+        client.force_authenticate(user=create_user())
+
+        client.delete(reverse("apikey-destroy", args=[api_key.id]))
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(raw_key)
+
+    def test_cached_key_expires(self):
+        """Test the expiry of a cached key is checked on every request."""
+        api_key, raw_key = create_apikey(
+            expires_at=timezone.now() + timedelta(seconds=1)
+        )
+        self.authenticate(raw_key)
+
+        with patch(
+            "internal_api.auth.timezone.now",
+            return_value=timezone.now() + timedelta(seconds=2),
+        ):
+            with self.assertRaises(ValidationError):
+                self.authenticate(raw_key)
+
+
+@patch.dict("os.environ", {"GITHUB_ACTIONS": "false"})
+class APIKeyCacheTests(TestCase):
+    """Test case for the API key cache shared through Redis."""
+
+    def setUp(self):
+        APIKeyCache.clear_local()
+        self.redis = MagicMock()
+        self.cache = APIKeyCache(client=self.redis)
+
+    def test_key_cached_by_another_worker(self):
+        """Test a key cached in Redis is used and kept in memory."""
+        self.redis.get.return_value = json.dumps(
+            {"id": 7, "name": "judge", "expires_at": None}
+        )
+
+        api_key = self.cache.get("hash")
+        self.cache.get("hash")
+
+        self.assertEqual(api_key.id, 7)
+        self.assertIsNone(api_key.expires_at)
+        self.redis.get.assert_called_once_with("api-key:hash")
+
+    def test_set_shares_key_through_redis(self):
+        """Test a key found in the database is written to Redis."""
+        api_key, _ = create_apikey()
+        self.redis.reset_mock()
+
+        self.cache.set(api_key)
+
+        self.redis.set.assert_called_once_with(
+            f"api-key:{api_key.key}",
+            json.dumps({"id": api_key.id, "name": api_key.name, "expires_at": None}),
+            ex=APIKeyCache.REDIS_TTL,
+        )
+
+    def test_unavailable_redis_is_ignored(self):
+        """Test the database is used when Redis is down."""
+        self.redis.get.side_effect = redis.ConnectionError("Connection refused")
+
+        self.assertIsNone(self.cache.get("hash"))
+
+    def test_local_entries_are_evicted(self):
+        """Test the least recently used entries are evicted from memory."""
+        self.redis.get.return_value = None
+        entry = {"id": 1, "name": "judge", "expires_at": None}
+        with patch.object(APIKeyCache, "LOCAL_SIZE", 2):
+            for key_hash in ("a", "b", "c"):
+                self.cache._set_local(key_hash, entry)
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
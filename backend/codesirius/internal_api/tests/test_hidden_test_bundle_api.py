@@ -99,6 +99,48 @@ class HiddenTestBundleApiTests(TestCase):
         self.assertEqual(res.data["data"]["s3_path"], payload["s3_path"])
         self.assertEqual(res.data["data"]["test_count"], payload["test_count"])
 
+    def test_create_hidden_test_bundle_with_manifest(self):
+        """Test creating a hidden test bundle with a manifest of its files."""
+        manifest = {
+            "tests": [{"input": "a" * 64, "output": "b" * 64}],
+            "subtasks": None,
+        }
+        payload = {
+            "problem_id": self.problem.id,
+            "s3_path": f"processed/{self.problem.id}/tests/",
+            "test_count": 1,
+            "manifest": manifest,
+        }
+
+        url = reverse("hidden-test-bundle", args=[self.problem.id])
+        res = self.client.post(
+            url, data=payload, format="json", HTTP_X_API_KEY=self.raw_key
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(HiddenTestBundle.objects.get().manifest, manifest)
+
+    def test_create_hidden_test_bundle_invalid_manifest(self):
+        """Test a manifest not matching the test count or with bad digests."""
+        url = reverse("hidden-test-bundle", args=[self.problem.id])
+        for test_count, test in [
+            (2, {"input": "a" * 64, "output": "b" * 64}),
+            (1, {"input": "a" * 64, "output": "not-a-digest"}),
+            (1, {"input": "a" * 64}),
+        ]:
+            payload = {
+                "problem_id": self.problem.id,
+                "s3_path": f"processed/{self.problem.id}/tests/",
+                "test_count": test_count,
+                "manifest": {"tests": [test], "subtasks": None},
+            }
+            res = self.client.post(
+                url, data=payload, format="json", HTTP_X_API_KEY=self.raw_key
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(HiddenTestBundle.objects.exists())
+
     def test_create_hidden_test_bundle_duplicate(self):
         """Test creating a duplicate hidden test bundle fails."""
         # Create an existing hidden test bundle
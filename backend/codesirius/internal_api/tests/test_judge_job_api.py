@@ -0,0 +1,143 @@
+"""
+Test cases for the Judge Job API
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from faker import Faker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from internal_api.models.apikey import APIKey
+from problems.models import (
+    ExecutionConstraint,
+    HiddenTestBundle,
+    Language,
+    Problem,
+    Submission,
+)
+
+fake = Faker()
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.unique.email(),
+        "username": fake.unique.user_name(),
+        "password": "testpass123",
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+def create_apikey(created_by):
+    """Create and return a sample API key."""
+    raw_key, hashed_key = APIKey.generate_key()
+    apikey = APIKey.objects.create(
+        name=fake.word(), key=hashed_key, created_by=created_by
+    )
+    return apikey, raw_key
+
+
+class JudgeJobApiTests(TestCase):
+    """Test case for the Judge Job API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(is_staff=True)
+        self.apikey, self.raw_key = create_apikey(created_by=self.user)
+
+        self.python = Language.objects.create(
+            name="Python", version="3.12", created_by=self.user
+        )
+        self.cpp = Language.objects.create(
+            name="C++", version="17", created_by=self.user
+        )
+        self.problem = Problem.objects.create(
+            title=fake.sentence(), description=fake.text(), created_by=self.user
+        )
+        self.problem.languages.set([self.python, self.cpp])
+        ExecutionConstraint.objects.create(
+            problem=self.problem,
+            language=self.python,
+            time_limit=2,
+            memory_limit=256,
+            created_by=self.user,
+        )
+        ExecutionConstraint.objects.create(
+            problem=self.problem,
+            language=self.cpp,
+            time_limit=1,
+            memory_limit=64,
+            created_by=self.user,
+        )
+        self.submission = Submission.objects.create(
+            problem=self.problem,
+            language=self.python,
+            code="print(input())",
+            created_by=self.user,
+        )
+
+    def test_get_judge_job_success(self):
+        """Test the judge job holds the submission, constraint and bundle."""
+        HiddenTestBundle.objects.create(
+            problem=self.problem,
+            s3_path=f"processed/{self.problem.id}/hidden-tests.zip",
+            test_count=3,
+            created_by=self.user,
+        )
+        url = reverse("submission-judge-job", args=[self.submission.id])
+
+        res = self.client.get(url, HTTP_X_API_KEY=self.raw_key)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["data"],
+            {
+                "submission_id": self.submission.id,
+                "problem_id": self.problem.id,
+                "code": "print(input())",
+                "language": {
+                    "id": self.python.id,
+                    "name": "Python",
+                    "version": "3.12",
+                    "key": "python:3.12",
+                },
+                "constraints": {"time_limit": 2, "memory_limit": 256},
+                "hidden_test_bundle": {
+                    "s3_path": f"processed/{self.problem.id}/hidden-tests.zip",
+                    "test_count": 3,
+                    "manifest": {},
+                },
+            },
+        )
+
+    def test_get_judge_job_single_query(self):
+        """Test the judge job is fetched in one query (plus authentication)."""
+        url = reverse("submission-judge-job", args=[self.submission.id])
+
+        with self.assertNumQueries(2):
+            res = self.client.get(url, HTTP_X_API_KEY=self.raw_key)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data["data"]["hidden_test_bundle"])
+
+    def test_get_judge_job_not_found(self):
+        """Test fetching the judge job of a missing submission."""
+        url = reverse("submission-judge-job", args=[self.submission.id + 1])
+
+        res = self.client.get(url, HTTP_X_API_KEY=self.raw_key)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_judge_job_unauthorized(self):
+        """Test fetching the judge job without API key fails."""
+        url = reverse("submission-judge-job", args=[self.submission.id])
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -8,6 +8,7 @@ from internal_api.views.hidden_test_bundle import (
     HiddenTestBundleAPIView,
     # HiddenTestBundleRetrieveUpdateAPIView,
 )
+from internal_api.views.judge_job import JudgeJobRetrieveAPIView
 from internal_api.views.problem import ProblemRetrieveUpdateAPIView
 from internal_api.views.reference_solution import ReferenceSolutionVerdictUpdateAPIView
 from internal_api.views.submissions import SubmissionRetrieveUpdateAPIView
@@ -44,4 +45,9 @@ urlpatterns = [
         SubmissionRetrieveUpdateAPIView.as_view(),
         name="submission-retrieve-update",
     ),
+    path(
+        "submissions/<int:pk>/judge-job/",
+        JudgeJobRetrieveAPIView.as_view(),
+        name="submission-judge-job",
+    ),
 ]
@@ -0,0 +1,69 @@
+import logging
+
+from django.db.models import OuterRef, QuerySet, Subquery
+from rest_framework import status
+from rest_framework.views import APIView
+
+from codesirius.codesirius_api_response import CodesiriusAPIResponse
+from internal_api.auth import APIAuthentication
+from internal_api.serializers.judge_job import JudgeJobSerializer
+from problems.models import ExecutionConstraint, Submission
+
+logger = logging.getLogger(__name__)
+
+
+class JudgeJobRetrieveAPIView(APIView):
+    """
+    This view is a part of internal API and
+    intended to be used by the internal services only.
+
+    This view returns everything needed to judge a submission in a single
+    query: the code, the language, the execution constraint of that language
+    and the hidden test bundle of the problem.
+    """
+
+    authentication_classes = [APIAuthentication]
+
+    @staticmethod
+    def get_queryset() -> QuerySet[Submission]:
+        constraint = ExecutionConstraint.objects.filter(
+            problem=OuterRef("problem"), language=OuterRef("language")
+        )
+        return (
+            Submission.objects.select_related(
+                "language", "problem__hidden_test_bundle"
+            )
+            .only(
+                "id",
+                "code",
+                "problem",
+                "language",
+                "problem__id",
+                "problem__hidden_test_bundle__s3_path",
+                "problem__hidden_test_bundle__test_count",
+                "problem__hidden_test_bundle__manifest",
+                "language__name",
+                "language__version",
+            )
+            .annotate(
+                constraint_time_limit=Subquery(constraint.values("time_limit")[:1]),
+                constraint_memory_limit=Subquery(
+                    constraint.values("memory_limit")[:1]
+                ),
+            )
+        )
+
+    def get(self, request, pk):
+        """
+        Get the judge job of a submission by ID
+        """
+        logger.info(f"Fetching judge job of submission with ID: {pk}")
+        try:
+            submission = self.get_queryset().get(pk=pk)
+        except Submission.DoesNotExist:
+            return CodesiriusAPIResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                message="Submission not found",
+            )
+        logger.info(f"Judge job fetched successfully for submission ID: {pk}")
+        return CodesiriusAPIResponse(data=JudgeJobSerializer(submission).data)
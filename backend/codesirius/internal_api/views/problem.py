@@ -26,12 +26,7 @@ class ProblemRetrieveUpdateAPIView(APIView):
         logger.info(f"Fetching problem with ID: {pk}")
 
         try:
-            problem = Problem.objects.prefetch_related(
-                "sample_tests",
-                "hidden_test_bundle",
-                "execution_constraints",
-                "referencesolution_set",
-            ).get(pk=pk)
+            problem = Problem.objects.for_internal_serializer().get(pk=pk)
             logger.info(problem)
         except Problem.DoesNotExist:
             return CodesiriusAPIResponse(
@@ -13,6 +13,7 @@ from problems.models import (
     ExecutionConstraint,
     HiddenTestBundle,
     SampleTest,
+    OutboxMessage,
 )
 
 
@@ -119,10 +120,19 @@ admin.site.register(SampleTest, SampleTestAdmin)
 class HiddenTestBundleAdmin(admin.ModelAdmin):
     list_display = ("problem", "test_count", "created_at", "updated_at")
     search_fields = ("problem__title",)
-    readonly_fields = ("created_by", "created_at", "updated_by", "updated_at")
+    readonly_fields = (
+        "manifest",
+        "created_by",
+        "created_at",
+        "updated_by",
+        "updated_at",
+    )
 
     fieldsets = (
-        (_("Basic Info"), {"fields": ("problem", "s3_path", "test_count")}),
+        (
+            _("Basic Info"),
+            {"fields": ("problem", "s3_path", "test_count", "manifest")},
+        ),
         (
             _("Metadata"),
             {
@@ -144,3 +154,12 @@ class HiddenTestBundleAdmin(admin.ModelAdmin):
 
 # Register the model with the admin site
 admin.site.register(HiddenTestBundle, HiddenTestBundleAdmin)
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "key", "status", "attempts", "created_at")
+    list_filter = ("status", "topic")
+    search_fields = ("key",)
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
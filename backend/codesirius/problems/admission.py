@@ -0,0 +1,164 @@
+import logging
+import os
+from typing import Optional
+
+import redis
+from confluent_kafka import Consumer, KafkaException, TopicPartition
+from rest_framework.exceptions import Throttled
+
+from codesirius.kafa_producer import kafka_conf
+from codesirius.redis_client import RedisClientSingleton
+from problems.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+# consumer group judging the jobs of each topic
+CONSUMER_GROUPS = {
+    "python_submission": "python_submission_group",
+    "python_reference_solution_validation": (
+        "python_reference_solution_validation_group"
+    ),
+}
+
+# jobs waiting to be judged beyond which new jobs are turned away
+MAX_BACKLOG = int(os.environ.get("JUDGE_MAX_BACKLOG", 1000))
+# seconds between measurements of the backlog of a topic
+BACKLOG_REFRESH_INTERVAL = int(os.environ.get("JUDGE_BACKLOG_REFRESH_INTERVAL", 5))
+# seconds a measured backlog is trusted; once it is no longer measured, e.g.
+# while the broker is down, jobs are admitted
+BACKLOG_TTL = int(os.environ.get("JUDGE_BACKLOG_TTL", 15))
+# seconds clients are asked to wait when turned away
+RETRY_AFTER = int(os.environ.get("JUDGE_RETRY_AFTER", 30))
+# seconds to wait for the broker when measuring the lag
+LAG_TIMEOUT = float(os.environ.get("JUDGE_LAG_TIMEOUT", 2))
+
+
+class JudgeQueueAdmission:
+    """
+    Admission control for judge jobs: once too many jobs of a topic wait to
+    be judged, new ones are turned away with 429 Too Many Requests instead
+    of growing the queue without bound.
+
+    The backlog of a topic is the number of its jobs still in the outbox
+    plus the lag of its consumer group, the messages produced but not yet
+    committed by the judges. Measuring the lag takes a few broker round
+    trips, so it is done off the request path: the outbox relay calls
+    `refresh` every `BACKLOG_REFRESH_INTERVAL` seconds and stores the backlog
+    in Redis (`judge-queue:backlog:<topic>`) for `BACKLOG_TTL` seconds.
+    Requests only read it.
+
+    Jobs are admitted when no backlog has been measured recently: an
+    unavailable Kafka or Redis must not stop submissions.
+    """
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self._client = client
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("GITHUB_ACTIONS", "false") != "true"
+
+    @staticmethod
+    def backlog_key(topic: str) -> str:
+        return f"judge-queue:backlog:{topic}"
+
+    @staticmethod
+    def refresh_lock_key(topic: str) -> str:
+        return f"judge-queue:backlog-refresh:{topic}"
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = RedisClientSingleton(host="redis", port=6379).get_client()
+        return self._client
+
+    def check(self, topic: str) -> None:
+        """
+        Raises:
+            Throttled: If the backlog of `topic` is over `MAX_BACKLOG`.
+        """
+        if not self.enabled():
+            return
+        backlog = self.backlog(topic)
+        if backlog is not None and backlog > MAX_BACKLOG:
+            logger.warning(f"Turning away {topic} job, {backlog} jobs waiting")
+            raise Throttled(
+                wait=RETRY_AFTER, detail="Too many jobs are waiting to be judged."
+            )
+
+    def backlog(self, topic: str) -> Optional[int]:
+        """
+        The last measured backlog of `topic`, if it is recent.
+        """
+        try:
+            cached = self.client.get(self.backlog_key(topic))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to read the {topic} backlog: {e}")
+            return None
+        return int(cached) if cached is not None else None
+
+    def refresh(self, topic: str) -> Optional[int]:
+        """
+        Measure the backlog of `topic` and share it with all workers, unless
+        it was measured less than `BACKLOG_REFRESH_INTERVAL` seconds ago by
+        any relay. Returns the backlog if it was measured.
+        """
+        if not self.enabled():
+            return None
+        try:
+            # one measurement per interval, however many relays are running;
+            # a failed one is not retried before the interval is over either
+            if not self.client.set(
+                self.refresh_lock_key(topic),
+                1,
+                nx=True,
+                ex=BACKLOG_REFRESH_INTERVAL,
+            ):
+                return None
+            backlog = self.pending(topic) + self.lag(topic)
+            self.client.set(self.backlog_key(topic), backlog, ex=BACKLOG_TTL)
+            return backlog
+        except (redis.RedisError, KafkaException) as e:
+            logger.warning(f"Failed to measure the {topic} backlog: {e}")
+            return None
+
+    def refresh_all(self) -> None:
+        for topic in CONSUMER_GROUPS:
+            self.refresh(topic)
+
+    @staticmethod
+    def pending(topic: str) -> int:
+        return OutboxMessage.objects.filter(
+            topic=topic, status=OutboxMessage.Status.PENDING
+        ).count()
+
+    @staticmethod
+    def lag(topic: str) -> int:
+        """
+        Messages of `topic` not yet committed by its consumer group.
+        """
+        # a consumer that never subscribes does not join the group
+        consumer = Consumer(
+            {
+                "bootstrap.servers": kafka_conf["bootstrap.servers"],
+                "group.id": CONSUMER_GROUPS[topic],
+                "enable.auto.commit": False,
+            }
+        )
+        try:
+            metadata = consumer.list_topics(topic, timeout=LAG_TIMEOUT)
+            partitions = [
+                TopicPartition(topic, partition)
+                for partition in metadata.topics[topic].partitions
+            ]
+            lag = 0
+            for committed in consumer.committed(partitions, timeout=LAG_TIMEOUT):
+                low, high = consumer.get_watermark_offsets(
+                    committed, timeout=LAG_TIMEOUT
+                )
+                # nothing committed yet, the whole partition is waiting
+                offset = committed.offset if committed.offset >= 0 else low
+                lag += max(0, high - offset)
+            return lag
+        finally:
+            consumer.close()
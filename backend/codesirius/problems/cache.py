@@ -0,0 +1,249 @@
+import json
+import logging
+import os
+from typing import Iterable, Optional
+
+import redis
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from codesirius.redis_client import RedisClientSingleton
+from problems.models import Problem, Tag
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "problem-list"
+
+
+class PublishedProblemListCache:
+    """
+    Redis index of published problems, used to list them without the database.
+
+    - `problem-list:published` is a sorted set of the ids of all published
+      problems, scored by id so that the listing order matches the database.
+    - `problem-list:tag:<id>` is the same sorted set restricted to one tag.
+      Listing by several tags intersects these sets.
+    - `problem-list:item:<id>` is the serialized problem, the fragment pages
+      are assembled from.
+
+    The index is built from the database the first time it is needed and kept
+    up to date by the signal handlers in `problems.signals` once the changing
+    transaction commits. `invalidate` throws it away to be rebuilt.
+    """
+
+    READY_KEY = f"{KEY_PREFIX}:ready"
+    REBUILD_LOCK_KEY = f"{KEY_PREFIX}:rebuild-lock"
+    PUBLISHED_KEY = f"{KEY_PREFIX}:published"
+    TAGS_KEY = f"{KEY_PREFIX}:tags"
+
+    # seconds a rebuild may take before another process may start one
+    REBUILD_LOCK_TIMEOUT = 30
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self.client = (
+            client or RedisClientSingleton(host="redis", port=6379).get_client()
+        )
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.getenv("GITHUB_ACTIONS", "false") != "true"
+
+    @staticmethod
+    def tag_key(tag_id) -> str:
+        return f"{KEY_PREFIX}:tag:{tag_id}"
+
+    @staticmethod
+    def item_key(problem_id) -> str:
+        return f"{KEY_PREFIX}:item:{problem_id}"
+
+    @staticmethod
+    def queryset():
+        return Problem.objects.filter(status=Problem.Status.PUBLISHED).for_serializer()
+
+    @staticmethod
+    def serialize(problem: Problem) -> str:
+        # imported here as the serializers import the models of this app
+        from problems.serializers.problem import ProblemSerializer
+
+        return json.dumps(ProblemSerializer(instance=problem).data, cls=JSONEncoder)
+
+    def listing(self, tag_ids: list[int]) -> Optional["CachedProblemList"]:
+        """
+        The published problems having all of `tag_ids`, to be paginated.
+        Returns None if the index is not available yet.
+        """
+        if not self._ensure_index():
+            return None
+        return CachedProblemList(self, tag_ids)
+
+    def _ids(self, tag_ids: list[int]) -> list[str]:
+        # like the database query, tags that do not exist are ignored
+        pipe = self.client.pipeline(transaction=False)
+        for tag_id in tag_ids:
+            pipe.sismember(self.TAGS_KEY, tag_id)
+        keys = [
+            self.tag_key(tag_id)
+            for tag_id, exists in zip(tag_ids, pipe.execute())
+            if exists
+        ]
+        if not keys:
+            return self.client.zrange(self.PUBLISHED_KEY, 0, -1)
+        if len(keys) == 1:
+            return self.client.zrange(keys[0], 0, -1)
+        return self.client.zinter(keys, aggregate="MIN")
+
+    def _fragments(self, ids: list[str]) -> list[dict]:
+        if not ids:
+            return []
+        fragments = self.client.mget([self.item_key(problem_id) for problem_id in ids])
+        missing = [
+            int(problem_id)
+            for problem_id, fragment in zip(ids, fragments)
+            if fragment is None
+        ]
+        if missing:
+            # evicted or forgotten fragments are serialized again
+            filled = {}
+            pipe = self.client.pipeline(transaction=False)
+            for problem in self.queryset().filter(id__in=missing):
+                filled[str(problem.id)] = self.serialize(problem)
+                pipe.set(self.item_key(problem.id), filled[str(problem.id)])
+            pipe.execute()
+            fragments = [
+                fragment if fragment is not None else filled.get(problem_id)
+                for problem_id, fragment in zip(ids, fragments)
+            ]
+        return [json.loads(fragment) for fragment in fragments if fragment is not None]
+
+    def _ensure_index(self) -> bool:
+        if self.client.exists(self.READY_KEY):
+            return True
+        if not self.client.set(
+            self.REBUILD_LOCK_KEY, 1, nx=True, ex=self.REBUILD_LOCK_TIMEOUT
+        ):
+            # someone else is rebuilding the index
+            return False
+        try:
+            self.rebuild()
+        finally:
+            self.client.delete(self.REBUILD_LOCK_KEY)
+        return True
+
+    def rebuild(self) -> None:
+        logger.info("Rebuilding the published problem list cache")
+        problems = list(self.queryset())
+        tag_ids = list(Tag.objects.values_list("id", flat=True))
+        stale = [
+            key
+            for key in self.client.scan_iter(f"{KEY_PREFIX}:*")
+            if key != self.REBUILD_LOCK_KEY
+        ]
+
+        pipe = self.client.pipeline()
+        if stale:
+            pipe.delete(*stale)
+        if tag_ids:
+            pipe.sadd(self.TAGS_KEY, *tag_ids)
+        for problem in problems:
+            self._add(pipe, problem)
+        pipe.set(self.READY_KEY, 1)
+        pipe.execute()
+        logger.info(f"Cached {len(problems)} published problems")
+
+    def _add(self, pipe, problem: Problem) -> None:
+        pipe.zadd(self.PUBLISHED_KEY, {problem.id: problem.id})
+        for tag in problem.tags.all():
+            pipe.zadd(self.tag_key(tag.id), {problem.id: problem.id})
+        pipe.set(self.item_key(problem.id), self.serialize(problem))
+
+    def refresh(self, problem_id: int) -> None:
+        """
+        Bring a problem's entries in line with the database: index it if it is
+        published, remove it otherwise.
+        """
+        if not self.client.exists(self.READY_KEY):
+            # the next rebuild reads the problem from the database
+            return
+        problem = self.queryset().filter(id=problem_id).first()
+        pipe = self.client.pipeline()
+        pipe.zrem(self.PUBLISHED_KEY, problem_id)
+        for tag_id in self.client.smembers(self.TAGS_KEY):
+            pipe.zrem(self.tag_key(tag_id), problem_id)
+        pipe.delete(self.item_key(problem_id))
+        if problem is not None:
+            self._add(pipe, problem)
+        pipe.execute()
+
+    def forget(self, problem_ids: Iterable) -> None:
+        """
+        Drop serialized problems, e.g. after their constraints or sample
+        tests changed. They are serialized again when next listed.
+        """
+        keys = [self.item_key(problem_id) for problem_id in problem_ids]
+        if keys:
+            self.client.delete(*keys)
+
+    def refresh_tag(self, tag_id: int, deleted: bool = False) -> None:
+        # problems show the names of their tags
+        self.forget(self.client.zrange(self.tag_key(tag_id), 0, -1))
+        if deleted:
+            self.client.srem(self.TAGS_KEY, tag_id)
+            self.client.delete(self.tag_key(tag_id))
+        else:
+            self.client.sadd(self.TAGS_KEY, tag_id)
+
+    def invalidate(self) -> None:
+        self.client.delete(self.READY_KEY)
+
+
+class CachedProblemList:
+    """
+    Lazy sequence of serialized problems from the cache, sliced by the
+    paginator. Unfiltered listings are counted and sliced in Redis; filtered
+    ones fetch the matching ids once.
+    """
+
+    def __init__(self, cache: PublishedProblemListCache, tag_ids: list[int]):
+        self.cache = cache
+        self.filtered = bool(tag_ids)
+        self.tag_ids = tag_ids
+        self._matching_ids: Optional[list[str]] = None
+
+    @property
+    def ids(self) -> list[str]:
+        if self._matching_ids is None:
+            self._matching_ids = self.cache._ids(self.tag_ids)
+        return self._matching_ids
+
+    def count(self) -> int:
+        if self.filtered:
+            return len(self.ids)
+        return self.cache.client.zcard(self.cache.PUBLISHED_KEY)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index: slice) -> list[dict]:
+        if self.filtered:
+            return self.cache._fragments(self.ids[index])
+        ids = self.cache.client.zrange(
+            self.cache.PUBLISHED_KEY, index.start, index.stop - 1
+        )
+        return self.cache._fragments(ids)
+
+
+def update_problem_list_cache(method: str, *args, **kwargs) -> None:
+    """
+    Call `method` of the cache once the current transaction commits.
+    Cache errors are logged and never fail the request.
+    """
+    if not PublishedProblemListCache.enabled():
+        return
+
+    def update():
+        try:
+            getattr(PublishedProblemListCache(), method)(*args, **kwargs)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to update the problem list cache: {e}")
+
+    transaction.on_commit(update)
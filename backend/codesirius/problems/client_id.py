@@ -0,0 +1,127 @@
+import logging
+import math
+import time
+from typing import NamedTuple
+
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.request import Request
+
+from codesirius.redis_client import RedisClientSingleton
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket(NamedTuple):
+    # requests that may be made in a burst
+    capacity: int
+    # requests allowed per second once the burst is spent
+    rate: float
+
+
+# buckets of each action, per user and per user and problem
+RATE_LIMITS = {
+    "submission": {
+        "user": TokenBucket(capacity=20, rate=1 / 6),
+        "problem": TokenBucket(capacity=5, rate=1 / 12),
+    },
+    "reference-solution": {
+        "user": TokenBucket(capacity=20, rate=1 / 6),
+        "problem": TokenBucket(capacity=10, rate=1 / 6),
+    },
+    "hidden-test": {
+        "user": TokenBucket(capacity=5, rate=1 / 60),
+        "problem": TokenBucket(capacity=3, rate=1 / 60),
+    },
+}
+
+# Looks up the user of a clientId and takes a token from every bucket, but
+# only if all of them have one. Returns the user id and the seconds until
+# every bucket has a token again, 0 if the request is allowed.
+#
+# KEYS[1]: the clientId, KEYS[2..n]: the buckets
+# ARGV[1]: the current time, then the capacity and rate of each bucket
+VERIFY_SCRIPT = """
+local user_id = redis.call('GET', KEYS[1])
+local now = tonumber(ARGV[1])
+local tokens = {}
+local wait = 0
+for i = 2, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 2])
+    local rate = tonumber(ARGV[2 * i - 1])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'updated_at')
+    local available = tonumber(state[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    available = math.min(capacity, available + elapsed * rate)
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+    tokens[i] = available
+end
+for i = 2, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 2])
+    local rate = tonumber(ARGV[2 * i - 1])
+    if wait == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', KEYS[i], 'tokens', tokens[i], 'updated_at', now)
+    -- a bucket left alone until it is full again is the same as no bucket
+    redis.call('EXPIRE', KEYS[i], math.ceil(capacity / rate))
+end
+return {user_id, tostring(wait)}
+"""
+
+
+def bucket_key(action: str, user_id: int, problem_id=None) -> str:
+    if problem_id is None:
+        return f"rate-limit:{action}:user:{user_id}"
+    return f"rate-limit:{action}:user:{user_id}:problem:{problem_id}"
+
+
+def verify_client_id(request: Request, action: str, problem_id: int) -> str:
+    """
+    Check that the `clientId` of the request, the id of the websocket the
+    user waits for results on, belongs to the signed-in user, and take a
+    token from the user's `action` buckets: one for all problems and one for
+    `problem_id`.
+
+    Both checks run atomically in one Lua script, a single Redis round trip.
+
+    Returns:
+        The client id.
+
+    Raises:
+        ValidationError: If the client id is missing or not the user's.
+        Throttled: If a bucket of the user is empty.
+    """
+    client_id = request.data.get("clientId")
+    if not client_id:
+        raise ValidationError({"clientId": "clientId is required"})
+
+    buckets = RATE_LIMITS[action]
+    keys = [
+        client_id,
+        bucket_key(action, request.user.id),
+        bucket_key(action, request.user.id, problem_id),
+    ]
+    args = [time.time()]
+    for bucket in (buckets["user"], buckets["problem"]):
+        args.extend(bucket)
+
+    redis_client = RedisClientSingleton(host="redis", port=6379).get_client()
+    verify = redis_client.register_script(VERIFY_SCRIPT)
+    redis_user_id, wait = verify(keys=keys, args=args)
+
+    if float(wait) > 0:
+        logger.info(f"User {request.user.id} exceeded the {action} rate limit")
+        raise Throttled(wait=math.ceil(float(wait)))
+
+    logger.info(f"Redis user ID: {redis_user_id}")
+    if not redis_user_id:
+        raise ValidationError({"clientId": "Invalid clientId"})
+
+    if redis_user_id != str(request.user.id):
+        logger.info(f"User ID mismatch: {redis_user_id} != {request.user.id}")
+        # no need to let the client know about the mismatch
+        raise ValidationError({"clientId": "Invalid clientId"})
+
+    return client_id
@@ -0,0 +1,179 @@
+import logging
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from problems.models import Language, Problem, Submission
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "benchmark"
+
+
+class Rollback(Exception):
+    """Raised to discard the generated rows once the plans are checked."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a large synthetic data set and check with EXPLAIN that the hot "
+        "problem and submission lookups use their indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--submissions",
+            type=int,
+            default=1_000_000,
+            help="Number of submissions to generate",
+        )
+        parser.add_argument(
+            "--problems",
+            type=int,
+            default=5_000,
+            help="Number of problems to generate, a tenth of them drafts",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10_000,
+            help="Number of users submitting",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of rows inserted per query",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the generated rows instead of rolling them back",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.load(options)
+                failures = self.explain_all()
+                if not options["keep"]:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Rolled back the generated rows")
+
+        if failures:
+            raise CommandError(f"Indexes not used by: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All lookups use their indexes"))
+
+    def load(self, options):
+        started = time.monotonic()
+        batch_size = options["batch_size"]
+
+        language, _ = Language.objects.get_or_create(
+            name=f"{PREFIX}-python", version="3"
+        )
+        users = get_user_model().objects.bulk_create(
+            [
+                get_user_model()(
+                    first_name=PREFIX,
+                    username=f"{PREFIX}-{i}",
+                    email=f"{PREFIX}-{i}@example.com",
+                )
+                for i in range(options["users"])
+            ],
+            batch_size=batch_size,
+        )
+        problems = Problem.objects.bulk_create(
+            [
+                Problem(
+                    title=f"{PREFIX} problem {i}",
+                    status=(
+                        Problem.Status.DRAFT
+                        if i % 10 == 0
+                        else Problem.Status.PUBLISHED
+                    ),
+                    created_by=random.choice(users),
+                )
+                for i in range(options["problems"])
+            ],
+            batch_size=batch_size,
+        )
+
+        remaining = options["submissions"]
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            Submission.objects.bulk_create(
+                [
+                    Submission(
+                        problem=random.choice(problems),
+                        language=language,
+                        code="print(42)",
+                        created_by=random.choice(users),
+                    )
+                    for _ in range(count)
+                ]
+            )
+            remaining -= count
+
+        if connection.vendor == "postgresql":
+            # refresh the planner statistics for the new rows
+            with connection.cursor() as cursor:
+                for model in (Problem, Submission):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+        self.stdout.write(
+            f"Loaded {len(users)} users, {len(problems)} problems and "
+            f"{options['submissions']} submissions "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        self.sample = Submission.objects.filter(
+            created_by__in=users[:1]
+        ).first() or Submission.objects.first()
+
+    def lookups(self):
+        """
+        The lookups to explain, with the index each one is expected to use.
+        """
+        lookups = [
+            (
+                "user submissions",
+                Submission.objects.filter(
+                    problem_id=self.sample.problem_id,
+                    created_by_id=self.sample.created_by_id,
+                ).order_by("-created_at", "-id")[:20],
+                "submission_user_created_idx",
+            ),
+            (
+                "published problems",
+                Problem.objects.filter(status=Problem.Status.PUBLISHED).order_by(
+                    "-created_at", "-id"
+                )[:10],
+                "problem_published_idx",
+            ),
+        ]
+        if connection.vendor == "postgresql":
+            lookups.append(
+                (
+                    "title search",
+                    Problem.objects.filter(title__icontains="problem 4242"),
+                    "problem_title_trgm_idx",
+                )
+            )
+        return lookups
+
+    def explain_all(self) -> list[str]:
+        """
+        Print the plan of every lookup. Returns the lookups not using the
+        index they are expected to use.
+        """
+        failures = []
+        for name, queryset, index in self.lookups():
+            plan = queryset.explain()
+            self.stdout.write(f"\n{name}:\n{plan}")
+            if index not in plan:
+                logger.warning(f"{name} does not use {index}")
+                failures.append(name)
+        return failures
@@ -0,0 +1,166 @@
+import json
+import logging
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from codesirius.kafa_producer import KafkaProducerSingleton
+from problems.admission import JudgeQueueAdmission
+from problems.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Publish pending outbox messages to Kafka"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Maximum number of messages published per batch",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait for new messages once the outbox is empty",
+        )
+        parser.add_argument(
+            "--flush-timeout",
+            type=float,
+            default=10.0,
+            help="Seconds to wait for the broker to acknowledge a batch",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=10,
+            help="Failed attempts after which a message is no longer published",
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=7,
+            help="Days to keep published messages for",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Publish a single batch and exit",
+        )
+
+    def handle(self, *args, **options):
+        logger.info("Starting outbox relay")
+        admission = JudgeQueueAdmission()
+        while True:
+            # measured here so that submitting never waits for the broker
+            admission.refresh_all()
+            published = self.relay_batch(
+                options["batch_size"],
+                options["flush_timeout"],
+                options["max_attempts"],
+            )
+            if options["once"]:
+                break
+            if published < options["batch_size"]:
+                # caught up with the outbox
+                self.purge(options["retention_days"])
+                time.sleep(options["interval"])
+        KafkaProducerSingleton.shutdown()
+
+    @staticmethod
+    def relay_batch(
+        batch_size: int, flush_timeout: float, max_attempts: int
+    ) -> int:
+        """
+        Publish the oldest pending messages and wait for the broker to
+        acknowledge them. Returns the number of messages published.
+
+        A message that failed `max_attempts` times is marked FAILED, so that
+        a message that can never be published does not hold up the others.
+        """
+        with transaction.atomic():
+            # locked rows are skipped, so several relays never publish the
+            # same message concurrently
+            messages = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboxMessage.Status.PENDING)
+                .order_by("id")[:batch_size]
+            )
+            if not messages:
+                return 0
+
+            delivered = set()
+            errors = {}
+
+            def on_delivery(message_id, err, msg):
+                if err:
+                    errors[message_id] = str(err)
+                else:
+                    delivered.add(message_id)
+
+            produced = []
+            for message in messages:
+                try:
+                    KafkaProducerSingleton.produce_message(
+                        message.topic,
+                        value=json.dumps(message.payload),
+                        key=message.key,
+                        callback=partial(on_delivery, message.id),
+                    )
+                except BufferError as e:
+                    # the rest of the batch stays pending for the next round
+                    logger.warning(f"Kafka producer queue is full: {e}")
+                    break
+                except Exception as e:
+                    logger.error(f"Failed to publish outbox message {message.id}: {e}")
+                    errors[message.id] = str(e)
+                    continue
+                produced.append(message.id)
+            remaining = KafkaProducerSingleton.flush(flush_timeout)
+            if remaining:
+                logger.warning(f"{remaining} outbox messages were not acknowledged")
+
+            now = timezone.now()
+            OutboxMessage.objects.filter(id__in=delivered).update(
+                status=OutboxMessage.Status.PUBLISHED, published_at=now, updated_at=now
+            )
+            for message_id in produced:
+                if message_id not in delivered:
+                    errors.setdefault(message_id, "Delivery timed out")
+            attempts = {message.id: message.attempts for message in messages}
+            for message_id, error in errors.items():
+                failed = attempts[message_id] + 1 >= max_attempts
+                if failed:
+                    logger.error(
+                        f"Giving up on outbox message {message_id} after "
+                        f"{max_attempts} attempts: {error}"
+                    )
+                OutboxMessage.objects.filter(id=message_id).update(
+                    status=(
+                        OutboxMessage.Status.FAILED
+                        if failed
+                        else OutboxMessage.Status.PENDING
+                    ),
+                    attempts=F("attempts") + 1,
+                    last_error=error,
+                    updated_at=now,
+                )
+        logger.info(f"Published {len(delivered)} of {len(messages)} outbox messages")
+        return len(delivered)
+
+    @staticmethod
+    def purge(retention_days: int) -> None:
+        deleted, _ = OutboxMessage.objects.filter(
+            status=OutboxMessage.Status.PUBLISHED,
+            published_at__lt=timezone.now() - timedelta(days=retention_days),
+        ).delete()
+        if deleted:
+            logger.info(f"Purged {deleted} published outbox messages")
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0004_outboxmessage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="problem_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="submission",
+            index=models.Index(
+                fields=["problem", "created_by", "-created_at", "-id"],
+                name="submission_user_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:17
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0005_cursor_pagination_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="problem",
+            index=models.Index(
+                condition=models.Q(("status", "PUBLISHED")),
+                fields=["-created_at", "-id"],
+                name="problem_published_idx",
+            ),
+        ),
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="problem",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"),
+                    name="gin_trgm_ops",
+                ),
+                name="problem_title_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:20
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}description, '')), 'B')
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    # the vector is computed by the database so that bulk inserts and
+    # queryset updates keep it current too
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION problems_problem_search_vector_update()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR.format(row="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    schema_editor.execute(
+        "CREATE TRIGGER problems_problem_search_vector_trigger "
+        "BEFORE INSERT OR UPDATE ON problems_problem "
+        "FOR EACH ROW EXECUTE FUNCTION problems_problem_search_vector_update()"
+    )
+    schema_editor.execute(
+        f"UPDATE problems_problem SET search_vector = {SEARCH_VECTOR.format(row='')}"
+    )
+    schema_editor.execute(
+        "CREATE INDEX problem_search_vector_idx "
+        "ON problems_problem USING gin (search_vector)"
+    )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS problem_search_vector_idx")
+    schema_editor.execute(
+        "DROP TRIGGER IF EXISTS problems_problem_search_vector_trigger "
+        "ON problems_problem"
+    )
+    schema_editor.execute(
+        "DROP FUNCTION IF EXISTS problems_problem_search_vector_update()"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0006_problem_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="problem",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
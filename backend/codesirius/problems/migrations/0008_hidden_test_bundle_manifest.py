@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0007_problem_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="hiddentestbundle",
+            name="manifest",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
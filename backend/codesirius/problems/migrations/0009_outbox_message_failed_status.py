@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-18 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0008_hidden_test_bundle_manifest"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="outboxmessage",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("PUBLISHED", "Published"),
+                    ("FAILED", "Failed"),
+                ],
+                default="PENDING",
+                max_length=16,
+            ),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from problems.models.execution_constraint import ExecutionConstraint
 from problems.models.hidden_test_bundle import HiddenTestBundle
 from problems.models.language import Language
+from problems.models.outbox_message import OutboxMessage
 from problems.models.problem import Problem
 from problems.models.reference_solution import ReferenceSolution
 from problems.models.sample_test import SampleTest
@@ -16,4 +17,5 @@ __all__ = [
     "ExecutionConstraint",
     "SampleTest",
     "HiddenTestBundle",
+    "OutboxMessage",
 ]
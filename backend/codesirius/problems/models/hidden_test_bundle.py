@@ -1,3 +1,5 @@
+from typing import Optional
+
 from django.db import models
 
 from codesirius.models import BaseModel
@@ -9,12 +11,27 @@ class HiddenTestBundle(BaseModel):
     Model representing a hidden test bundle.
 
     A hidden test bundle is a bundle of hidden tests that belong to a problem.
-    The bundle is stored in an S3 bucket as a zip file.
+    Every input and output file of the bundle is stored in an S3 bucket under
+    `s3_path`, keyed by the SHA-256 of its contents, and the manifest lists
+    the files of each test:
+
+        {
+            "tests": [{"input": "<sha256>", "output": "<sha256>"}, ...],
+            "subtasks": [{"tests": [1, 2], "points": 40}, ...] or null
+        }
+
+    Test `i` is `tests[i - 1]`. A test is changed by uploading the files that
+    are new and pointing the manifest at them; files shared with other tests
+    or earlier versions are never uploaded again.
+
+    Bundles processed before manifests existed have an empty manifest and
+    are a zip file at `s3_path`.
 
     Attributes:
         problem (Problem): The problem that the hidden test belongs to.
         s3_path (str): The S3 path to the hidden test bundle.
         test_count (int): The number of hidden tests in the bundle.
+        manifest (dict): The content hashes of the files of each test.
     """
 
     problem = models.OneToOneField(
@@ -25,6 +42,7 @@ class HiddenTestBundle(BaseModel):
 
     s3_path = models.CharField(max_length=1000)
     test_count = models.PositiveIntegerField()
+    manifest = models.JSONField(default=dict, blank=True)
 
     class Meta:
         verbose_name = "Hidden Test Bundle"
@@ -32,3 +50,68 @@ class HiddenTestBundle(BaseModel):
 
     def __str__(self) -> str:
         return f"Hidden test bundle for {self.problem.title}"
+
+    def set_test(
+        self,
+        number: int,
+        input_digest: Optional[str] = None,
+        output_digest: Optional[str] = None,
+    ) -> None:
+        """
+        Replace the files of test `number`, or add it if it is the next test.
+        Files whose digest is None are kept.
+
+        Raises:
+            ValueError: If `number` is not an existing or the next test, or a
+                new test misses a file.
+        """
+        tests = self.manifest["tests"]
+        if not 1 <= number <= len(tests) + 1:
+            raise ValueError(f"Test number must be between 1 and {len(tests) + 1}")
+        if number == len(tests) + 1:
+            if input_digest is None or output_digest is None:
+                raise ValueError("A new test needs both an input and an output")
+            tests.append({})
+        test = tests[number - 1]
+        if input_digest is not None:
+            test["input"] = input_digest
+        if output_digest is not None:
+            test["output"] = output_digest
+        self.test_count = len(tests)
+
+    def remove_test(self, number: int) -> None:
+        """
+        Remove test `number`. The tests after it move up by one, in the
+        subtasks too.
+
+        Raises:
+            ValueError: If there is no such test, it is the last test of the
+                bundle or the only test of a subtask.
+        """
+        tests = self.manifest["tests"]
+        if not 1 <= number <= len(tests):
+            raise ValueError(f"Test number must be between 1 and {len(tests)}")
+        if len(tests) == 1:
+            raise ValueError("The last test cannot be removed, delete the bundle")
+        subtasks = self.manifest.get("subtasks") or []
+        for subtask in subtasks:
+            if subtask["tests"] == [number]:
+                raise ValueError(f"Test {number} is the only test of a subtask")
+        for subtask in subtasks:
+            subtask["tests"] = [
+                test if test < number else test - 1
+                for test in subtask["tests"]
+                if test != number
+            ]
+        del tests[number - 1]
+        self.test_count = len(tests)
+
+    def digests(self) -> set[str]:
+        """
+        The digests of all the files of the bundle.
+        """
+        return {
+            digest
+            for test in self.manifest.get("tests", [])
+            for digest in test.values()
+        }
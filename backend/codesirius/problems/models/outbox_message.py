@@ -0,0 +1,65 @@
+from django.db import models
+
+from codesirius.models import BaseModel
+
+
+class OutboxMessage(BaseModel):
+    """
+    Model representing a Kafka message waiting to be published.
+
+    Jobs for the consumers are not sent to Kafka from the request. Instead an
+    outbox message is saved in the same database transaction as the row the
+    job is about, and the `relay_outbox` management command publishes pending
+    messages in batches. A job is therefore dispatched if and only if its row
+    is committed, and request latency does not depend on the broker.
+
+    Delivery is at least once: a message whose acknowledgement was lost is
+    published again, and consumers do not deduplicate, so the same job may be
+    run twice.
+
+    Attributes:
+        topic (str): The Kafka topic to publish to.
+        key (str): Idempotency key of the job. It is unique, so enqueueing the
+            same job twice is a no-op. It is also the Kafka message key, which
+            keeps the messages of a job in one partition.
+        payload (dict): The message value.
+        status (str): PENDING until the broker acknowledged the message, or
+            FAILED once the relay gave up on it.
+        attempts (int): How many times publishing has failed.
+        last_error (str): The error of the last failed attempt.
+        published_at (datetime): When the broker acknowledged the message.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING"
+        PUBLISHED = "PUBLISHED"
+        FAILED = "FAILED"
+
+    topic = models.CharField(max_length=255)
+    key = models.CharField(max_length=255, unique=True)
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Outbox Message"
+        verbose_name_plural = "Outbox Messages"
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self) -> str:
+        return f"{self.topic}: {self.key} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, topic: str, key: str, payload: dict) -> "OutboxMessage":
+        """
+        Save a message to be published by the relay. Must be called inside
+        the transaction that saves the data the message refers to.
+        """
+        message, _ = cls.objects.get_or_create(
+            key=key, defaults={"topic": topic, "payload": payload}
+        )
+        return message
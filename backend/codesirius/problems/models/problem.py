@@ -1,10 +1,87 @@
+import re
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models
+from django.db.models.functions import Upper
 
 from codesirius.models import BaseModel
 from problems.models.language import Language
 from problems.models.tag import Tag
 
+# text search configuration of `Problem.search_vector`, see migration 0007
+SEARCH_CONFIG = "english"
+
+
+class ProblemQuerySet(models.QuerySet):
+    """
+    Query building blocks shared by the views listing or returning problems.
+
+    Each `for_*` method loads exactly the relations one serializer shape
+    renders, so serializing a page of problems costs a fixed number of
+    queries however long the page is.
+    """
+
+    def visible_to(self, user) -> "ProblemQuerySet":
+        """
+        Published problems, and the drafts of `user` if signed in.
+        """
+        visible = models.Q(status=Problem.Status.PUBLISHED)
+        if user.is_authenticated:
+            visible |= models.Q(created_by=user)
+        return self.filter(visible)
+
+    def search(self, text: str) -> "ProblemQuerySet":
+        """
+        Problems matching every word of `text` as a prefix, best matches
+        first. Matches in the title rank above matches in the description.
+
+        On PostgreSQL this uses the stored `search_vector`; other databases
+        fall back to substring matching, unranked.
+        """
+        words = re.findall(r"[^\W_]+", text)
+        if not words:
+            return self.none()
+
+        if connections[self.db].vendor != "postgresql":
+            matches = models.Q()
+            for word in words:
+                matches &= models.Q(title__icontains=word) | models.Q(
+                    description__icontains=word
+                )
+            return self.filter(matches)
+
+        query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            search_type="raw",
+            config=SEARCH_CONFIG,
+        )
+        return (
+            self.filter(search_vector=query)
+            .annotate(rank=SearchRank(models.F("search_vector"), query))
+            .order_by("-rank", "-id")
+        )
+
+    def for_serializer(self) -> "ProblemQuerySet":
+        """
+        Relations rendered by `problems.serializers.problem.ProblemSerializer`.
+        """
+        return self.select_related("hidden_test_bundle").prefetch_related(
+            "languages", "tags", "execution_constraints", "sample_tests"
+        )
+
+    def for_internal_serializer(self) -> "ProblemQuerySet":
+        """
+        Relations rendered by `internal_api.serializers.problem.ProblemSerializer`.
+        """
+        return self.select_related("hidden_test_bundle").prefetch_related(
+            "languages",
+            "sample_tests",
+            "execution_constraints",
+            "referencesolution_set",
+        )
+
 
 class Problem(BaseModel):
     """
@@ -18,6 +95,8 @@ class Problem(BaseModel):
         tags: A ManyToManyField representing the tags of the problem.
         languages: A ManyToManyField representing the languages of the problem.
         status: A CharField representing the status of the problem.
+        search_vector: A SearchVectorField of the words of the title and
+            description, used for full-text search.
     """
 
     class Status(models.TextChoices):
@@ -39,10 +118,31 @@ class Problem(BaseModel):
     difficulty = models.CharField(
         max_length=10, choices=Difficulty.choices, default=Difficulty.EASY
     )
+    # weighted title and description lexemes, maintained by a database
+    # trigger on PostgreSQL, see `ProblemQuerySet.search`
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProblemQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Problem"
         verbose_name_plural = "Problems"
+        indexes = [
+            # newest first, for cursor pagination
+            models.Index(fields=["-created_at", "-id"], name="problem_created_idx"),
+            # published problems only, for anonymous listings
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(status="PUBLISHED"),
+                name="problem_published_idx",
+            ),
+            # title__icontains compiles to UPPER(title) LIKE UPPER(%s), which
+            # only a trigram index on the same expression can serve
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="problem_title_trgm_idx",
+            ),
+        ]
 
     def check_ready_for_publish(self):
         """
@@ -16,6 +16,13 @@ class Submission(BaseSubmission):
     class Meta:
         verbose_name = "Submission"
         verbose_name_plural = "Submissions"
+        indexes = [
+            # a user's submissions of a problem, newest first
+            models.Index(
+                fields=["problem", "created_by", "-created_at", "-id"],
+                name="submission_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Submission for {self.problem.title} [{self.language}]"
@@ -5,6 +5,7 @@ from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import APIException
 
+from problems.cache import update_problem_list_cache
 from problems.models import ExecutionConstraint
 
 logger = logging.getLogger(__name__)
@@ -178,12 +179,15 @@ class ExecutionConstraintListSerializer(serializers.ListSerializer):
                 ExecutionConstraint(**data, problem=self.context["problem"])
                 for data in validated_data
             ]
-            return self.child.Meta.model.objects.bulk_create(
+            constraints = self.child.Meta.model.objects.bulk_create(
                 constraints,
                 update_conflicts=True,
                 unique_fields=["problem", "language"],
                 update_fields=["time_limit", "memory_limit"],
             )
+            # bulk_create does not send post_save
+            update_problem_list_cache("forget", [self.context["problem"].id])
+            return constraints
         except Exception as e:
             logger.error(f"Error: {e}")
             raise serializers.ValidationError(
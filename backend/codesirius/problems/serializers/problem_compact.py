@@ -0,0 +1,99 @@
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from django.db.models import QuerySet
+
+from problems.models import Problem
+
+# column of each compact field that is stored on the problem itself
+COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "difficulty": "difficulty",
+    "status": "status",
+}
+
+# compact field -> (through model of the relation, column of the related id)
+RELATIONS = {
+    "tagIds": (Problem.tags.through, "tag_id"),
+    "languageIds": (Problem.languages.through, "language_id"),
+}
+
+FIELDS = [*COLUMNS, *RELATIONS]
+
+
+class ProblemCompactSerializer:
+    """
+    Compact list representation of problems: id, title, difficulty, status,
+    tag ids and language ids, or any subset of them.
+
+    Unlike `ProblemSerializer` it works on `values()` rows, so no model
+    instances are built: one query for the rows and one per related id list.
+
+    Usage:
+        serializer = ProblemCompactSerializer(fields=["id", "title"])
+        rows = paginator.paginate_queryset(serializer.values(problems), request)
+        data = serializer.serialize(rows)
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = None):
+        """
+        Args:
+            fields: The fields to render, all of them by default.
+
+        Raises:
+            ValueError: If any of the fields is unknown.
+        """
+        self.fields = list(fields) if fields else FIELDS
+        unknown = [field for field in self.fields if field not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    def values(self, problems: QuerySet[Problem]) -> QuerySet:
+        # the id is needed to look up related ids, created_at to page by cursor
+        columns = {"id", "created_at"} | {
+            COLUMNS[f] for f in self.fields if f in COLUMNS
+        }
+        return problems.values(*sorted(columns))
+
+    def serialize(self, rows: Iterable[dict]) -> list[dict]:
+        rows = list(rows)
+        related = {}
+        for field in self.fields:
+            if field not in RELATIONS:
+                continue
+            through, column = RELATIONS[field]
+            ids = defaultdict(list)
+            for problem_id, related_id in (
+                through.objects.filter(problem_id__in=[row["id"] for row in rows])
+                .order_by(column)
+                .values_list("problem_id", column)
+            ):
+                ids[problem_id].append(related_id)
+            related[field] = ids
+
+        return [
+            {
+                field: (
+                    row[COLUMNS[field]]
+                    if field in COLUMNS
+                    else related[field].get(row["id"], [])
+                )
+                for field in self.fields
+            }
+            for row in rows
+        ]
+
+    def from_representation(self, problem: dict) -> dict:
+        """
+        Compact form of a problem serialized by `ProblemSerializer`.
+        """
+        related = {"tagIds": "tags", "languageIds": "languages"}
+        return {
+            field: (
+                problem[field]
+                if field in COLUMNS
+                else [item["id"] for item in problem[related[field]]]
+            )
+            for field in self.fields
+        }
@@ -4,6 +4,7 @@ from typing import TypedDict, NotRequired
 from django.db import transaction
 from rest_framework import serializers
 
+from problems.cache import update_problem_list_cache
 from problems.models.sample_test import SampleTest
 from problems.serializers.execution_constraint_v2 import BulkOperationError
 
@@ -117,12 +118,15 @@ class SampleTestListSerializer(serializers.ListSerializer):
                 SampleTest(**data, problem=self.context["problem"])
                 for data in validated_data
             ]
-            return SampleTest.objects.bulk_create(
+            sample_tests = SampleTest.objects.bulk_create(
                 sample_tests,
                 update_conflicts=True,
                 unique_fields=["id"],
                 update_fields=["input", "output"],
             )
+            # bulk_create does not send post_save
+            update_problem_list_cache("forget", [self.context["problem"].id])
+            return sample_tests
         except Exception as e:
             logger.error(f"Error: {e}")
             raise serializers.ValidationError(str(e))
@@ -1,8 +1,13 @@
 # problems/signals.py
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+from problems.cache import update_problem_list_cache
+from problems.models.hidden_test_bundle import HiddenTestBundle
+from problems.models.language import Language
 from problems.models.problem import Problem
 from problems.models.execution_constraint import ExecutionConstraint
+from problems.models.sample_test import SampleTest
+from problems.models.tag import Tag
 
 
 @receiver(m2m_changed, sender=Problem.languages.through)
@@ -17,3 +22,77 @@ def remove_execution_constraints_on_language_removal(
         ExecutionConstraint.objects.filter(
             problem=instance, language_id__in=pk_set
         ).delete()
+
+
+@receiver(post_save, sender=Problem)
+@receiver(post_delete, sender=Problem)
+def refresh_cached_problem(sender, instance, **kwargs):
+    """
+    Signal handler that updates the cached problem list when a problem is
+    saved (e.g. published) or deleted.
+    """
+    update_problem_list_cache("refresh", instance.id)
+
+
+@receiver(m2m_changed, sender=Problem.tags.through)
+def refresh_cached_problem_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Signal handler that updates the cached problem list when the tags of a
+    problem change.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        update_problem_list_cache("refresh", instance.id)
+    elif pk_set:
+        for problem_id in pk_set:
+            update_problem_list_cache("refresh", problem_id)
+    else:
+        update_problem_list_cache("invalidate")
+
+
+@receiver(m2m_changed, sender=Problem.languages.through)
+def forget_cached_problem_languages(sender, instance, action, reverse, **kwargs):
+    """
+    Signal handler that drops a cached problem when its languages change.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        update_problem_list_cache("invalidate")
+    else:
+        update_problem_list_cache("forget", [instance.id])
+
+
+@receiver(post_save, sender=ExecutionConstraint)
+@receiver(post_delete, sender=ExecutionConstraint)
+@receiver(post_save, sender=SampleTest)
+@receiver(post_delete, sender=SampleTest)
+@receiver(post_save, sender=HiddenTestBundle)
+@receiver(post_delete, sender=HiddenTestBundle)
+def forget_cached_problem(sender, instance, **kwargs):
+    """
+    Signal handler that drops a cached problem when data shown with it
+    changes.
+    """
+    update_problem_list_cache("forget", [instance.problem_id])
+
+
+@receiver(post_save, sender=Tag)
+def refresh_cached_tag(sender, instance, **kwargs):
+    update_problem_list_cache("refresh_tag", instance.id)
+
+
+@receiver(post_delete, sender=Tag)
+def remove_cached_tag(sender, instance, **kwargs):
+    update_problem_list_cache("refresh_tag", instance.id, deleted=True)
+
+
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def invalidate_cached_problems(sender, instance, **kwargs):
+    """
+    Signal handler that rebuilds the cached problem list when a language,
+    which may be shown with any problem, changes.
+    """
+    update_problem_list_cache("invalidate")
@@ -0,0 +1,137 @@
+"""
+Test cases for the judge queue admission control
+"""
+
+from unittest.mock import MagicMock, patch
+
+from confluent_kafka import KafkaException
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from faker import Faker
+from rest_framework import status
+from rest_framework.exceptions import Throttled
+from rest_framework.test import APIClient
+
+from problems.admission import MAX_BACKLOG, RETRY_AFTER, JudgeQueueAdmission
+from problems.models import OutboxMessage, Problem
+
+fake = Faker()
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.unique.email(),
+        "username": fake.unique.user_name(),
+        "password": "testpass123",
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+@patch.dict("os.environ", {"GITHUB_ACTIONS": "false"})
+class JudgeQueueAdmissionTests(TestCase):
+    """Test case for turning away judge jobs when the backlog is too long."""
+
+    def setUp(self):
+        self.redis = MagicMock()
+        self.admission = JudgeQueueAdmission(client=self.redis)
+
+    def test_cached_backlog_is_reused(self):
+        """Test a backlog measured by any worker is reused."""
+        self.redis.get.return_value = str(MAX_BACKLOG)
+
+        with patch.object(JudgeQueueAdmission, "lag") as mock_lag:
+            self.admission.check("python_submission")
+
+        mock_lag.assert_not_called()
+
+    @patch.object(JudgeQueueAdmission, "lag")
+    def test_check_does_not_measure(self, mock_lag):
+        """Test jobs are admitted without waiting for the broker."""
+        self.redis.get.return_value = None
+
+        self.admission.check("python_submission")
+
+        mock_lag.assert_not_called()
+        self.redis.set.assert_not_called()
+
+    @patch.object(JudgeQueueAdmission, "lag", return_value=MAX_BACKLOG)
+    def test_refresh_counts_outbox_and_lag(self, mock_lag):
+        """Test jobs still in the outbox count towards the backlog."""
+        self.redis.set.return_value = True
+        OutboxMessage.enqueue("python_submission", "submission-1", {})
+        OutboxMessage.enqueue("hidden_test", "hidden-test-1", {})
+
+        self.assertEqual(self.admission.refresh("python_submission"), MAX_BACKLOG + 1)
+
+        mock_lag.assert_called_once_with("python_submission")
+        self.redis.set.assert_any_call(
+            "judge-queue:backlog-refresh:python_submission", 1, nx=True, ex=5
+        )
+        self.redis.set.assert_called_with(
+            "judge-queue:backlog:python_submission", MAX_BACKLOG + 1, ex=15
+        )
+
+        self.redis.get.return_value = str(MAX_BACKLOG + 1)
+        with self.assertRaises(Throttled) as cm:
+            self.admission.check("python_submission")
+        self.assertEqual(cm.exception.wait, RETRY_AFTER)
+
+    @patch.object(JudgeQueueAdmission, "lag")
+    def test_refresh_once_per_interval(self, mock_lag):
+        """Test the backlog is not measured again within the interval."""
+        # another relay holds the refresh lock
+        self.redis.set.return_value = None
+
+        self.assertIsNone(self.admission.refresh("python_submission"))
+
+        mock_lag.assert_not_called()
+
+    @patch.object(JudgeQueueAdmission, "lag", side_effect=KafkaException())
+    def test_unmeasurable_backlog_admits(self, mock_lag):
+        """Test jobs are admitted when Kafka is unavailable."""
+        self.redis.set.return_value = True
+        self.redis.get.return_value = None
+
+        self.assertIsNone(self.admission.refresh("python_submission"))
+        self.admission.check("python_submission")
+
+        # only the refresh lock, which keeps the next measurement back
+        self.redis.set.assert_called_once()
+
+    @patch.dict("os.environ", {"GITHUB_ACTIONS": "true"})
+    def test_disabled(self):
+        """Test nothing is measured without Kafka."""
+        self.admission.check("python_submission")
+
+        self.redis.get.assert_not_called()
+
+
+@patch.dict("os.environ", {"GITHUB_ACTIONS": "false"})
+@patch("problems.admission.RedisClientSingleton")
+class SubmissionAdmissionApiTests(TestCase):
+    """Test case for creating submissions while the judges are overloaded."""
+
+    def test_create_submission_overloaded(self, mock_redis):
+        """Test submissions are turned away with Retry-After."""
+        mock_redis.return_value.get_client.return_value.get.return_value = str(
+            MAX_BACKLOG + 1
+        )
+        user = create_user()
+        problem = Problem.objects.create(title=fake.sentence(), created_by=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        res = client.post(
+            reverse("submission-list-create", args=[problem.id]),
+            {"clientId": "client", "code": "print(1)"},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], str(RETRY_AFTER))
+        self.assertFalse(OutboxMessage.objects.exists())
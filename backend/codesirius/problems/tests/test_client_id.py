@@ -0,0 +1,95 @@
+"""
+Test cases for the clientId verification and rate limiting
+"""
+
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from faker import Faker
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from problems.client_id import RATE_LIMITS, bucket_key, verify_client_id
+
+fake = Faker()
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.unique.email(),
+        "username": fake.unique.user_name(),
+        "password": "testpass123",
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+@patch("problems.client_id.RedisClientSingleton")
+class VerifyClientIdTests(TestCase):
+    """Test case for verifying clientIds and taking rate limit tokens."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.redis = MagicMock()
+        self.script = self.redis.register_script.return_value
+
+    def request(self, data):
+        request = Request(
+            APIRequestFactory().post("/", data, format="json"),
+            parsers=[JSONParser()],
+        )
+        request.user = self.user
+        return request
+
+    def test_verify_in_one_script(self, mock_redis):
+        """Test the lookup and both buckets are handled by one script call."""
+        mock_redis.return_value.get_client.return_value = self.redis
+        self.script.return_value = [str(self.user.id), "0"]
+
+        client_id = verify_client_id(self.request({"clientId": "c"}), "submission", 3)
+
+        self.assertEqual(client_id, "c")
+        self.script.assert_called_once()
+        kwargs = self.script.call_args.kwargs
+        self.assertEqual(
+            kwargs["keys"],
+            [
+                "c",
+                bucket_key("submission", self.user.id),
+                bucket_key("submission", self.user.id, 3),
+            ],
+        )
+        user, problem = RATE_LIMITS["submission"].values()
+        self.assertEqual(kwargs["args"][1:], [*user, *problem])
+        self.redis.get.assert_not_called()
+
+    def test_client_id_of_another_user(self, mock_redis):
+        """Test a clientId registered by another user is rejected."""
+        mock_redis.return_value.get_client.return_value = self.redis
+        self.script.return_value = [str(self.user.id + 1), "0"]
+
+        with self.assertRaises(ValidationError):
+            verify_client_id(self.request({"clientId": "c"}), "submission", 3)
+
+    def test_missing_client_id(self, mock_redis):
+        """Test a request without clientId is rejected before Redis is used."""
+        with self.assertRaises(ValidationError):
+            verify_client_id(self.request({}), "submission", 3)
+
+        mock_redis.assert_not_called()
+
+    def test_empty_bucket(self, mock_redis):
+        """Test requests are throttled until a token is available again."""
+        mock_redis.return_value.get_client.return_value = self.redis
+        self.script.return_value = [str(self.user.id), "11.2"]
+
+        with self.assertRaises(Throttled) as cm:
+            verify_client_id(self.request({"clientId": "c"}), "hidden-test", 3)
+
+        self.assertEqual(cm.exception.wait, 12)
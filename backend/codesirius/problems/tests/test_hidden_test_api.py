@@ -2,16 +2,18 @@
 Test cases for the Hidden Test API
 """
 
+import hashlib
 from unittest.mock import patch, MagicMock
 
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.urls import reverse
 from faker import Faker
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from problems.models import Problem, HiddenTestBundle
+from problems.models import Problem, HiddenTestBundle, OutboxMessage
 
 fake = Faker()
 
@@ -83,22 +85,23 @@ class HiddenTestApiTests(TestCase):
         res = self.client.get(url)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
-    @patch("problems.views.hidden_test.KafkaProducerSingleton")
-    @patch("problems.views.hidden_test.RedisClientSingleton")
-    def test_initiate_process_success(self, mock_redis, mock_kafka):
+    @patch("problems.client_id.RedisClientSingleton")
+    def test_initiate_process_success(self, mock_redis):
         """Test initiating hidden test processing successfully."""
         mock_redis_client = MagicMock()
-        mock_redis_client.get.return_value = str(self.user.id)
+        mock_redis_client.register_script.return_value.return_value = [
+            str(self.user.id),
+            "0",
+        ]
         mock_redis.return_value.get_client.return_value = mock_redis_client
 
-        mock_kafka_producer = MagicMock()
-        mock_kafka.produce_message = mock_kafka_producer
-
         url = reverse("hidden-test-process", args=[self.problem.id])
         res = self.client.post(url, {"clientId": "test-client-id"})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        mock_kafka_producer.assert_called_once()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.topic, "hidden_test")
+        self.assertEqual(message.payload["problem_id"], self.problem.id)
 
     def test_initiate_process_missing_client_id(self):
         """Test initiating process without client ID fails."""
@@ -107,11 +110,11 @@ class HiddenTestApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("clientId", str(res.data))
 
-    @patch("problems.views.hidden_test.RedisClientSingleton")
+    @patch("problems.client_id.RedisClientSingleton")
     def test_initiate_process_invalid_client_id(self, mock_redis):
         """Test initiating process with invalid client ID fails."""
         mock_redis_client = MagicMock()
-        mock_redis_client.get.return_value = None
+        mock_redis_client.register_script.return_value.return_value = [None, "0"]
         mock_redis.return_value.get_client.return_value = mock_redis_client
 
         url = reverse("hidden-test-process", args=[self.problem.id])
@@ -134,7 +137,10 @@ class HiddenTestApiTests(TestCase):
         res = self.client.delete(url)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        mock_s3_client.delete_object.assert_called_once()
+        mock_s3_client.delete_objects.assert_called_once_with(
+            Bucket="codesirius-tests-data",
+            Delete={"Objects": [{"Key": "test/path"}, {"Key": "test/path.pack"}]},
+        )
         self.assertFalse(HiddenTestBundle.objects.filter(id=hidden_test.id).exists())
 
     def test_delete_hidden_tests_not_found(self):
@@ -154,3 +160,171 @@ class HiddenTestApiTests(TestCase):
         url = reverse("hidden-test-delete", args=[other_problem.id])
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+def digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class HiddenTestUpdateApiTests(TestCase):
+    """Test cases for adding, replacing and removing single hidden tests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.problem = create_problem(created_by=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.bundle = HiddenTestBundle.objects.create(
+            problem=self.problem,
+            s3_path=f"processed/{self.problem.id}/tests/",
+            test_count=3,
+            manifest={
+                "tests": [
+                    {"input": digest(b"1"), "output": digest(b"2")},
+                    {"input": digest(b"2"), "output": digest(b"4")},
+                    {"input": digest(b"3"), "output": digest(b"6")},
+                ],
+                "subtasks": [
+                    {"tests": [1, 2], "points": 40},
+                    {"tests": [3], "points": 60},
+                ],
+            },
+        )
+
+        patcher = patch("problems.views.hidden_test.AWSClient")
+        self.s3_client = patcher.start().return_value.get_client.return_value
+        self.addCleanup(patcher.stop)
+
+    def url(self, test_number):
+        return reverse("hidden-test", args=[self.problem.id, test_number])
+
+    def test_replace_uploads_only_new_files(self):
+        """Test replacing a test uploads only contents not in the bundle."""
+        res = self.client.put(
+            self.url(2),
+            {
+                "input": SimpleUploadedFile("input2.txt", b"3"),
+                "output": SimpleUploadedFile("output2.txt", b"8"),
+            },
+            format="multipart",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.s3_client.upload_fileobj.assert_called_once()
+        self.assertEqual(
+            self.s3_client.upload_fileobj.call_args.args[2],
+            f"processed/{self.problem.id}/tests/{digest(b'8')}",
+        )
+        self.bundle.refresh_from_db()
+        self.assertEqual(
+            self.bundle.manifest["tests"][1],
+            {"input": digest(b"3"), "output": digest(b"8")},
+        )
+
+    def test_replace_output_only(self):
+        """Test replacing only the output of a test keeps its input."""
+        res = self.client.put(
+            self.url(1),
+            {"output": SimpleUploadedFile("output1.txt", b"3")},
+            format="multipart",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.bundle.refresh_from_db()
+        self.assertEqual(
+            self.bundle.manifest["tests"][0],
+            {"input": digest(b"1"), "output": digest(b"3")},
+        )
+
+    def test_add_test(self):
+        """Test adding the next test."""
+        res = self.client.put(
+            self.url(4),
+            {
+                "input": SimpleUploadedFile("input4.txt", b"4"),
+                "output": SimpleUploadedFile("output4.txt", b"8"),
+            },
+            format="multipart",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["data"]["test_count"], 4)
+        self.bundle.refresh_from_db()
+        self.assertEqual(self.bundle.test_count, 4)
+        # the input is the output of test 2
+        self.s3_client.upload_fileobj.assert_called_once()
+
+    def test_add_test_needs_both_files(self):
+        """Test a new test without an output or out of sequence fails."""
+        for test_number in (4, 6):
+            res = self.client.put(
+                self.url(test_number),
+                {"input": SimpleUploadedFile("input.txt", b"4")},
+                format="multipart",
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.s3_client.upload_fileobj.assert_not_called()
+        self.bundle.refresh_from_db()
+        self.assertEqual(self.bundle.test_count, 3)
+
+    def test_remove_test_renumbers_subtasks(self):
+        """Test removing a test moves the later tests up."""
+        res = self.client.delete(self.url(1))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.bundle.refresh_from_db()
+        self.assertEqual(self.bundle.test_count, 2)
+        self.assertEqual(self.bundle.manifest["tests"][0]["input"], digest(b"2"))
+        self.assertEqual(
+            self.bundle.manifest["subtasks"],
+            [{"tests": [1], "points": 40}, {"tests": [2], "points": 60}],
+        )
+        self.s3_client.delete_objects.assert_not_called()
+
+    def test_remove_only_test_of_subtask(self):
+        """Test removing the only test of a subtask fails."""
+        res = self.client.delete(self.url(3))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.bundle.refresh_from_db()
+        self.assertEqual(self.bundle.test_count, 3)
+
+    def test_update_bundle_without_manifest(self):
+        """Test bundles processed before manifests cannot be edited."""
+        self.bundle.manifest = {}
+        self.bundle.save()
+
+        res = self.client.delete(self.url(1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_not_owner(self):
+        """Test editing the tests of another user's problem fails."""
+        self.client.force_authenticate(user=create_user())
+
+        res = self.client.delete(self.url(1))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_delete_bundle_deletes_all_files(self):
+        """Test deleting a bundle with a manifest deletes all its files."""
+        self.s3_client.get_paginator.return_value.paginate.return_value = [
+            {"Contents": [{"Key": "a"}, {"Key": "b"}]},
+            {},
+        ]
+
+        res = self.client.delete(
+            reverse("hidden-test-delete", args=[self.problem.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.s3_client.get_paginator.return_value.paginate.assert_called_once_with(
+            Bucket="codesirius-tests-data",
+            Prefix=f"processed/{self.problem.id}/tests/",
+        )
+        self.s3_client.delete_objects.assert_called_once_with(
+            Bucket="codesirius-tests-data",
+            Delete={"Objects": [{"Key": "a"}, {"Key": "b"}]},
+        )
+        self.assertFalse(HiddenTestBundle.objects.exists())
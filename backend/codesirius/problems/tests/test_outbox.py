@@ -0,0 +1,195 @@
+"""
+Test cases for the outbox and its relay
+"""
+
+from unittest.mock import patch, MagicMock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from faker import Faker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from problems.models import Language, OutboxMessage, Problem, Submission
+
+fake = Faker()
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.unique.email(),
+        "username": fake.unique.user_name(),
+        "password": "testpass123",
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+def create_problem(created_by=None, **params):
+    """Create and return a sample problem."""
+    defaults = {
+        "title": fake.sentence(),
+        "description": fake.text(),
+        "created_by": created_by or create_user(),
+    }
+    defaults.update(params)
+    return Problem.objects.create(**defaults)
+
+
+def create_message(**params):
+    """Create and return a pending outbox message."""
+    defaults = {
+        "topic": "python_submission",
+        "key": fake.unique.uuid4(),
+        "payload": {"submission_id": 1},
+    }
+    defaults.update(params)
+    return OutboxMessage.objects.create(**defaults)
+
+
+class OutboxMessageTests(TestCase):
+    """Test case for enqueueing outbox messages."""
+
+    def test_enqueue_is_idempotent(self):
+        """Test enqueueing the same key twice saves one message."""
+        first = OutboxMessage.enqueue("python_submission", "submission-1", {"a": 1})
+        second = OutboxMessage.enqueue("python_submission", "submission-1", {"a": 2})
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        self.assertEqual(
+            OutboxMessage.objects.get().status, OutboxMessage.Status.PENDING
+        )
+
+    @patch("codesirius.kafa_producer.KafkaProducerSingleton.produce_message")
+    @patch("problems.client_id.RedisClientSingleton")
+    def test_create_submission_enqueues_job(self, mock_redis, mock_produce):
+        """Test creating a submission saves its job in the same transaction."""
+        mock_redis_client = MagicMock()
+        mock_redis.return_value.get_client.return_value = mock_redis_client
+        user = create_user()
+        mock_redis_client.register_script.return_value.return_value = [
+            str(user.id),
+            "0",
+        ]
+        language = Language.objects.create(name="python", version="3.12")
+        problem = create_problem(created_by=user)
+        problem.languages.add(language)
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse("submission-list-create", args=[problem.id])
+        res = client.post(
+            url,
+            {"clientId": "client", "code": "print(1)", "languageId": language.id},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        mock_produce.assert_not_called()
+        submission = Submission.objects.get()
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.key, f"submission-{submission.id}")
+        self.assertEqual(message.payload["submission_id"], submission.id)
+
+
+@patch("problems.management.commands.relay_outbox.KafkaProducerSingleton")
+class RelayOutboxCommandTests(TestCase):
+    """Test case for the relay_outbox management command."""
+
+    def test_publishes_pending_messages_in_order(self, mock_kafka):
+        """Test pending messages are published with their keys."""
+        mock_kafka.produce_message.side_effect = (
+            lambda topic, value, key, callback: callback(None, MagicMock())
+        )
+        mock_kafka.flush.return_value = 0
+        first, second = create_message(), create_message()
+        create_message(status=OutboxMessage.Status.PUBLISHED)
+
+        call_command("relay_outbox", "--once")
+
+        keys = [c.kwargs["key"] for c in mock_kafka.produce_message.call_args_list]
+        self.assertEqual(keys, [first.key, second.key])
+        mock_kafka.flush.assert_called_once()
+        for message in (first, second):
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutboxMessage.Status.PUBLISHED)
+            self.assertIsNotNone(message.published_at)
+
+    def test_failed_delivery_stays_pending(self, mock_kafka):
+        """Test messages the broker did not acknowledge are retried later."""
+
+        def produce(topic, value, key, callback):
+            if key == failed.key:
+                callback("Broker unavailable", None)
+
+        mock_kafka.produce_message.side_effect = produce
+        mock_kafka.flush.return_value = 1
+        failed, timed_out = create_message(), create_message()
+
+        call_command("relay_outbox", "--once")
+
+        failed.refresh_from_db()
+        timed_out.refresh_from_db()
+        self.assertEqual(failed.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(failed.last_error, "Broker unavailable")
+        self.assertEqual(timed_out.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(timed_out.last_error, "Delivery timed out")
+
+    def test_full_queue_stops_the_batch(self, mock_kafka):
+        """Test the rest of a batch is left alone when producing fails."""
+        mock_kafka.produce_message.side_effect = BufferError("Queue full")
+        mock_kafka.flush.return_value = 0
+        first, second = create_message(), create_message()
+
+        call_command("relay_outbox", "--once")
+
+        self.assertEqual(mock_kafka.produce_message.call_count, 1)
+        for message in (first, second):
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutboxMessage.Status.PENDING)
+            self.assertEqual(message.attempts, 0)
+
+    def test_failed_message_does_not_stop_the_batch(self, mock_kafka):
+        """Test messages after one that cannot be produced are published."""
+
+        def produce(topic, value, key, callback):
+            if key == failed.key:
+                raise Exception("Message too large")
+            callback(None, MagicMock())
+
+        mock_kafka.produce_message.side_effect = produce
+        mock_kafka.flush.return_value = 0
+        failed, published = create_message(), create_message()
+
+        call_command("relay_outbox", "--once")
+
+        failed.refresh_from_db()
+        published.refresh_from_db()
+        self.assertEqual(failed.status, OutboxMessage.Status.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(failed.last_error, "Message too large")
+        self.assertEqual(published.status, OutboxMessage.Status.PUBLISHED)
+
+    def test_message_fails_after_max_attempts(self, mock_kafka):
+        """Test the relay gives up on a message that keeps failing."""
+        mock_kafka.produce_message.side_effect = Exception("Message too large")
+        mock_kafka.flush.return_value = 0
+        message = create_message(attempts=2)
+
+        call_command("relay_outbox", "--once", "--max-attempts", "3")
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.Status.FAILED)
+        self.assertEqual(message.attempts, 3)
+
+        call_command("relay_outbox", "--once", "--max-attempts", "3")
+
+        # no longer selected
+        self.assertEqual(mock_kafka.produce_message.call_count, 1)
@@ -2,7 +2,12 @@
 Test cases for the Problem API
 """
 
+import warnings
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
 from faker import Faker
@@ -112,6 +117,22 @@ class ProblemApiTests(TestCase):
         self.assertEqual(res.data["data"]["results"][0]["title"], problem1.title)
         self.assertEqual(res.data["data"]["results"][1]["title"], problem2.title)
 
+    def test_list_problems_is_ordered(self):
+        """Test pages of problems are ordered by id, like the cached listing."""
+        problems = [create_problem(created_by=self.user) for _ in range(3)]
+
+        url = reverse("problem-list-create")
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", UnorderedObjectListWarning)
+            res = self.client.get(url)
+            compact = self.client.get(url, {"view": "compact"})
+
+        for r in (res, compact):
+            self.assertEqual(
+                [p["id"] for p in r.data["data"]["results"]],
+                [p.id for p in problems],
+            )
+
     def test_list_problems_filter_by_title(self):
         """Test listing problems filtered by title."""
         problem = create_problem(created_by=self.user, title="Test Problem")
@@ -123,6 +144,62 @@ class ProblemApiTests(TestCase):
         self.assertEqual(len(res.data["data"]["results"]), 1)
         self.assertEqual(res.data["data"]["results"][0]["title"], problem.title)
 
+    def test_search_problems_by_prefix(self):
+        """Test searching matches word prefixes in titles and descriptions."""
+        tree = create_problem(
+            created_by=self.user,
+            title="Binary search tree",
+            description="Insert keys and keep the tree balanced.",
+        )
+        graph = create_problem(
+            created_by=self.user,
+            title="Graph coloring",
+            description="Color the vertices of a binary graph.",
+        )
+        create_problem(created_by=self.user, title="Knapsack", description="Pack.")
+
+        url = reverse("problem-list-create")
+        res = self.client.get(url, {"q": "bin"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [p["id"] for p in res.data["data"]["results"]], [tree.id, graph.id]
+        )
+
+        res = self.client.get(url, {"q": "vert bin"})
+
+        self.assertEqual([p["id"] for p in res.data["data"]["results"]], [graph.id])
+
+    def test_search_problems_without_words(self):
+        """Test a search without any word matches nothing."""
+        create_problem(created_by=self.user)
+
+        url = reverse("problem-list-create")
+        res = self.client.get(url, {"q": "?!"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["data"]["results"], [])
+
+    @skipUnless(connection.vendor == "postgresql", "ranking needs PostgreSQL")
+    def test_search_problems_ranks_title_matches_first(self):
+        """Test problems matching in the title rank above the others."""
+        in_description = create_problem(
+            created_by=self.user,
+            title="Shortest paths",
+            description="Use a heap to find the shortest paths.",
+        )
+        in_title = create_problem(
+            created_by=self.user, title="Heap sort", description="Sort the array."
+        )
+
+        url = reverse("problem-list-create")
+        res = self.client.get(url, {"q": "heap"})
+
+        self.assertEqual(
+            [p["id"] for p in res.data["data"]["results"]],
+            [in_title.id, in_description.id],
+        )
+
     def test_list_problems_filter_by_tags(self):
         """Test listing problems filtered by tags."""
         problem = create_problem(created_by=self.user)
@@ -135,6 +212,80 @@ class ProblemApiTests(TestCase):
         self.assertEqual(len(res.data["data"]["results"]), 1)
         self.assertEqual(res.data["data"]["results"][0]["title"], problem.title)
 
+    def test_list_problems_compact_view(self):
+        """Test listing problems in the compact view."""
+        problem = create_problem(created_by=self.user)
+        problem.tags.add(self.tag)
+        problem.languages.add(self.language)
+
+        url = reverse("problem-list-create")
+        res = self.client.get(url, {"view": "compact"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["data"]["results"],
+            [
+                {
+                    "id": problem.id,
+                    "title": problem.title,
+                    "difficulty": problem.difficulty,
+                    "status": problem.status,
+                    "tagIds": [self.tag.id],
+                    "languageIds": [self.language.id],
+                }
+            ],
+        )
+
+    def test_list_problems_selected_fields(self):
+        """Test listing only the requested fields of problems."""
+        problem = create_problem(created_by=self.user)
+
+        url = reverse("problem-list-create")
+        res = self.client.get(url, {"fields": "id,title"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["data"]["results"], [{"id": problem.id, "title": problem.title}]
+        )
+
+    def test_list_problems_unknown_field(self):
+        """Test listing problems with an unknown field fails."""
+        url = reverse("problem-list-create")
+
+        res = self.client.get(url, {"fields": "id,description"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(url, {"view": "tiny"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_problems_by_cursor(self):
+        """Test listing problems newest first by cursor."""
+        problems = [create_problem(created_by=self.user) for _ in range(3)]
+
+        url = reverse("problem-list-create")
+        res = self.client.get(url, {"pagination": "cursor", "page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [p["id"] for p in res.data["data"]["results"]],
+            [problems[2].id, problems[1].id],
+        )
+        self.assertIsNone(res.data["data"]["pagination"]["count"])
+
+        res = self.client.get(res.data["data"]["pagination"]["next"])
+
+        self.assertEqual(
+            [p["id"] for p in res.data["data"]["results"]], [problems[0].id]
+        )
+        self.assertIsNone(res.data["data"]["pagination"]["next"])
+
+    def test_search_problems_by_cursor(self):
+        """Test search results cannot be paged by cursor, which ignores rank."""
+        url = reverse("problem-list-create")
+        res = self.client.get(url, {"q": "graph", "pagination": "cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_problem_success(self):
         """Test creating a new problem successfully."""
         payload = {
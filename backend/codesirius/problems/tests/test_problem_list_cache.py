@@ -0,0 +1,173 @@
+"""
+Test cases for the cached published problem list
+"""
+
+import json
+from unittest.mock import patch, MagicMock
+
+import redis
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from faker import Faker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from problems.cache import PublishedProblemListCache
+from problems.models import Problem, Tag
+
+fake = Faker()
+
+PROBLEM_LIST_URL = reverse("problem-list-create")
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.unique.email(),
+        "username": fake.unique.user_name(),
+        "password": "testpass123",
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+def create_problem(created_by=None, **params):
+    """Create and return a sample problem."""
+    defaults = {
+        "title": fake.sentence(),
+        "description": fake.text(),
+        "created_by": created_by or create_user(),
+    }
+    defaults.update(params)
+    return Problem.objects.create(**defaults)
+
+
+def create_published_problem(**params):
+    """Create and return a published problem."""
+    problem = create_problem(**params)
+    problem.status = Problem.Status.PUBLISHED
+    problem.save()
+    return problem
+
+
+@patch.dict("os.environ", {"GITHUB_ACTIONS": "false"})
+@patch("problems.views.problem.PublishedProblemListCache.listing")
+class CachedProblemListApiTests(TestCase):
+    """Test case for listing problems from the cache."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_anonymous_list_does_not_query_database(self, mock_listing):
+        """Test anonymous users are served from the cache alone."""
+        mock_listing.return_value = [{"id": i, "title": f"P{i}"} for i in range(12)]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(PROBLEM_LIST_URL, {"tags": [1, 2], "page": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        mock_listing.assert_called_once_with([1, 2])
+        self.assertEqual([p["id"] for p in res.data["data"]["results"]], [10, 11])
+        self.assertEqual(res.data["data"]["pagination"]["count"], 12)
+        self.assertEqual(res.data["data"]["pagination"]["total_pages"], 2)
+
+    def test_anonymous_compact_list_from_cache(self, mock_listing):
+        """Test the compact view is derived from the cached problems."""
+        mock_listing.return_value = [
+            {"id": 1, "tags": [{"id": 4}, {"id": 5}], "languages": [{"id": 2}]}
+        ]
+
+        res = self.client.get(PROBLEM_LIST_URL, {"fields": "id,tagIds,languageIds"})
+
+        self.assertEqual(
+            res.data["data"]["results"],
+            [{"id": 1, "tagIds": [4, 5], "languageIds": [2]}],
+        )
+
+    def test_unavailable_cache_falls_back_to_database(self, mock_listing):
+        """Test problems are listed from the database when Redis is down."""
+        mock_listing.side_effect = redis.ConnectionError("Connection refused")
+        problem = create_published_problem()
+        create_problem()
+
+        res = self.client.get(PROBLEM_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["data"]["results"]), 1)
+        self.assertEqual(res.data["data"]["results"][0]["title"], problem.title)
+
+    def test_authenticated_list_skips_cache(self, mock_listing):
+        """Test owners see their drafts, which are never cached."""
+        user = create_user()
+        draft = create_problem(created_by=user)
+        self.client.force_authenticate(user=user)
+
+        res = self.client.get(PROBLEM_LIST_URL)
+
+        mock_listing.assert_not_called()
+        self.assertEqual(res.data["data"]["results"][0]["title"], draft.title)
+
+    def test_anonymous_search_skips_cache(self, mock_listing):
+        """Test searches are answered by the database."""
+        problem = create_published_problem(title="Dijkstra shortest paths")
+        create_published_problem(title="Knapsack")
+
+        res = self.client.get(PROBLEM_LIST_URL, {"q": "dijk"})
+
+        mock_listing.assert_not_called()
+        self.assertEqual([p["id"] for p in res.data["data"]["results"]], [problem.id])
+
+
+@patch.dict("os.environ", {"GITHUB_ACTIONS": "false"})
+class ProblemListCacheTests(TestCase):
+    """Test case for the Redis index of published problems."""
+
+    def setUp(self):
+        self.redis = MagicMock()
+        self.cache = PublishedProblemListCache(client=self.redis)
+
+    def test_multiple_tags_are_intersected(self):
+        """Test listing by several tags intersects the per tag sets."""
+        self.redis.exists.return_value = True
+        self.redis.pipeline.return_value.execute.return_value = [True, True]
+        self.redis.zinter.return_value = ["3", "7"]
+        self.redis.mget.return_value = [json.dumps({"id": 3}), json.dumps({"id": 7})]
+
+        problems = self.cache.listing([1, 2])
+
+        self.assertEqual(problems.count(), 2)
+        self.assertEqual(problems[0:10], [{"id": 3}, {"id": 7}])
+        self.redis.zinter.assert_called_once_with(
+            ["problem-list:tag:1", "problem-list:tag:2"], aggregate="MIN"
+        )
+
+    def test_missing_fragment_is_serialized_again(self):
+        """Test problems whose fragment is gone are read from the database."""
+        problem = create_published_problem()
+        self.redis.exists.return_value = True
+        self.redis.zcard.return_value = 1
+        self.redis.zrange.return_value = [str(problem.id)]
+        self.redis.mget.return_value = [None]
+
+        results = self.cache.listing([])[0:10]
+
+        self.assertEqual(results[0]["title"], problem.title)
+        self.redis.pipeline.return_value.set.assert_called_once()
+
+    def test_publishing_refreshes_the_cache(self):
+        """Test a problem is re-indexed once its transaction commits."""
+        tag = Tag.objects.create(name="dp")
+        problem = create_problem()
+
+        with patch("problems.cache.PublishedProblemListCache") as mock_cache:
+            mock_cache.enabled.return_value = True
+            with self.captureOnCommitCallbacks(execute=True):
+                problem.status = Problem.Status.PUBLISHED
+                problem.save()
+                problem.tags.add(tag)
+
+        mock_cache.return_value.refresh.assert_called_with(problem.id)
+        self.assertEqual(mock_cache.return_value.refresh.call_count, 2)
@@ -0,0 +1,178 @@
+"""
+Query count regression tests for the endpoints serializing problems.
+
+Serializing a problem renders its languages, tags, execution constraints,
+sample tests and hidden test bundle. These tests make sure that costs a
+fixed number of queries, however many problems are rendered.
+"""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from faker import Faker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from internal_api.models.apikey import APIKey
+from problems.models import (
+    ExecutionConstraint,
+    HiddenTestBundle,
+    Language,
+    Problem,
+    ReferenceSolution,
+    SampleTest,
+    Submission,
+    Tag,
+)
+
+fake = Faker()
+
+PROBLEM_LIST_URL = reverse("problem-list-create")
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.unique.email(),
+        "username": fake.unique.user_name(),
+        "password": "testpass123",
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+def create_full_problem(created_by, languages, tags, publish=True):
+    """Create and return a problem with every relation the serializers render."""
+    problem = Problem.objects.create(
+        title=fake.unique.sentence(), description=fake.text(), created_by=created_by
+    )
+    problem.languages.set(languages)
+    problem.tags.set(tags)
+    for language in languages:
+        ExecutionConstraint.objects.create(
+            problem=problem, language=language, time_limit=1, memory_limit=256
+        )
+        ReferenceSolution.objects.create(
+            problem=problem, language=language, code="print(42)"
+        )
+    for _ in range(2):
+        SampleTest.objects.create(problem=problem, input="1", output="1")
+    HiddenTestBundle.objects.create(
+        problem=problem, s3_path=fake.file_path(), test_count=10
+    )
+    if publish:
+        problem.status = Problem.Status.PUBLISHED
+        problem.save()
+    return problem
+
+
+@patch.dict("os.environ", {"GITHUB_ACTIONS": "true"})
+class ProblemQueryCountTests(TestCase):
+    """Test case for the number of queries per problem endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.languages = [
+            Language.objects.create(name=fake.unique.word(), version="1")
+            for _ in range(2)
+        ]
+        self.tags = [Tag.objects.create(name=fake.unique.word()) for _ in range(2)]
+
+    def create_problems(self, count, **params):
+        return [
+            create_full_problem(self.user, self.languages, self.tags, **params)
+            for _ in range(count)
+        ]
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        """Test listing costs a count, a page and one query per relation."""
+        self.client.force_authenticate(user=self.user)
+        self.create_problems(1)
+        with self.assertNumQueries(6):
+            self.client.get(PROBLEM_LIST_URL)
+
+        self.create_problems(9, publish=False)
+        with self.assertNumQueries(6):
+            res = self.client.get(PROBLEM_LIST_URL)
+        self.assertEqual(len(res.data["data"]["results"]), 10)
+
+    def test_compact_list_query_count(self):
+        """Test the compact view costs a count, the rows and the related ids."""
+        self.create_problems(10)
+        with self.assertNumQueries(4):
+            res = self.client.get(PROBLEM_LIST_URL, {"view": "compact"})
+        self.assertEqual(len(res.data["data"]["results"]), 10)
+
+    def test_cursor_list_query_count(self):
+        """Test paging by cursor skips the count."""
+        self.create_problems(10)
+        with self.assertNumQueries(5):
+            res = self.client.get(PROBLEM_LIST_URL, {"pagination": "cursor"})
+        self.assertEqual(len(res.data["data"]["results"]), 10)
+
+    def test_anonymous_list_query_count(self):
+        """Test listing published problems from the database when uncached."""
+        self.create_problems(5)
+        with self.assertNumQueries(6):
+            res = self.client.get(PROBLEM_LIST_URL)
+        self.assertEqual(len(res.data["data"]["results"]), 5)
+
+    def test_list_filtered_by_tags_query_count(self):
+        """Test filtering by tags adds only the tag lookup."""
+        self.create_problems(5)
+        with self.assertNumQueries(8):
+            res = self.client.get(PROBLEM_LIST_URL, {"tags": [t.id for t in self.tags]})
+        self.assertEqual(len(res.data["data"]["results"]), 5)
+
+    def test_detail_query_count(self):
+        """Test retrieving a problem costs one query per relation."""
+        (problem,) = self.create_problems(1)
+        with self.assertNumQueries(5):
+            res = self.client.get(
+                reverse("problem-retrieve-update-destroy", args=[problem.id])
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_internal_detail_query_count(self):
+        """Test retrieving a problem through the internal API."""
+        (problem,) = self.create_problems(1)
+        raw_key, hashed_key = APIKey.generate_key()
+        APIKey.objects.create(name="judge", key=hashed_key, created_by=self.user)
+        url = reverse("problem-retrieve-update", args=[problem.id])
+        # one query authenticates the API key
+        with self.assertNumQueries(6):
+            res = self.client.get(url, HTTP_X_API_KEY=raw_key)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class BenchmarkQueriesCommandTests(TestCase):
+    """Test case for the benchmark_queries command."""
+
+    def test_lookups_use_indexes(self):
+        """Test the plans of the hot lookups are checked on discarded rows."""
+        out = StringIO()
+        try:
+            call_command(
+                "benchmark_queries",
+                submissions=200,
+                problems=20,
+                users=10,
+                stdout=out,
+            )
+        except CommandError:
+            # PostgreSQL scans tables this small sequentially
+            self.assertEqual(connection.vendor, "postgresql")
+
+        self.assertIn("user submissions:", out.getvalue())
+        self.assertIn("published problems:", out.getvalue())
+        self.assertIn("Rolled back the generated rows", out.getvalue())
+        self.assertFalse(Submission.objects.exists())
+        self.assertFalse(Problem.objects.exists())
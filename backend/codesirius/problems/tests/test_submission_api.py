@@ -0,0 +1,105 @@
+"""
+Test cases for the Submission API
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from problems.models import Language, Problem, Submission
+
+fake = Faker()
+
+
+def create_user(**params):
+    """Create and return a sample user."""
+    defaults = {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.unique.email(),
+        "username": fake.unique.user_name(),
+        "password": "testpass123",
+    }
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+def create_problem(created_by=None, **params):
+    """Create and return a sample problem."""
+    defaults = {
+        "title": fake.sentence(),
+        "description": fake.text(),
+        "created_by": created_by or create_user(),
+    }
+    defaults.update(params)
+    return Problem.objects.create(**defaults)
+
+
+class SubmissionListApiTests(TestCase):
+    """Test case for listing submissions."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(user=self.user)
+        self.problem = create_problem(created_by=self.user)
+        self.language = Language.objects.create(name="python", version="3.12")
+        self.url = reverse("submission-list-create", args=[self.problem.id])
+
+    def create_submissions(self, count, created_by=None):
+        submissions = [
+            Submission.objects.create(
+                problem=self.problem,
+                language=self.language,
+                code=f"print({i})",
+                created_by=created_by or self.user,
+            )
+            for i in range(count)
+        ]
+        # submissions created at the same time are ordered by id
+        Submission.objects.filter(id__in=[s.id for s in submissions[:3]]).update(
+            created_at=timezone.now()
+        )
+        return submissions
+
+    def test_list_submissions_by_cursor(self):
+        """Test walking all pages returns every submission once, newest first."""
+        submissions = self.create_submissions(7)
+        self.create_submissions(2, created_by=create_user())
+
+        ids = []
+        res = self.client.get(self.url, {"page_size": 3, "count": "true"})
+        self.assertEqual(res.data["data"]["pagination"]["count"], 7)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(s["id"] for s in res.data["data"]["results"])
+            next_link = res.data["data"]["pagination"]["next"]
+            if next_link is None:
+                break
+            res = self.client.get(next_link)
+
+        expected = Submission.objects.filter(
+            id__in=[s.id for s in submissions]
+        ).order_by("-created_at", "-id")
+        self.assertEqual(ids, [s.id for s in expected])
+
+    def test_list_submissions_without_count(self):
+        """Test submissions are not counted unless asked to."""
+        self.create_submissions(2)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(self.url)
+
+        self.assertEqual(len(res.data["data"]["results"]), 2)
+        self.assertIsNone(res.data["data"]["pagination"]["count"])
+        self.assertIsNone(res.data["data"]["pagination"]["next"])
+
+    def test_list_submissions_invalid_cursor(self):
+        """Test listing submissions with a malformed cursor fails."""
+        res = self.client.get(self.url, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -5,6 +5,7 @@ from problems.views.hidden_test import (
     HiddenTestPresignedUrlAPIView,
     HiddenTestInitiateProcessAPIView,
     HiddenTestDeleteAPIView,
+    HiddenTestAPIView,
 )
 from problems.views.language import (
     LanguageListCreateAPIView,
@@ -84,6 +85,11 @@ urlpatterns = [
         HiddenTestDeleteAPIView.as_view(),
         name="hidden-test-delete",
     ),
+    path(
+        "<int:problem_pk>/hidden-tests/<int:test_number>/",
+        HiddenTestAPIView.as_view(),
+        name="hidden-test",
+    ),
     path(
         "<int:problem_pk>/publish/",
         ProblemPublishAPIView.as_view(),
@@ -1,34 +1,31 @@
-import json
+import hashlib
 import logging
+import os
+from uuid import uuid4
 
+from django.db import transaction
 from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
 from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import BasePermission
 from rest_framework.views import APIView
 
 from codesirius.aws_client import AWSClient
 from codesirius.codesirius_api_response import CodesiriusAPIResponse
-from codesirius.kafa_producer import KafkaProducerSingleton
-from codesirius.redis_client import RedisClientSingleton
-from problems.models import Problem
+from problems.client_id import verify_client_id
+from problems.models import HiddenTestBundle, OutboxMessage, Problem
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 
-def delivery_report(err, msg):
-    if err:
-        print(f"❌ Message delivery failed: {err}")
-    else:
-        print(f"✅ Message delivered to {msg.topic()} [{msg.partition()}]")
-
-
 class IsOwner(BasePermission):
     """
     Custom permission class to allow only the owner of an object to
     1. create a presigned URL for hidden tests to be uploaded.
     2. initiate the hidden test processing.
-    3. delete the hidden tests.
+    3. add, replace or remove a single hidden test.
+    4. delete the hidden tests.
     """
 
     def has_permission(self, request, view):
@@ -91,45 +88,24 @@ class HiddenTestInitiateProcessAPIView(APIView):
         problem = get_object_or_404(Problem, pk=problem_pk)
         self.check_object_permissions(request, problem)
 
-        redis_client = RedisClientSingleton(host="redis", port=6379).get_client()
-        client_id = request.data.get("clientId")
-
-        if not client_id:
-            raise ValidationError({"clientId": "clientId is required"})
-
-        redis_user_id = redis_client.get(client_id)
-        logger.info(f"Redis user ID: {redis_user_id}")
-        if not redis_user_id:
-            raise ValidationError({"clientId": "Invalid clientId"})
-
-        if redis_user_id != str(request.user.id):
-            logger.info(f"User ID mismatch: {redis_user_id} != {request.user.id}")
-            # no need to let the client know about the mismatch
-            raise ValidationError({"clientId": "Invalid clientId"})
+        client_id = verify_client_id(request, "hidden-test", problem.pk)
 
         if hasattr(problem, "hidden_test_bundle"):
             raise ValidationError({"problem_id": "Hidden test bundle already exists"})
 
-        try:
-            KafkaProducerSingleton.produce_message(
-                "hidden_test",
-                value=json.dumps(
-                    {
-                        "problem_id": problem_pk,
-                        "client_id": client_id,
-                        "bucket_name": "codesirius-tests-data",
-                        "grpc_server": settings.GRPC_SERVER,
-                        "user_id": request.user.id,
-                    }
-                ),
-                callback=delivery_report,
-            )
-            logger.info("Hidden tests processing initiated")
-            return CodesiriusAPIResponse(message="Hidden tests processing initiated")
-
-        except Exception as e:
-            logger.error(f"Kafka message production failed: {e}")
-            raise ValidationError("Failed to initiate hidden test processing")
+        OutboxMessage.enqueue(
+            "hidden_test",
+            key=f"hidden-test-{problem_pk}-{uuid4().hex}",
+            payload={
+                "problem_id": problem_pk,
+                "client_id": client_id,
+                "bucket_name": "codesirius-tests-data",
+                "grpc_server": settings.GRPC_SERVER,
+                "user_id": request.user.id,
+            },
+        )
+        logger.info("Hidden tests processing initiated")
+        return CodesiriusAPIResponse(message="Hidden tests processing initiated")
 
 
 class HiddenTestDeleteAPIView(APIView):
@@ -157,11 +133,35 @@ class HiddenTestDeleteAPIView(APIView):
         self.check_object_permissions(request, problem)
 
         try:
+            bundle = problem.hidden_test_bundle
             client = AWSClient("s3").get_client()
-            client.delete_object(
-                Bucket="codesirius-tests-data",
-                Key=problem.hidden_test_bundle.s3_path,
-            )
+            if bundle.manifest:
+                # every file ever uploaded for the bundle
+                pages = client.get_paginator("list_objects_v2").paginate(
+                    Bucket="codesirius-tests-data", Prefix=bundle.s3_path
+                )
+                for page in pages:
+                    if not page.get("Contents"):
+                        continue
+                    client.delete_objects(
+                        Bucket="codesirius-tests-data",
+                        Delete={
+                            "Objects": [
+                                {"Key": item["Key"]} for item in page["Contents"]
+                            ]
+                        },
+                    )
+            else:
+                # the bundle and the pack judges read it from
+                client.delete_objects(
+                    Bucket="codesirius-tests-data",
+                    Delete={
+                        "Objects": [
+                            {"Key": bundle.s3_path},
+                            {"Key": f"{os.path.splitext(bundle.s3_path)[0]}.pack"},
+                        ]
+                    },
+                )
             logger.info("Hidden tests deleted from S3 bucket")
 
             problem.hidden_test_bundle.delete()
@@ -170,3 +170,111 @@ class HiddenTestDeleteAPIView(APIView):
         except Exception as e:
             logger.error(f"Failed to delete hidden tests: {e}")
             raise ValidationError("Failed to delete hidden tests")
+
+
+class HiddenTestAPIView(APIView):
+    """
+    Add, replace or remove a single hidden test of a bundle.
+
+    The input and output of a test are sent as multipart files; on replace
+    either may be left out to keep it. Only files whose contents are not in
+    the bundle yet are uploaded to the S3 bucket, and judges download only
+    those. Files no longer used by the bundle stay in the bucket until the
+    bundle is deleted, since judges may still be reading them.
+    """
+
+    permission_classes = [IsOwner]
+    parser_classes = [MultiPartParser]
+
+    # the whole bundle may not be larger than this either
+    MAX_FILE_SIZE = 64 * 1024 * 1024
+
+    def get_bundle(self, request, problem_pk) -> HiddenTestBundle:
+        problem = get_object_or_404(Problem, pk=problem_pk)
+        self.check_object_permissions(request, problem)
+        if not hasattr(problem, "hidden_test_bundle"):
+            raise NotFound("Hidden test bundle does not exist")
+        if not problem.hidden_test_bundle.manifest:
+            raise ValidationError(
+                {"problem_id": "Upload the hidden tests again to edit single tests"}
+            )
+        return problem.hidden_test_bundle
+
+    @staticmethod
+    def digest(file) -> str:
+        sha256 = hashlib.sha256()
+        for chunk in file.chunks():
+            sha256.update(chunk)
+        file.seek(0)
+        return sha256.hexdigest()
+
+    def put(self, request, problem_pk, test_number):
+        logger.info(f"Saving hidden test {test_number} of problem {problem_pk}")
+        bundle = self.get_bundle(request, problem_pk)
+
+        files = {}
+        for name in ("input", "output"):
+            file = request.FILES.get(name)
+            if file is None:
+                continue
+            if file.size > self.MAX_FILE_SIZE:
+                raise ValidationError({name: "File is too large"})
+            files[name] = (file, self.digest(file))
+        if not files:
+            raise ValidationError("An input or an output file is required")
+        digests = {name: digest for name, (_, digest) in files.items()}
+
+        # fail before uploading anything
+        uploaded = bundle.digests()
+        try:
+            bundle.set_test(test_number, digests.get("input"), digests.get("output"))
+        except ValueError as e:
+            raise ValidationError({"test_number": str(e)})
+
+        try:
+            client = AWSClient("s3").get_client()
+            for file, digest in files.values():
+                if digest in uploaded:
+                    continue
+                client.upload_fileobj(
+                    file, "codesirius-tests-data", f"{bundle.s3_path}{digest}"
+                )
+                uploaded.add(digest)
+        except Exception as e:
+            logger.error(f"Failed to upload hidden test: {e}")
+            raise ValidationError("Failed to upload hidden test")
+
+        with transaction.atomic():
+            # the manifest may have changed while the files were uploaded
+            bundle = HiddenTestBundle.objects.select_for_update().get(pk=bundle.pk)
+            try:
+                bundle.set_test(
+                    test_number, digests.get("input"), digests.get("output")
+                )
+            except ValueError as e:
+                raise ValidationError({"test_number": str(e)})
+            bundle.updated_by = request.user
+            bundle.save()
+
+        logger.info(f"Hidden test {test_number} of problem {problem_pk} saved")
+        return CodesiriusAPIResponse(
+            message="Hidden test saved", data={"test_count": bundle.test_count}
+        )
+
+    def delete(self, request, problem_pk, test_number):
+        logger.info(f"Removing hidden test {test_number} of problem {problem_pk}")
+        bundle = self.get_bundle(request, problem_pk)
+
+        with transaction.atomic():
+            bundle = HiddenTestBundle.objects.select_for_update().get(pk=bundle.pk)
+            try:
+                bundle.remove_test(test_number)
+            except ValueError as e:
+                raise ValidationError({"test_number": str(e)})
+            bundle.updated_by = request.user
+            bundle.save()
+
+        logger.info(f"Hidden test {test_number} of problem {problem_pk} removed")
+        return CodesiriusAPIResponse(
+            message="Hidden test removed", data={"test_count": bundle.test_count}
+        )
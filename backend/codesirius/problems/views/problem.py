@@ -1,6 +1,7 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
+import redis
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.pagination import PageNumberPagination
@@ -9,8 +10,11 @@ from rest_framework.request import Request
 from rest_framework.views import APIView
 
 from codesirius.codesirius_api_response import CodesiriusAPIResponse
+from codesirius.pagination import CreatedAtCursorPagination
+from problems.cache import PublishedProblemListCache
 from problems.models import Problem, ReferenceSolution, Tag
 from problems.serializers.problem import ProblemSerializer
+from problems.serializers.problem_compact import ProblemCompactSerializer
 from problems.views.hidden_test import IsOwner
 
 logger = logging.getLogger(__name__)
@@ -34,8 +38,9 @@ class IsOwnerOrPublishedOnly(BasePermission):
         # so we'll always allow GET, HEAD or OPTIONS requests.
         if request.method in ["GET", "HEAD", "OPTIONS"]:
             # Check if the object is published or if the user is the owner
-            return (
-                obj.status == Problem.Status.PUBLISHED or obj.created_by == request.user
+            # compare ids so that the owner is not fetched
+            return obj.status == Problem.Status.PUBLISHED or (
+                request.user.is_authenticated and obj.created_by_id == request.user.id
             )
         # Write permissions are only allowed to the owner of the problem.
         return obj.created_by == request.user
@@ -46,59 +51,132 @@ class ProblemListCreateAPIView(APIView):
 
     def get(self, request):
         """
-        Get all problems with optional filtering by title and tags
+        Get all problems with optional search and filtering by tags
+
+        `q` (or `title`) searches the title and description of problems by
+        word prefixes, best matches first.
+
+        Anonymous users only see published problems, which are listed from
+        the cache when it is available and nothing is searched.
+
+        `view=compact` lists only the id, title, difficulty, status, tag ids
+        and language ids of each problem; `fields=` picks some of them.
+
+        `pagination=cursor` pages newest first by cursor instead of by page
+        number, without counting all problems unless `count=true`. It cannot
+        be combined with a search, whose results are ordered by rank.
         """
         logger.info("Fetching all problems")
-        problems = Problem.objects.filter(
-            status=Problem.Status.PUBLISHED
-        ) | Problem.objects.filter(
-            created_by=request.user if request.user.is_authenticated else None
-        )
+        compact = self._compact_serializer(request)
+        pagination = request.query_params.get("pagination", "page")
+        if pagination not in ("page", "cursor"):
+            raise ValidationError(
+                {"pagination": "Pagination must be either page or cursor"}
+            )
 
         # Apply filters
-        title = request.query_params.get("title", None)
+        search = request.query_params.get("q") or request.query_params.get("title")
+        if search and pagination == "cursor":
+            raise ValidationError(
+                {"pagination": "Search results cannot be paged by cursor"}
+            )
         tags = request.query_params.getlist("tags", [])
-
-        if title:
-            problems = problems.filter(title__icontains=title)
-            logger.info(f"Filtering problems by title: {title}")
-
-        if tags:
+        try:
             # Convert tag IDs to integers
+            tag_ids = [int(tag_id) for tag_id in tags]
+        except ValueError:
+            logger.warning("Invalid tag IDs provided")
+            raise ValidationError({"tags": "Invalid tag IDs provided"})
+
+        if (
+            not request.user.is_authenticated
+            and pagination == "page"
+            and not search
+            and PublishedProblemListCache.enabled()
+        ):
             try:
-                tag_ids = [int(tag_id) for tag_id in tags]
-                # Get all tags that exist
-                existing_tags = Tag.objects.filter(id__in=tag_ids)
-                if existing_tags.exists():
-                    # Filter problems that have all the specified tags
-                    for tag in existing_tags:
-                        problems = problems.filter(tags=tag)
-                    logger.info(f"Filtering problems by tags: {tag_ids}")
-            except ValueError:
-                logger.warning("Invalid tag IDs provided")
-                raise ValidationError({"tags": "Invalid tag IDs provided"})
+                problems = PublishedProblemListCache().listing(tag_ids)
+                if problems is not None:
+                    logger.info("Listing problems from the cache")
+                    return self._paginate(
+                        request, problems, PageNumberPagination(), compact, True
+                    )
+            except redis.RedisError as e:
+                logger.warning(f"Problem list cache unavailable: {e}")
+
+        problems = Problem.objects.visible_to(request.user)
+
+        if search:
+            problems = problems.search(search)
+            logger.info(f"Searching problems for: {search}")
+
+        if tag_ids:
+            # Get all tags that exist
+            existing_tags = Tag.objects.filter(id__in=tag_ids)
+            if existing_tags.exists():
+                # Filter problems that have all the specified tags
+                for tag in existing_tags:
+                    problems = problems.filter(tags=tag)
+                logger.info(f"Filtering problems by tags: {tag_ids}")
+
+        if pagination == "cursor":
+            paginator = CreatedAtCursorPagination()
+        else:
+            if not search:
+                # the order of the cached listing, so that pages of both agree
+                problems = problems.order_by("id")
+            paginator = PageNumberPagination()
+        return self._paginate(request, problems, paginator, compact)
+
+    @staticmethod
+    def _compact_serializer(request) -> Optional[ProblemCompactSerializer]:
+        view = request.query_params.get("view", "full")
+        fields = request.query_params.get("fields", None)
+        if view not in ("full", "compact"):
+            raise ValidationError({"view": "View must be either full or compact"})
+        if view == "full" and not fields:
+            return None
+        try:
+            return ProblemCompactSerializer(fields.split(",") if fields else None)
+        except ValueError as e:
+            raise ValidationError({"fields": str(e)})
 
+    @staticmethod
+    def _paginate(request, problems, paginator, compact=None, serialized=False):
         # Apply pagination
-        paginator = PageNumberPagination()
         paginator.page_size = 10
         paginator.page_size_query_param = "page_size"
         paginator.max_page_size = 100
 
-        result_page = paginator.paginate_queryset(problems, request)
-        serializer = ProblemSerializer(instance=result_page, many=True)
+        if serialized:
+            result_page = paginator.paginate_queryset(problems, request)
+            results = result_page
+            if compact is not None:
+                results = [compact.from_representation(p) for p in result_page]
+        elif compact is not None:
+            result_page = paginator.paginate_queryset(compact.values(problems), request)
+            results = compact.serialize(result_page)
+        else:
+            result_page = paginator.paginate_queryset(
+                problems.for_serializer(), request
+            )
+            results = ProblemSerializer(instance=result_page, many=True).data
 
         # Get pagination metadata
-        pagination_data = {
-            "count": paginator.page.paginator.count,
-            "next": paginator.get_next_link(),
-            "previous": paginator.get_previous_link(),
-            "current_page": paginator.page.number,
-            "total_pages": paginator.page.paginator.num_pages,
-        }
+        if isinstance(paginator, CreatedAtCursorPagination):
+            pagination_data = paginator.get_pagination_data()
+        else:
+            pagination_data = {
+                "count": paginator.page.paginator.count,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "current_page": paginator.page.number,
+                "total_pages": paginator.page.paginator.num_pages,
+            }
 
         logger.info("Problems fetched successfully")
         return CodesiriusAPIResponse(
-            data={"results": serializer.data, "pagination": pagination_data}
+            data={"results": results, "pagination": pagination_data}
         )
 
     def post(self, request):
@@ -141,7 +219,7 @@ class ProblemRetrieveUpdateDestroyAPIView(APIView):
         """
         logger.info(f"Fetching problem with ID: {pk}")
         try:
-            problem = Problem.objects.get(pk=pk)
+            problem = Problem.objects.for_serializer().get(pk=pk)
             logger.info(f"Problem with ID: {pk} fetched successfully")
             self.check_object_permissions(request, problem)
         except Problem.DoesNotExist:
@@ -1,7 +1,8 @@
-import json
 import logging
+from uuid import uuid4
 
 from django.conf import settings
+from django.db import transaction
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.permissions import IsAuthenticated
@@ -9,21 +10,14 @@ from rest_framework.request import Request
 from rest_framework.views import APIView
 
 from codesirius.codesirius_api_response import CodesiriusAPIResponse
-from codesirius.kafa_producer import KafkaProducerSingleton
-from codesirius.redis_client import RedisClientSingleton
-from problems.models import ReferenceSolution, Problem
+from problems.admission import JudgeQueueAdmission
+from problems.client_id import verify_client_id
+from problems.models import OutboxMessage, ReferenceSolution, Problem
 from problems.serializers.reference_solution import ReferenceSolutionSerializer
 
 logger = logging.getLogger(__name__)
 
 
-def delivery_report(err, msg):
-    if err:
-        print(f"❌ Message delivery failed: {err}")
-    else:
-        print(f"✅ Message delivered to {msg.topic()} [{msg.partition()}]")
-
-
 class IsProblemOwner(IsAuthenticated):
     def has_object_permission(self, request, view, obj: Problem):
         return obj.created_by == request.user
@@ -64,44 +58,30 @@ class ReferenceSolutionListCreateAPIView(APIView):
             logger.error(f"Problem with ID: {problem_pk} does not exist")
             raise NotFound("Problem does not exist")
 
-        redis_client = RedisClientSingleton(host="redis", port=6379).get_client()
-        client_id = request.data.get("clientId")
-
-        if not client_id:
-            raise ValidationError({"clientId": "clientId is required"})
-
-        redis_user_id = redis_client.get(client_id)
-        logger.info(f"Redis user ID: {redis_user_id}")
-        if not redis_user_id:
-            raise ValidationError({"clientId": "Invalid clientId"})
-
-        if redis_user_id != str(request.user.id):
-            logger.info(f"User ID mismatch: {redis_user_id} != {request.user.id}")
-            # no need to let the client know about the mismatch
-            raise ValidationError({"clientId": "Invalid clientId"})
+        JudgeQueueAdmission().check("python_reference_solution_validation")
+        client_id = verify_client_id(request, "reference-solution", problem.pk)
 
         # add the problem to the request data
         request.data["problemId"] = problem.pk
         logger.info(f"Request data: {request.data}")
         serializer = ReferenceSolutionSerializer(data=request.data)
         if serializer.is_valid():
-            reference_solution = serializer.save()
-            logger.info(
-                f"Reference solution created successfully with ID: \
-                    {reference_solution.id}"
-            )
-            KafkaProducerSingleton.produce_message(
-                "python_reference_solution_validation",
-                value=json.dumps(
-                    {
+            with transaction.atomic():
+                reference_solution = serializer.save()
+                OutboxMessage.enqueue(
+                    "python_reference_solution_validation",
+                    key=f"reference-solution-{reference_solution.id}-{uuid4().hex}",
+                    payload={
                         "reference_solution_id": reference_solution.id,
                         "problem_id": problem.id,
                         "client_id": client_id,
                         "bucket_name": "codesirius-tests-data",
                         "grpc_server": settings.GRPC_SERVER,
-                    }
-                ),
-                callback=delivery_report,
+                    },
+                )
+            logger.info(
+                f"Reference solution created successfully with ID: \
+                    {reference_solution.id}"
             )
             logger.info("Reference solution processing initiated")
             return CodesiriusAPIResponse(
@@ -155,21 +135,8 @@ class ReferenceSolutionRetrieveUpdateDestroyAPIView(APIView):
             logger.warning(f"Reference solution with ID: {pk} not found")
             raise NotFound("Reference solution not found")
 
-        redis_client = RedisClientSingleton(host="redis", port=6379).get_client()
-        client_id = request.data.get("clientId")
-
-        if not client_id:
-            raise ValidationError({"clientId": "clientId is required"})
-
-        redis_user_id = redis_client.get(client_id)
-        logger.info(f"Redis user ID: {redis_user_id}")
-        if not redis_user_id:
-            raise ValidationError({"clientId": "Invalid clientId"})
-
-        if redis_user_id != str(request.user.id):
-            logger.info(f"User ID mismatch: {redis_user_id} != {request.user.id}")
-            # no need to let the client know about the mismatch
-            raise ValidationError({"clientId": "Invalid clientId"})
+        JudgeQueueAdmission().check("python_reference_solution_validation")
+        client_id = verify_client_id(request, "reference-solution", problem.pk)
 
         # TODO: remove passing problem to the context
         # Reset verdict to pending
@@ -180,21 +147,20 @@ class ReferenceSolutionRetrieveUpdateDestroyAPIView(APIView):
             partial=True,
         )
         if serializer.is_valid():
-            reference_solution = serializer.save()
-            logger.info(f"Reference solution with ID: {pk} updated successfully")
-            KafkaProducerSingleton.produce_message(
-                "python_reference_solution_validation",
-                value=json.dumps(
-                    {
+            with transaction.atomic():
+                reference_solution = serializer.save()
+                OutboxMessage.enqueue(
+                    "python_reference_solution_validation",
+                    key=f"reference-solution-{reference_solution.id}-{uuid4().hex}",
+                    payload={
                         "reference_solution_id": reference_solution.id,
                         "problem_id": problem.id,
                         "client_id": client_id,
                         "bucket_name": "codesirius-tests-data",
                         "grpc_server": settings.GRPC_SERVER,
-                    }
-                ),
-                callback=delivery_report,
-            )
+                    },
+                )
+            logger.info(f"Reference solution with ID: {pk} updated successfully")
             logger.info("Reference solution processing initiated")
             return CodesiriusAPIResponse(
                 data=serializer.data,
@@ -1,15 +1,16 @@
-import json
 import logging
 
+from django.db import transaction
 from rest_framework import status
 from rest_framework.exceptions import ValidationError, NotFound
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
 from codesirius.codesirius_api_response import CodesiriusAPIResponse
-from codesirius.kafa_producer import KafkaProducerSingleton
-from codesirius.redis_client import RedisClientSingleton
-from problems.models import Problem, Submission
+from codesirius.pagination import CreatedAtCursorPagination
+from problems.admission import JudgeQueueAdmission
+from problems.client_id import verify_client_id
+from problems.models import OutboxMessage, Problem, Submission
 from problems.serializers.submission import SubmissionSerializer
 from problems.views.problem import IsOwnerOrPublishedOnly
 from django.conf import settings
@@ -17,19 +18,13 @@ from django.conf import settings
 logger = logging.getLogger(__name__)
 
 
-def delivery_report(err, msg):
-    if err:
-        print(f"❌ Message delivery failed: {err}")
-    else:
-        print(f"✅ Message delivered to {msg.topic()} [{msg.partition()}]")
-
-
 class SubmissionListCreateAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, problem_pk):
         """
-        Get all submissions of a problem submitted by current user
+        Get the submissions of a problem submitted by current user, newest
+        first, a page at a time (see `CreatedAtCursorPagination`)
         """
         logger.info(
             f"Fetching all submissions of problem with ID: {problem_pk} \
@@ -41,12 +36,19 @@ class SubmissionListCreateAPIView(APIView):
         except Problem.DoesNotExist:
             logger.error(f"Problem with ID: {problem_pk} does not exist")
             raise NotFound("Problem does not exist")
-        submission = Submission.objects.filter(
+        submissions = Submission.objects.filter(
             problem=problem, created_by=request.user
-        ).order_by("-created_at")
-        serializer = SubmissionSerializer(instance=submission, many=True)
+        )
+        paginator = CreatedAtCursorPagination(page_size=20)
+        page = paginator.paginate_queryset(submissions, request)
+        serializer = SubmissionSerializer(instance=page, many=True)
         logger.info("Submissions fetched successfully")
-        return CodesiriusAPIResponse(data=serializer.data)
+        return CodesiriusAPIResponse(
+            data={
+                "results": serializer.data,
+                "pagination": paginator.get_pagination_data(),
+            }
+        )
 
     def post(self, request, problem_pk):
         """
@@ -60,44 +62,30 @@ class SubmissionListCreateAPIView(APIView):
             logger.error(f"Problem with ID: {problem_pk} does not exist")
             raise NotFound("Problem does not exist")
 
-        redis_client = RedisClientSingleton(host="redis", port=6379).get_client()
-        client_id = request.data.get("clientId")
-
-        if not client_id:
-            raise ValidationError({"clientId": "clientId is required"})
-
-        redis_user_id = redis_client.get(client_id)
-        logger.info(f"Redis user ID: {redis_user_id}")
-        if not redis_user_id:
-            raise ValidationError({"clientId": "Invalid clientId"})
-
-        if redis_user_id != str(request.user.id):
-            logger.info(f"User ID mismatch: {redis_user_id} != {request.user.id}")
-            # no need to let the client know about the mismatch
-            raise ValidationError({"clientId": "Invalid clientId"})
+        JudgeQueueAdmission().check("python_submission")
+        client_id = verify_client_id(request, "submission", problem.pk)
 
         # add the problem to the request data
         request.data["problemId"] = problem.pk
         logger.info(f"Request data: {request.data}")
         serializer = SubmissionSerializer(data=request.data)
         if serializer.is_valid():
-            submission = serializer.save(created_by=request.user)
-            logger.info(
-                f"Submission created successfully with ID: \
-                    {submission.id}"
-            )
-            KafkaProducerSingleton.produce_message(
-                "python_submission",
-                value=json.dumps(
-                    {
+            with transaction.atomic():
+                submission = serializer.save(created_by=request.user)
+                OutboxMessage.enqueue(
+                    "python_submission",
+                    key=f"submission-{submission.id}",
+                    payload={
                         "submission_id": submission.id,
                         "problem_id": problem.id,
                         "client_id": client_id,
                         "bucket_name": "codesirius-tests-data",
                         "grpc_server": settings.GRPC_SERVER,
-                    }
-                ),
-                callback=delivery_report,
+                    },
+                )
+            logger.info(
+                f"Submission created successfully with ID: \
+                    {submission.id}"
             )
             logger.info("Submission processing initiated")
             return CodesiriusAPIResponse(
@@ -3,7 +3,7 @@ Test cases for the Kafka producer
 """
 
 from django.test import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from codesirius.kafa_producer import KafkaProducerSingleton
 
 
@@ -64,3 +64,80 @@ class KafkaProducerTests(TestCase):
 
         # Producer should only be called once
         mock_producer.assert_called_once()
+
+
+@patch.dict("os.environ", {"GITHUB_ACTIONS": "false"})
+@patch("codesirius.kafa_producer.Producer")
+class KafkaProducerNonBlockingTests(TestCase):
+    """
+    Test case for producing messages without blocking the request.
+    """
+
+    def setUp(self):
+        """Set up the test environment."""
+        KafkaProducerSingleton._instance = None
+        KafkaProducerSingleton.metrics.clear()
+
+    def tearDown(self):
+        KafkaProducerSingleton.shutdown()
+
+    def test_produce_does_not_flush(self, mock_producer):
+        """Test producing a message only enqueues it"""
+        producer = mock_producer.return_value
+        producer.flush.return_value = 0
+
+        KafkaProducerSingleton.produce_message("email", value="{}")
+
+        producer.produce.assert_called_once()
+        producer.poll.assert_any_call(0)
+        producer.flush.assert_not_called()
+        self.assertEqual(KafkaProducerSingleton.stats()["produced"], 1)
+
+    def test_delivery_callback_is_wrapped(self, mock_producer):
+        """Test delivery reports are counted and passed to the callback"""
+        producer = mock_producer.return_value
+        producer.flush.return_value = 0
+        callback = MagicMock()
+
+        KafkaProducerSingleton.produce_message("email", value="{}", callback=callback)
+        on_delivery = producer.produce.call_args.kwargs["on_delivery"]
+        on_delivery(None, "msg")
+        on_delivery("timed out", "msg")
+
+        self.assertEqual(callback.call_count, 2)
+        stats = KafkaProducerSingleton.stats()
+        self.assertEqual(stats["delivered"], 1)
+        self.assertEqual(stats["failed"], 1)
+
+    def test_full_queue_applies_backpressure(self, mock_producer):
+        """Test a full queue is retried after serving delivery reports"""
+        producer = mock_producer.return_value
+        producer.flush.return_value = 0
+        producer.produce.side_effect = [BufferError("full"), None]
+
+        KafkaProducerSingleton.produce_message("email", value="{}")
+
+        self.assertEqual(producer.produce.call_count, 2)
+        producer.poll.assert_any_call(0.1)
+        self.assertEqual(KafkaProducerSingleton.stats()["queue_full"], 1)
+
+    @patch("codesirius.kafa_producer.ENQUEUE_TIMEOUT", 0)
+    def test_full_queue_fails_after_timeout(self, mock_producer):
+        """Test producing fails when the queue stays full"""
+        producer = mock_producer.return_value
+        producer.flush.return_value = 0
+        producer.produce.side_effect = BufferError("full")
+
+        with self.assertRaises(BufferError):
+            KafkaProducerSingleton.produce_message("email", value="{}")
+
+    def test_shutdown_flushes(self, mock_producer):
+        """Test shutting down waits for outstanding messages"""
+        producer = mock_producer.return_value
+        producer.flush.return_value = 0
+
+        KafkaProducerSingleton.produce_message("email", value="{}")
+        KafkaProducerSingleton.shutdown()
+
+        producer.flush.assert_called_once()
+        self.assertIsNone(KafkaProducerSingleton._instance)
@@ -2,7 +2,7 @@
 Test cases for the Redis client
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from unittest.mock import patch
 from codesirius.redis_client import RedisClientSingleton
 
@@ -78,3 +78,16 @@ class RedisClientTests(TestCase):
 
         # redis.Redis should only be called once
         mock_redis.assert_called_once()
+
+    @override_settings(REDIS_MAX_CONNECTIONS=7, REDIS_HEALTH_CHECK_INTERVAL=15)
+    @patch("redis.Redis")
+    def test_client_uses_bounded_pool(self, mock_redis):
+        """Test that the client shares a bounded, health checked pool."""
+        client = RedisClientSingleton(host="redis")
+
+        pool = mock_redis.call_args.kwargs["connection_pool"]
+        self.assertIs(pool, client._pool)
+        self.assertEqual(pool.max_connections, 7)
+        self.assertEqual(pool.connection_kwargs["host"], "redis")
+        self.assertEqual(pool.connection_kwargs["health_check_interval"], 15)
+        self.assertTrue(pool.connection_kwargs["decode_responses"])
@@ -1,15 +1,49 @@
 from dotenv import load_dotenv
 
 load_dotenv()
+import io
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
-from typing import Dict, Type
+from time import perf_counter
+from typing import (
+    BinaryIO,
+    Callable,
+    ContextManager,
+    Dict,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 
 AWS_ACCESS_KEY_ID = os.environ.get("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.environ.get("AWS_REGION")
 
+MB = 1024 * 1024
+
+# objects larger than the threshold are transferred in parts of the chunk
+# size, up to max concurrency parts at a time
+S3_MULTIPART_THRESHOLD = int(os.environ.get("S3_MULTIPART_THRESHOLD", 8 * MB))
+S3_MULTIPART_CHUNKSIZE = int(os.environ.get("S3_MULTIPART_CHUNKSIZE", 8 * MB))
+S3_MAX_CONCURRENCY = int(os.environ.get("S3_MAX_CONCURRENCY", 10))
+# bytes fetched by each ranged GET of S3RangeReader
+S3_READ_BLOCK_SIZE = int(os.environ.get("S3_READ_BLOCK_SIZE", 4 * MB))
+
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+    max_concurrency=S3_MAX_CONCURRENCY,
+    use_threads=True,
+)
+
+logger = logging.getLogger(__name__)
+
 
 class AWSClient:
     _instances: Dict[str, "AWSClient"] = (
@@ -27,6 +61,8 @@ class AWSClient:
                 aws_access_key_id=AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
                 region_name=AWS_REGION,
+                # one connection per concurrently transferred part
+                config=Config(max_pool_connections=max(10, S3_MAX_CONCURRENCY)),
             )
             cls._instances[service_name] = instance
             return instance
@@ -34,3 +70,233 @@ class AWSClient:
     def get_client(self) -> boto3.client:
         """Public getter for the AWS client."""
         return self.__client
+
+
+class TransferMetrics(NamedTuple):
+    bytes: int
+    seconds: float
+    requests: int
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second."""
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.bytes / MB:.2f} MB in {self.seconds:.3f}s "
+            f"({self.throughput / MB:.2f} MB/s, {self.requests} requests)"
+        )
+
+
+def _parts(size: int) -> int:
+    if size < S3_MULTIPART_THRESHOLD:
+        return 1
+    return max(1, -(-size // S3_MULTIPART_CHUNKSIZE))
+
+
+def download_file(
+    client, bucket: str, key: str, filename: str, extra_args: Optional[dict] = None
+) -> TransferMetrics:
+    """
+    Download an object to `filename`, in parallel parts if it is large.
+    """
+    started_at = perf_counter()
+    client.download_file(
+        Bucket=bucket,
+        Key=key,
+        Filename=filename,
+        ExtraArgs=extra_args,
+        Config=TRANSFER_CONFIG,
+    )
+    size = os.path.getsize(filename)
+    metrics = TransferMetrics(size, perf_counter() - started_at, _parts(size))
+    logger.info(f"Downloaded s3://{bucket}/{key}: {metrics}")
+    return metrics
+
+
+def upload_file(client, filename: str, bucket: str, key: str) -> TransferMetrics:
+    """
+    Upload `filename`, in parallel parts if it is large.
+    """
+    size = os.path.getsize(filename)
+    started_at = perf_counter()
+    client.upload_file(
+        Filename=filename, Bucket=bucket, Key=key, Config=TRANSFER_CONFIG
+    )
+    metrics = TransferMetrics(size, perf_counter() - started_at, _parts(size))
+    logger.info(f"Uploaded s3://{bucket}/{key}: {metrics}")
+    return metrics
+
+
+class _Unseekable(io.RawIOBase):
+    """
+    Read-only wrapper of a stream. s3transfer seeks to the end of seekable
+    streams to find their size, which decompresses a zip member twice.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def upload_fileobj(
+    client, fileobj: BinaryIO, bucket: str, key: str, size: int
+) -> TransferMetrics:
+    """
+    Upload the `size` bytes of `fileobj` as they are read, in parallel parts
+    if it is large, without it being written to disk.
+    """
+    started_at = perf_counter()
+    client.upload_fileobj(
+        Fileobj=_Unseekable(fileobj), Bucket=bucket, Key=key, Config=TRANSFER_CONFIG
+    )
+    metrics = TransferMetrics(size, perf_counter() - started_at, _parts(size))
+    logger.info(f"Uploaded s3://{bucket}/{key}: {metrics}")
+    return metrics
+
+
+def download_files(client, bucket: str, files: Dict[str, str]) -> None:
+    """
+    Download many objects, `S3_MAX_CONCURRENCY` at a time.
+    `files` maps the key of every object to the filename to download it to.
+    """
+    with ThreadPoolExecutor(max_workers=S3_MAX_CONCURRENCY) as pool:
+        futures = [
+            pool.submit(download_file, client, bucket, key, filename)
+            for key, filename in files.items()
+        ]
+        for future in futures:
+            future.result()
+
+
+def upload_streams(
+    client,
+    bucket: str,
+    streams: Dict[str, Tuple[Callable[[], ContextManager[BinaryIO]], int]],
+) -> None:
+    """
+    Upload many streams, `S3_MAX_CONCURRENCY` at a time. `streams` maps the
+    key of every object to a function opening the stream to upload and the
+    size of the stream.
+    """
+
+    def upload(key: str, open_stream, size: int) -> None:
+        with open_stream() as stream:
+            upload_fileobj(client, stream, bucket, key, size)
+
+    with ThreadPoolExecutor(max_workers=S3_MAX_CONCURRENCY) as pool:
+        futures = [
+            pool.submit(upload, key, open_stream, size)
+            for key, (open_stream, size) in streams.items()
+        ]
+        for future in futures:
+            future.result()
+
+
+class S3RangeReader(io.RawIOBase):
+    """
+    Read-only, seekable file over an S3 object. Only the bytes that are read
+    are fetched, with ranged GETs of at least `block_size` bytes.
+
+    A `zipfile.ZipFile` opened on it reads the central directory and then
+    only the members it is asked for, without the archive being downloaded:
+
+        with S3RangeReader(client, bucket, key) as reader:
+            archive = zipfile.ZipFile(reader)
+
+    Every GET is conditional on the ETag seen when opening, so a reader never
+    mixes two versions of an object.
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        block_size: int = S3_READ_BLOCK_SIZE,
+        etag: Optional[str] = None,
+    ):
+        super().__init__()
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.block_size = block_size
+
+        kwargs = {"IfMatch": f'"{etag}"'} if etag else {}
+        head = client.head_object(Bucket=bucket, Key=key, **kwargs)
+        self.size: int = head["ContentLength"]
+        self.etag: str = head["ETag"]
+
+        self._position = 0
+        self._block_start = 0
+        self._block = b""
+        self._bytes = 0
+        self._requests = 1
+        self._seconds = 0.0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self.size - self._position)
+        if length <= 0:
+            return 0
+        offset = self._position - self._block_start
+        if offset < 0 or offset + length > len(self._block):
+            self._fetch(self._position, max(length, self.block_size))
+            offset = 0
+        buffer[:length] = self._block[offset : offset + length]
+        self._position += length
+        return length
+
+    def _fetch(self, start: int, length: int) -> None:
+        end = min(start + length, self.size) - 1
+        started_at = perf_counter()
+        response = self.client.get_object(
+            Bucket=self.bucket,
+            Key=self.key,
+            Range=f"bytes={start}-{end}",
+            IfMatch=self.etag,
+        )
+        self._block = response["Body"].read()
+        self._block_start = start
+        self._seconds += perf_counter() - started_at
+        self._bytes += len(self._block)
+        self._requests += 1
+
+    def metrics(self) -> TransferMetrics:
+        return TransferMetrics(self._bytes, self._seconds, self._requests)
+
+    def close(self) -> None:
+        if not self.closed:
+            logger.info(f"Read s3://{self.bucket}/{self.key}: {self.metrics()}")
+            self._block = b""
+        super().close()
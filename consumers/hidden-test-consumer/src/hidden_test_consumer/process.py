@@ -1,23 +1,32 @@
+import hashlib
+import io
+import json
 import logging
 import os
-import shutil
 import zipfile
-from random import randint
-from time import sleep
-from typing import Iterator, Generator, TypedDict
+from time import perf_counter, sleep
+from typing import Iterator, Generator, Optional, TypedDict
 from hidden_test_consumer.logger import setup_logger
+from hidden_test_consumer.internal_api_client import InternalAPIClient
 
 import grpc
-import requests
 
-from hidden_test_consumer.aws_client import AWSClient
+from hidden_test_consumer.aws_client import AWSClient, S3RangeReader, upload_streams
 from hidden_test_consumer.hidden_test_process_pb2 import Status, ProcessRequest
 from hidden_test_consumer.hidden_test_process_pb2_grpc import HiddenTestProcessStub
 
 
+# bytes hashed at a time
+CHUNK_SIZE = 1024 * 1024
+# files of at most this size are kept in memory once hashed, so that they are
+# uploaded without being read from the archive again
+BUFFERED_FILE_SIZE = 8 * 1024 * 1024
+
+
 class HiddenTestBundleData(TypedDict):
     s3_path: str
     test_count: int
+    manifest: dict
 
 
 class HiddenTestProcessor:
@@ -37,9 +46,20 @@ class HiddenTestProcessor:
         self.grpc_server = grpc_server
 
         self.download_dir = os.environ.get("DOWNLOAD_DIR", "/tmp")
+        # optional pause (in seconds) between pipeline steps, e.g. to pace the
+        # progress shown to the client during demos; disabled by default
+        self.step_delay = float(os.environ.get("PIPELINE_STEP_DELAY", "0"))
+        self.step_timings: dict[str, float] = {}
         self.persist_data = os.environ.get("PERSIST_DATA", "false").lower() == "true"
-        self.backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
-        self.api_key = os.environ.get("API_KEY", None)
+        # total uncompressed size of the files of an upload
+        self.max_uncompressed_bytes = int(
+            os.environ.get("HIDDEN_TESTS_MAX_UNCOMPRESSED_BYTES", 1024 * 1024 * 1024)
+        )
+        # total size of the files kept in memory between hashing and uploading
+        self.max_buffered_bytes = int(
+            os.environ.get("HIDDEN_TESTS_MAX_BUFFERED_BYTES", 256 * 1024 * 1024)
+        )
+        self.source: Optional[S3RangeReader] = None
 
         if not self.problem_id:
             raise ValueError("Problem ID is required.")
@@ -53,9 +73,12 @@ class HiddenTestProcessor:
         # channel = grpc.insecure_channel(self.grpc_server)
         # self.stub = HiddenTestProcessStub(channel)
 
-    def download_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
+    def open_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 1: Download the hidden test data from the S3 bucket.
+        STEP 1: Open the hidden test data in the S3 bucket.
+
+        The archive is not downloaded: it is read with ranged GETs, only its
+        central directory and the members of the valid tests.
         """
 
         aws_client = AWSClient("s3").get_client()
@@ -65,18 +88,12 @@ class HiddenTestProcessor:
             yield ProcessRequest(
                 status=Status.INFO, message="📥 Collecting hidden test data..."
             )
-            path = os.path.join(self.download_dir, "hidden-tests.zip")
-            # clear from local if exists
-            if os.path.exists(path):
-                self.logger.info("Removing existing hidden-tests.zip")
-                os.remove(path)
-
-            self.logger.info(f"Downloading hidden test into {path}")
-            aws_client.download_file(
-                Bucket=self.bucket_name,
-                Key=f"unprocessed/{self.problem_id}/hidden-tests.zip",
-                Filename=path,
+            self.source = S3RangeReader(
+                aws_client,
+                self.bucket_name,
+                f"unprocessed/{self.problem_id}/hidden-tests.zip",
             )
+            self.logger.info(f"Reading {self.source.size} bytes of hidden tests")
             yield ProcessRequest(
                 status=Status.INFO, message="✔️ Hidden test data collected"
             )
@@ -86,50 +103,74 @@ class HiddenTestProcessor:
             )
             raise e
 
-    def unzip_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
-        """
-        STEP 2: Unzip the downloaded hidden test data.
-        """
-
-        yield ProcessRequest(
-            status=Status.INFO, message="📦 Unzipping hidden test data..."
-        )
-
-        try:
-            with zipfile.ZipFile(
-                f"{self.download_dir}/hidden-tests.zip", "r"
-            ) as zip_ref:
-                zip_ref.extractall(f"{self.download_dir}/extracted")
-        except Exception as e:
-            yield ProcessRequest(
-                status=Status.ERROR, message="❌ Error unzipping hidden test data"
-            )
-            raise e
-
     def check_directory_structure(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 3: Check the directory structure of the hidden test data.
+        STEP 2: Check the directory structure of the hidden test data.
         Expected directory structure:
-        extracted/
+        hidden-tests.zip
         ├── input
         │   ├── input1.txt
         │   ├── input2.txt
         │   └── input3.txt
-        └── output
-            ├── output1.txt
-            ├── output2.txt
-            └── output3.txt
+        ├── output
+        │   ├── output1.txt
+        │   ├── output2.txt
+        │   └── output3.txt
+        └── subtasks.json (optional)
+
+        subtasks.json groups the tests into subtasks worth a number of points:
+        [{"tests": [1, 2], "points": 40}, {"tests": [3], "points": 60}]
+
+        Only the central directory of the archive is read (and subtasks.json),
+        nothing is downloaded or extracted. The members of each test are kept in
+        `self.tests`. Archives whose files add up to more than
+        `max_uncompressed_bytes` are rejected.
         """
 
         yield ProcessRequest(
             status=Status.INFO, message="📂 Checking directory structure..."
         )
 
-        extracted_dir = f"{self.download_dir}/extracted"
-        input_dir = f"{extracted_dir}/input"
-        output_dir = f"{extracted_dir}/output"
-
         self.input_seqs = set()
+        self.tests: list[tuple[zipfile.ZipInfo, zipfile.ZipInfo]] = []
+        self.subtasks: Optional[list[dict]] = None
+
+        try:
+            self.archive = zipfile.ZipFile(self.source)
+            members = {
+                info.filename: info
+                for info in self.archive.infolist()
+                if not info.is_dir()
+                and not os.path.basename(info.filename).startswith(".")
+            }
+            subtasks_data = (
+                self.archive.read("subtasks.json")
+                if "subtasks.json" in members
+                else None
+            )
+        except (zipfile.BadZipFile, OSError) as e:
+            yield ProcessRequest(
+                status=Status.ERROR, message="❌ Error reading hidden test data"
+            )
+            raise e
+
+        uncompressed_bytes = sum(info.file_size for info in members.values())
+        if uncompressed_bytes > self.max_uncompressed_bytes:
+            yield ProcessRequest(
+                status=Status.ERROR,
+                message=(
+                    f"❌ Hidden tests are too large: {uncompressed_bytes} bytes "
+                    f"uncompressed, at most {self.max_uncompressed_bytes} allowed"
+                ),
+            )
+            raise Exception("❌ Hidden tests are too large")
+
+        input_files = [
+            name[len("input/"):] for name in members if name.startswith("input/")
+        ]
+        output_files = {
+            name[len("output/"):] for name in members if name.startswith("output/")
+        }
 
         def is_valid_input_file(file: str) -> tuple[bool, str]:
             if not file.startswith("input") or not file.endswith(".txt"):
@@ -143,23 +184,20 @@ class HiddenTestProcessor:
             self.input_seqs.add(seq)
             return True, ""
 
-        if not os.path.exists(input_dir):
+        valid_inputs = True
+        if not input_files:
             yield ProcessRequest(
                 status=Status.ERROR, message=f"❌ input directory not found"
             )
+            valid_inputs = False
 
-        if not os.path.exists(output_dir):
+        if not output_files:
             yield ProcessRequest(
                 status=Status.ERROR, message=f"❌ output directory not found"
             )
-
-        input_files = os.listdir(input_dir)
-        output_files = set(os.listdir(output_dir))
-        valid_inputs = True
+            valid_inputs = False
 
         for input_file in input_files:
-            if input_file.startswith("."):
-                continue
             is_valid, message = is_valid_input_file(input_file)
             if not is_valid:
                 yield ProcessRequest(status=Status.ERROR, message=message)
@@ -169,82 +207,121 @@ class HiddenTestProcessor:
                     status=Status.INFO,
                     message=f"📝 Found valid input file: {input_file}",
                 )
-            # sleep(4)
 
         # check if input_seqs is contiguous
-        if len(self.input_seqs) != max(self.input_seqs):
+        if self.input_seqs and len(self.input_seqs) != max(self.input_seqs):
             yield ProcessRequest(
                 status=Status.ERROR, message="❌ Input file sequence is not contiguous"
             )
             valid_inputs = False
 
+        if subtasks_data is not None:
+            try:
+                subtasks = json.loads(subtasks_data)
+                for subtask in subtasks:
+                    if not set(subtask["tests"]) <= self.input_seqs:
+                        raise ValueError("unknown test in subtask")
+                    if not isinstance(subtask["points"], int):
+                        raise ValueError("points must be an integer")
+                self.subtasks = subtasks
+                yield ProcessRequest(
+                    status=Status.INFO,
+                    message=f"📝 Found {len(subtasks)} subtasks",
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                yield ProcessRequest(
+                    status=Status.ERROR, message=f"❌ Invalid subtasks.json: {e}"
+                )
+                valid_inputs = False
+
         if not valid_inputs:
             raise Exception("❌ Invalid input files")
 
+        # anything else, e.g. outputs without inputs, is left out of the bundle
+        self.tests = [
+            (members[f"input/input{seq}.txt"], members[f"output/output{seq}.txt"])
+            for seq in sorted(self.input_seqs)
+        ]
+
         yield ProcessRequest(
             status=Status.INFO, message=f"🔍 Found {len(self.input_seqs)} valid tests"
         )
 
-    def bundle_and_upload(self) -> Generator[ProcessRequest, None, None]:
+    def upload_tests(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 4: Bundle the hidden test data and upload it to the S3 bucket.
+        STEP 3: Upload the files of the valid tests to the S3 bucket.
+
+        Every file is stored under the SHA-256 of its contents, so identical
+        files are uploaded once, and the bundle is recorded with a manifest of
+        the files of each test. Single tests can then be changed later without
+        uploading the others again.
+
+        Files are hashed before anything is uploaded. Small files are kept in
+        memory meanwhile, up to `max_buffered_bytes` in total; larger ones are
+        read from the archive again to be uploaded.
         """
 
         yield ProcessRequest(
             status=Status.INFO, message="📦 Bundling valid hidden test data"
         )
 
+        prefix = f"processed/{self.problem_id}/tests/"
+        # digest -> function opening the file and its size
+        files = {}
+        buffered_bytes = 0
         try:
-            # delete any folders that are not input or output
-            extracted_dir = f"{self.download_dir}/extracted"
-            for folder in os.listdir(extracted_dir):
-                if folder not in ["input", "output"]:
-                    shutil.rmtree(f"{extracted_dir}/{folder}")
-
-            # delete any input files that are not in the input_seqs
-            input_dir = f"{extracted_dir}/input"
-            for file in os.listdir(input_dir):
-                if file.startswith(".") or int(file[5:-4]) not in self.input_seqs:
-                    os.remove(f"{input_dir}/{file}")
-
-            # delete any output files that are not in the input_seqs
-            output_dir = f"{extracted_dir}/output"
-            for file in os.listdir(output_dir):
-                if file.startswith(".") or int(file[6:-4]) not in self.input_seqs:
-                    os.remove(f"{output_dir}/{file}")
-
-            # bundle the extracted directory
-            shutil.make_archive(
-                f"{self.download_dir}/bundled-hidden-tests",
-                "zip",
-                f"{self.download_dir}/extracted",
-            )
+            # hash every member first, streaming it from the archive, so that
+            # identical files are uploaded once and nothing is written to disk
+            tests = []
+            for input_info, output_info in self.tests:
+                test = {}
+                for name, info in (("input", input_info), ("output", output_info)):
+                    buffer = (
+                        info.file_size <= BUFFERED_FILE_SIZE
+                        and buffered_bytes + info.file_size
+                        <= self.max_buffered_bytes
+                    )
+                    digest, data = self._digest(info, buffer)
+                    test[name] = digest
+                    if digest in files:
+                        continue
+                    if data is not None:
+                        buffered_bytes += len(data)
+                        files[digest] = (
+                            lambda data=data: io.BytesIO(data),
+                            len(data),
+                        )
+                    else:
+                        files[digest] = (
+                            lambda info=info: self.archive.open(info),
+                            info.file_size,
+                        )
+                tests.append(test)
+            manifest = {"tests": tests, "subtasks": self.subtasks}
         except Exception as e:
             yield ProcessRequest(status=Status.ERROR, message="Error bundling tests")
             raise e
 
         try:
-            # upload the bundled tests to the bucket
-            aws_client = AWSClient("s3").get_client()
-            aws_client.upload_file(
-                Bucket=self.bucket_name,
-                Filename=f"{self.download_dir}/bundled-hidden-tests.zip",
-                Key=f"processed/{self.problem_id}/hidden-tests.zip",
+            self.logger.info(f"Uploading {len(files)} files of {len(tests)} tests")
+            upload_streams(
+                AWSClient("s3").get_client(),
+                self.bucket_name,
+                {f"{prefix}{digest}": file for digest, file in files.items()},
             )
-            # yield ProcessRequest(status=Status.INFO, message="✔️ Bundling successful")
         except Exception as e:
             yield ProcessRequest(status=Status.ERROR, message="Error bundling tests")
             raise e
 
         try:
             # create record in the database
-            url = f"{self.backend_url}/api/internal/v1/problems/{self.problem_id}/hidden-test-bundle/"
-            headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
+            path = f"/problems/{self.problem_id}/hidden-test-bundle/"
             data: HiddenTestBundleData = {
-                "s3_path": f"processed/{self.problem_id}/hidden-tests.zip",
-                "test_count": len(self.input_seqs),
+                "s3_path": prefix,
+                "test_count": len(tests),
+                "manifest": manifest,
             }
-            response = requests.post(url, headers=headers, json=data)
+            response = InternalAPIClient().post(path, json=data)
             if response.status_code != 201:
                 self.logger.error(
                     f"Error creating hidden test bundle record: {response.text}"
@@ -254,26 +331,35 @@ class HiddenTestProcessor:
             yield ProcessRequest(status=Status.ERROR, message="Error creating record")
             raise e
 
+    def _digest(
+        self, info: zipfile.ZipInfo, buffer: bool
+    ) -> tuple[str, Optional[bytes]]:
+        """
+        SHA-256 of a member, read from the archive without extracting it, and
+        the contents of the member if `buffer` is set.
+        """
+        sha256 = hashlib.sha256()
+        chunks = []
+        with self.archive.open(info) as src:
+            while chunk := src.read(CHUNK_SIZE):
+                sha256.update(chunk)
+                if buffer:
+                    chunks.append(chunk)
+        return sha256.hexdigest(), b"".join(chunks) if buffer else None
+
     def cleanup(self) -> Generator[ProcessRequest, None, None]:
         """
         STEP x: Cleanup the downloaded hidden test data.
         """
         yield ProcessRequest(status=Status.INFO, message="🧹 Cleaning up...")
 
+        if self.source is not None:
+            self.source.close()
+
         if self.persist_data:
             return
 
-        # remove archived files
         try:
-            if os.path.exists(f"{self.download_dir}/hidden-tests.zip"):
-                os.remove(f"{self.download_dir}/hidden-tests.zip")
-            if os.path.exists(f"{self.download_dir}/bundled-hidden-tests.zip"):
-                os.remove(f"{self.download_dir}/bundled-hidden-tests.zip")
-
-            # remove extracted directory
-            if os.path.exists(f"{self.download_dir}/extracted"):
-                shutil.rmtree(f"{self.download_dir}/extracted")
-
             # remove unprocessed hidden tests from the bucket
             aws_client = AWSClient("s3").get_client()
             aws_client.delete_object(
@@ -286,10 +372,9 @@ class HiddenTestProcessor:
 
     def process(self) -> Iterator[ProcessRequest]:
         steps = [
-            self.download_hidden_test_data,
-            self.unzip_hidden_test_data,
+            self.open_hidden_test_data,
             self.check_directory_structure,
-            self.bundle_and_upload,
+            self.upload_tests,
             self.cleanup,
         ]
         yield ProcessRequest(
@@ -299,8 +384,15 @@ class HiddenTestProcessor:
         for idx, step in enumerate(steps, start=1):
             try:
                 self.logger.info(f"Processing step {idx}/{len(steps)}")
+                started_at = perf_counter()
                 yield from step()
-                sleep(randint(1, 3))
+                self.step_timings[step.__name__] = perf_counter() - started_at
+                self.logger.info(
+                    f"Step {idx}/{len(steps)} ({step.__name__}) took "
+                    f"{self.step_timings[step.__name__]:.3f}s"
+                )
+                if self.step_delay:
+                    sleep(self.step_delay)
             except Exception as e:
                 self.logger.error(f"Error processing hidden test data: {e}")
                 yield from self.cleanup()
@@ -308,6 +400,9 @@ class HiddenTestProcessor:
                 yield ProcessRequest(status=Status.INFO, message="FINISHED_ERROR")
                 return
 
+        self.logger.info(
+            f"Pipeline finished in {sum(self.step_timings.values()):.3f}s"
+        )
         yield ProcessRequest(status=Status.SUCCESS, message="🎉 Finished")
         yield ProcessRequest(status=Status.INFO, message="FINISHED_SUCCESS")
 
@@ -0,0 +1,172 @@
+import hashlib
+import io
+import json
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from hidden_test_consumer.hidden_test_process_pb2 import Status
+from hidden_test_consumer.process import HiddenTestProcessor
+
+SUBTASKS = [{"tests": [1, 2], "points": 40}, {"tests": [3], "points": 60}]
+
+
+def make_archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def valid_files():
+    files = {}
+    for i in range(1, 4):
+        files[f"input/input{i}.txt"] = f"{i}\n"
+        files[f"output/output{i}.txt"] = "YES\n"
+    files["subtasks.json"] = json.dumps(SUBTASKS)
+    return files
+
+
+def s3_client(data):
+    client = MagicMock()
+    client.head_object.return_value = {"ContentLength": len(data), "ETag": '"e"'}
+
+    def get_object(Range, **kwargs):
+        start, end = map(int, Range[len("bytes="):].split("-"))
+        return {"Body": io.BytesIO(data[start : end + 1])}
+
+    client.get_object.side_effect = get_object
+    client.uploaded = {}
+    client.upload_fileobj.side_effect = (
+        lambda Fileobj, Bucket, Key, Config: client.uploaded.__setitem__(
+            Key, Fileobj.read()
+        )
+    )
+    return client
+
+
+@pytest.fixture
+def open_processor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def open_processor(files):
+        client = s3_client(make_archive(files))
+        with patch("hidden_test_consumer.process.AWSClient") as aws:
+            aws.return_value.get_client.return_value = client
+            processor = HiddenTestProcessor(
+                problem_id=1,
+                client_id="client",
+                bucket_name="bucket",
+                grpc_server="localhost:50051",
+            )
+            list(processor.open_hidden_test_data())
+        return processor, client
+
+    return open_processor
+
+
+def test_check_directory_structure(open_processor):
+    processor, _ = open_processor(valid_files())
+
+    messages = list(processor.check_directory_structure())
+
+    assert messages[-1].message == "🔍 Found 3 valid tests"
+    assert [
+        (input_info.filename, output_info.filename)
+        for input_info, output_info in processor.tests
+    ] == [(f"input/input{i}.txt", f"output/output{i}.txt") for i in range(1, 4)]
+    assert processor.subtasks == SUBTASKS
+
+
+@pytest.mark.parametrize(
+    "change, error",
+    [
+        ({"output/output2.txt": None}, "❌ Output file output2.txt not found"),
+        ({"input/input2.txt": None}, "❌ Input file sequence is not contiguous"),
+        ({"input/inputx.txt": "x"}, "❌ Input file sequence is not a positive integer"),
+        ({"subtasks.json": '[{"tests": [4], "points": 1}]'}, "❌ Invalid subtasks.json"),
+    ],
+)
+def test_check_directory_structure_rejects(open_processor, change, error):
+    files = valid_files()
+    for name, content in change.items():
+        if content is None:
+            del files[name]
+        else:
+            files[name] = content
+    processor, _ = open_processor(files)
+
+    messages = []
+    with pytest.raises(Exception):
+        for message in processor.check_directory_structure():
+            messages.append(message)
+
+    errors = [m.message for m in messages if m.status == Status.ERROR]
+    assert any(message.startswith(error) for message in errors)
+
+
+def test_check_directory_structure_rejects_large_archives(open_processor):
+    processor, _ = open_processor(valid_files())
+    processor.max_uncompressed_bytes = 10
+
+    with pytest.raises(Exception, match="too large"):
+        list(processor.check_directory_structure())
+
+
+def upload(processor, client):
+    with patch("hidden_test_consumer.process.AWSClient") as aws, patch(
+        "hidden_test_consumer.process.InternalAPIClient"
+    ) as api:
+        aws.return_value.get_client.return_value = client
+        api.return_value.post.return_value.status_code = 201
+        list(processor.upload_tests())
+    return api.return_value.post.call_args
+
+
+def test_upload_tests(open_processor):
+    processor, client = open_processor(valid_files())
+    list(processor.check_directory_structure())
+
+    post = upload(processor, client)
+
+    # the three outputs are the same file
+    digest = {
+        content: hashlib.sha256(content.encode()).hexdigest()
+        for content in ("1\n", "2\n", "3\n", "YES\n")
+    }
+    assert client.uploaded == {
+        f"processed/1/tests/{digest}": content.encode()
+        for content, digest in digest.items()
+    }
+    assert post.args == ("/problems/1/hidden-test-bundle/",)
+    assert post.kwargs["json"] == {
+        "s3_path": "processed/1/tests/",
+        "test_count": 3,
+        "manifest": {
+            "tests": [
+                {"input": digest[f"{i}\n"], "output": digest["YES\n"]}
+                for i in range(1, 4)
+            ],
+            "subtasks": SUBTASKS,
+        },
+    }
+
+
+@pytest.mark.parametrize("max_buffered_bytes, reads", [(1024, 6), (0, 10)])
+def test_upload_tests_reads_buffered_files_once(
+    open_processor, max_buffered_bytes, reads
+):
+    processor, client = open_processor(valid_files())
+    list(processor.check_directory_structure())
+    processor.max_buffered_bytes = max_buffered_bytes
+    opened = []
+    archive_open = processor.archive.open
+    processor.archive.open = lambda info: opened.append(info) or archive_open(info)
+
+    upload(processor, client)
+
+    # six files are hashed, four of them are distinct and uploaded
+    assert len(opened) == reads
+    assert len(client.uploaded) == 4
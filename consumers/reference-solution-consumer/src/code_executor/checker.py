@@ -0,0 +1,249 @@
+"""
+Checkers decide whether the output of a test is correct.
+
+Both outputs are read from their files in chunks and compared as they are
+read, so a checker stops at the first difference and never holds either
+output in memory.
+
+A checker is chosen by name, optionally followed by an argument:
+
+    exact           byte for byte
+    trimmed         byte for byte after CRLF and CR line endings are turned
+                    into LF, ignoring leading and trailing whitespace (the
+                    default, as `arbiterx.CodeExecutor` compares in text mode)
+    tokens          the outputs split on whitespace
+    float[:eps]     like tokens, but numbers may differ by an absolute or
+                    relative error of `eps` (default 1e-6)
+    special:<path>  a special judge executable, see `SpecialJudge`
+"""
+
+import math
+import subprocess
+from abc import ABC, abstractmethod
+from itertools import zip_longest
+from typing import BinaryIO, Iterator, Optional
+
+# bytes read from an output at a time
+CHUNK_SIZE = 64 * 1024
+
+
+class CheckerError(Exception):
+    pass
+
+
+def _chunks(f: BinaryIO) -> Iterator[bytes]:
+    while chunk := f.read(CHUNK_SIZE):
+        yield chunk
+
+
+def _newlines(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    The chunks with CRLF and CR line endings turned into LF, like a file
+    opened in text mode reads them.
+    """
+    # the previous chunk ended with CR, already turned into LF
+    after_cr = False
+    for chunk in chunks:
+        if after_cr and chunk.startswith(b"\n"):
+            chunk = chunk[1:]
+        after_cr = chunk.endswith(b"\r")
+        chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        if chunk:
+            yield chunk
+
+
+def _trimmed(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    The chunks without the leading and trailing whitespace of the whole
+    stream. Whitespace is held back until it is followed by something else.
+    """
+    pending = []
+    started = False
+    for chunk in chunks:
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        body = chunk.rstrip()
+        if not body:
+            pending.append(chunk)
+            continue
+        yield from pending
+        pending.clear()
+        yield body
+        if len(body) < len(chunk):
+            pending.append(chunk[len(body):])
+
+
+def _tokens(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    The whitespace separated tokens of the stream. A token split across
+    chunks is joined before it is yielded.
+    """
+    partial = b""
+    for chunk in chunks:
+        if partial and chunk[:1].isspace():
+            yield partial
+            partial = b""
+        tokens = chunk.split()
+        if not tokens:
+            continue
+        tokens[0] = partial + tokens[0]
+        partial = b"" if chunk[-1:].isspace() else tokens.pop()
+        yield from tokens
+    if partial:
+        yield partial
+
+
+def _equal(a: Iterator[bytes], b: Iterator[bytes]) -> bool:
+    """
+    Compare two streams of non-empty chunks whose boundaries may differ.
+    """
+    a_chunk = b_chunk = memoryview(b"")
+    while True:
+        if not a_chunk:
+            a_chunk = memoryview(next(a, b""))
+        if not b_chunk:
+            b_chunk = memoryview(next(b, b""))
+        if not a_chunk or not b_chunk:
+            return not a_chunk and not b_chunk
+        n = min(len(a_chunk), len(b_chunk))
+        if a_chunk[:n] != b_chunk[:n]:
+            return False
+        a_chunk = a_chunk[n:]
+        b_chunk = b_chunk[n:]
+
+
+class Checker(ABC):
+    name = ""
+
+    @abstractmethod
+    def check(
+        self, input_file: str, expected_output_file: str, actual_output_file: str
+    ) -> bool:
+        """
+        Whether the actual output of a test is correct.
+
+        Raises:
+            CheckerError: If the output could not be checked.
+        """
+
+
+class ExactChecker(Checker):
+    name = "exact"
+
+    def check(self, input_file, expected_output_file, actual_output_file):
+        with open(expected_output_file, "rb") as expected, open(
+            actual_output_file, "rb"
+        ) as actual:
+            return _equal(self._chunks(expected), self._chunks(actual))
+
+    def _chunks(self, f: BinaryIO) -> Iterator[bytes]:
+        return _chunks(f)
+
+
+class TrimmedChecker(ExactChecker):
+    name = "trimmed"
+
+    def _chunks(self, f: BinaryIO) -> Iterator[bytes]:
+        return _trimmed(_newlines(_chunks(f)))
+
+
+class TokenChecker(Checker):
+    name = "tokens"
+
+    def check(self, input_file, expected_output_file, actual_output_file):
+        with open(expected_output_file, "rb") as expected, open(
+            actual_output_file, "rb"
+        ) as actual:
+            for e, a in zip_longest(
+                _tokens(_chunks(expected)), _tokens(_chunks(actual))
+            ):
+                if e is None or a is None or not self._same(e, a):
+                    return False
+        return True
+
+    def _same(self, expected: bytes, actual: bytes) -> bool:
+        return expected == actual
+
+
+class FloatChecker(TokenChecker):
+    name = "float"
+
+    def __init__(self, epsilon: float = 1e-6):
+        self.epsilon = epsilon
+
+    def _same(self, expected: bytes, actual: bytes) -> bool:
+        if expected == actual:
+            return True
+        try:
+            e, a = float(expected), float(actual)
+        except ValueError:
+            return False
+        return math.isclose(a, e, rel_tol=self.epsilon, abs_tol=self.epsilon)
+
+
+class SpecialJudge(Checker):
+    """
+    An executable that is run as `<path> <input> <actual> <expected>` and
+    exits with 0 if the output is correct and 1 or 2 if it is not. Any other
+    exit code means the judge itself failed.
+    """
+
+    name = "special"
+
+    def __init__(self, path: str, timeout: float = 10):
+        self.path = path
+        self.timeout = timeout
+
+    def check(self, input_file, expected_output_file, actual_output_file):
+        try:
+            proc = subprocess.run(
+                [self.path, input_file, actual_output_file, expected_output_file],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise CheckerError(f"Error running special judge {self.path}: {e}")
+        if proc.returncode == 0:
+            return True
+        if proc.returncode in (1, 2):
+            return False
+        raise CheckerError(
+            f"Special judge {self.path} failed with exit code {proc.returncode}"
+        )
+
+
+CHECKERS = {
+    checker.name: checker
+    for checker in (
+        ExactChecker,
+        TrimmedChecker,
+        TokenChecker,
+        FloatChecker,
+        SpecialJudge,
+    )
+}
+
+
+def get_checker(spec: Optional[str]) -> Checker:
+    """
+    Build the checker for `spec`, e.g. "tokens", "float:1e-9" or
+    "special:/judges/checker". Without a spec outputs are compared trimmed.
+    """
+    if not spec:
+        return TrimmedChecker()
+    name, _, arg = spec.partition(":")
+    if name not in CHECKERS:
+        raise ValueError(f"Unknown checker: {name}")
+    if name == FloatChecker.name:
+        return FloatChecker(float(arg)) if arg else FloatChecker()
+    if name == SpecialJudge.name:
+        if not arg:
+            raise ValueError("The special judge needs the path of its executable")
+        return SpecialJudge(arg)
+    if arg:
+        raise ValueError(f"Checker {name} takes no argument")
+    return CHECKERS[name]()
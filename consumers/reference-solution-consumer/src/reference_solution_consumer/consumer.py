@@ -2,6 +2,7 @@ import os
 
 from base_consumer import BaseKafkaConsumer
 from reference_solution_consumer.process import ReferenceSolutionValidationProcessor
+from reference_solution_consumer.workspace import Workspace
 
 class ReferenceSolutionValidationConsumer(BaseKafkaConsumer):
     def __init__(self):
@@ -14,6 +15,12 @@ class ReferenceSolutionValidationConsumer(BaseKafkaConsumer):
         log_level = os.environ.get("LOG_LEVEL", "INFO")
         self.set_logger_level(log_level)
 
+        # remove workspaces left behind by a previous run that crashed
+        Workspace.sweep(
+            os.path.join(os.environ.get("DOWNLOAD_DIR", "/tmp"), "workspaces"),
+            self.logger,
+        )
+
     def process_message(self, message: dict):
         self.logger.info(f"Processing message: {message}")
         processor = ReferenceSolutionValidationProcessor(
@@ -0,0 +1,99 @@
+from dotenv import load_dotenv
+
+load_dotenv()
+import logging
+import os
+import random
+import time
+from threading import Lock
+from typing import Optional, Type
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:8000")
+API_KEY = os.environ.get("API_KEY", None)
+# seconds to wait for the connection and for the response
+CONNECT_TIMEOUT = float(os.environ.get("INTERNAL_API_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("INTERNAL_API_READ_TIMEOUT", "10"))
+MAX_RETRIES = int(os.environ.get("INTERNAL_API_MAX_RETRIES", "3"))
+POOL_SIZE = int(os.environ.get("INTERNAL_API_POOL_SIZE", "16"))
+
+
+class InternalAPIClient:
+    """
+    Shared client for the internal API of the backend.
+
+    All calls go through one keep-alive session, so connections to the
+    backend are pooled and reused across pipeline steps and worker threads.
+    Every call has a timeout. Idempotent calls (GET, PATCH with the same
+    body) are retried on connection errors, timeouts and gateway errors,
+    with exponential backoff and full jitter; POST is never retried.
+
+    Usage:
+        response = InternalAPIClient().get(f"/submissions/{id}/judge-job/")
+    """
+
+    RETRY_STATUS_CODES = {502, 503, 504}
+    BACKOFF_BASE = 0.2
+    BACKOFF_MAX = 5.0
+
+    _instance: Optional["InternalAPIClient"] = None
+    _lock: Lock = Lock()  # Ensures thread safety
+
+    def __new__(cls: Type["InternalAPIClient"]) -> "InternalAPIClient":
+        with cls._lock:
+            if cls._instance is not None:
+                return cls._instance
+            instance = super().__new__(cls)
+            instance.base_url = f"{BACKEND_URL}/api/internal/v1"
+            instance.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            instance.session.mount("http://", adapter)
+            instance.session.mount("https://", adapter)
+            instance.session.headers.update(
+                {"X-API-KEY": API_KEY, "Content-Type": "application/json"}
+            )
+            cls._instance = instance
+            return instance
+
+    def get(self, path: str) -> requests.Response:
+        return self._request("GET", path, idempotent=True)
+
+    def patch(self, path: str, json: dict) -> requests.Response:
+        return self._request("PATCH", path, idempotent=True, json=json)
+
+    def post(self, path: str, json: dict) -> requests.Response:
+        return self._request("POST", path, idempotent=False, json=json)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(
+            0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2**attempt)
+        )
+
+    def _request(
+        self, method: str, path: str, idempotent: bool, json: Optional[dict] = None
+    ) -> requests.Response:
+        url = f"{self.base_url}{path}"
+        retries = MAX_RETRIES if idempotent else 0
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.request(
+                    method, url, json=json, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries:
+                    raise e
+                logger.warning(f"{method} {url} failed: {e}, retrying")
+            else:
+                if (
+                    response.status_code not in self.RETRY_STATUS_CODES
+                    or attempt == retries
+                ):
+                    return response
+                logger.warning(
+                    f"{method} {url} returned {response.status_code}, retrying"
+                )
+            time.sleep(self._backoff(attempt))
@@ -1,19 +1,25 @@
 import json
 import os
-import shutil
 import logging
+import shutil
 import zipfile
-from random import randint
-from time import sleep
+from time import perf_counter, sleep
+from uuid import uuid4
+from code_executor.checker import get_checker
 from code_executor.python312 import PythonCodeExecutor
-import requests
 from typing import Iterator, Generator, TypedDict
 from reference_solution_consumer.logger import setup_logger
+from reference_solution_consumer.internal_api_client import InternalAPIClient
 import grpc
 
 from arbiterx.exceptions import EarlyExitError
 
-from reference_solution_consumer.aws_client import AWSClient
+from reference_solution_consumer.aws_client import (
+    AWSClient,
+    download_file,
+    download_files,
+)
+from reference_solution_consumer.workspace import Workspace
 from reference_solution_consumer.ref_sol_validation_process_pb2 import (
     ProcessRequest,
     Status,
@@ -41,9 +47,17 @@ class ReferenceSolutionValidationProcessor:
         self.reference_solution_id = reference_solution_id
 
         self.download_dir = os.environ.get("DOWNLOAD_DIR", "/tmp")
-        # TODO: implement data persistence by leveraging env variable
-        self.backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
-        self.api_key = os.environ.get("API_KEY", None)
+        # every validation is run in its own workspace inside the download
+        # directory, which is also the sandbox volume
+        self.workspace_root = os.path.join(self.download_dir, "workspaces")
+        self.workspace = None
+        # exact, trimmed, tokens, float[:epsilon] or special:<path>; see
+        # code_executor/checker.py. Outputs are compared trimmed by default.
+        self.checker_name = os.environ.get("CHECKER")
+        # optional pause (in seconds) between pipeline steps, e.g. to pace the
+        # progress shown to the client during demos; disabled by default
+        self.step_delay = float(os.environ.get("PIPELINE_STEP_DELAY", "0"))
+        self.step_timings: dict[str, float] = {}
 
         if not self.problem_id:
             raise ValueError("Problem ID is required.")
@@ -61,9 +75,36 @@ class ReferenceSolutionValidationProcessor:
         self.execution_time = -1
         self.verdict = None
 
+    def pull_problem(self) -> Generator[ProcessRequest, None, None]:
+        """
+        STEP 1: Pull the problem from Django API.
+        """
+        yield ProcessRequest(
+            status=Status.INFO, message="📥 Pulling reference solution..."
+        )
+        try:
+            path = f"/problems/{self.problem_id}/"
+            response = InternalAPIClient().get(path)
+            if response.status_code == 200:
+                data = response.json()['data']
+                if not data:
+                    raise ValueError("No reference solution found.")
+                self.logger.info(f"Reference solution data: {data}")
+                self.problem = data
+                yield ProcessRequest(
+                    status=Status.SUCCESS,
+                    message="✅ Problem pulled successfully",
+                )
+        except Exception as e:
+            yield ProcessRequest(
+                status=Status.ERROR,
+                message="❌ Error pulling reference solution",
+            )
+            raise e
+
     def download_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 1: Download the hidden test data from the S3 bucket.
+        STEP 2: Download the hidden test data from the S3 bucket.
         """
 
         aws_client = AWSClient("s3").get_client()
@@ -73,18 +114,21 @@ class ReferenceSolutionValidationProcessor:
             self.logger.info(
                 f"Collecting hidden test data for problem ID: {self.problem_id}"
             )
-            path = os.path.join(self.download_dir, self.problem_id, "hidden-tests.zip")
-            # clear from local if exists
-            if os.path.exists(path):
-                self.logger.info("Removing existing hidden-tests.zip")
-                os.remove(path)
-
+            bundle = self.problem.get("hidden_test_bundle") or {}
+            if bundle.get("manifest"):
+                self.download_tests(aws_client, bundle["s3_path"], bundle["manifest"])
+                yield ProcessRequest(
+                    status=Status.SUCCESS,
+                    message="✅ Hidden test data downloaded successfully",
+                )
+                return
+            path = os.path.join(self.workspace.path, "hidden-tests.zip")
             self.logger.info(f"Downloading hidden test into {path}")
-            os.makedirs(os.path.join(self.download_dir, self.problem_id), exist_ok=True)
-            aws_client.download_file(
-                Bucket=self.bucket_name,
-                Key=f"processed/{self.problem_id}/hidden-tests.zip",
-                Filename=path,
+            download_file(
+                aws_client,
+                self.bucket_name,
+                f"processed/{self.problem_id}/hidden-tests.zip",
+                path,
             )
             yield ProcessRequest(
                 status=Status.SUCCESS,
@@ -93,55 +137,57 @@ class ReferenceSolutionValidationProcessor:
         except Exception as e:
             raise e
 
+    def download_tests(self, aws_client, prefix: str, manifest: dict) -> None:
+        """
+        Download the files of a bundle with a manifest into the workspace.
+        Files shared by several tests are downloaded once.
+        """
+        paths: dict[str, list[str]] = {}
+        for i, test in enumerate(manifest["tests"], start=1):
+            for sub_dir in ("input", "output"):
+                paths.setdefault(test[sub_dir], []).append(
+                    os.path.join(self.workspace.path, sub_dir, f"{sub_dir}{i}.txt")
+                )
+        for sub_dir in ("input", "output"):
+            os.makedirs(os.path.join(self.workspace.path, sub_dir), exist_ok=True)
+        download_files(
+            aws_client,
+            self.bucket_name,
+            {f"{prefix}{digest}": files[0] for digest, files in paths.items()},
+        )
+        for files in paths.values():
+            for path in files[1:]:
+                shutil.copyfile(files[0], path)
+        if manifest.get("subtasks") is not None:
+            with open(os.path.join(self.workspace.path, "subtasks.json"), "w") as f:
+                json.dump(manifest["subtasks"], f)
+
     def unzip_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 2: Unzip the downloaded hidden test data.
+        STEP 3: Unzip the downloaded hidden test data, if it was a zip file.
         """
 
+        if not os.path.exists(os.path.join(self.workspace.path, "hidden-tests.zip")):
+            return
+
         yield ProcessRequest(
             status=Status.INFO, message="📦 Unzipping hidden test data..."
         )
 
         try:
-            path = os.path.join(self.download_dir, self.problem_id, "hidden-tests.zip")
+            path = os.path.join(self.workspace.path, "hidden-tests.zip")
             with zipfile.ZipFile(
                 path
             ) as zip_ref:
-                zip_ref.extractall(os.path.join(self.download_dir, self.problem_id))
+                zip_ref.extractall(self.workspace.path)
+            # the archive is not needed inside the sandbox
+            os.remove(path)
         except Exception as e:
             yield ProcessRequest(
                 status=Status.ERROR, message="❌ Error unzipping hidden test data"
             )
             raise e
         
-    def pull_problem(self) -> Generator[ProcessRequest, None, None]:
-        """
-        STEP 3: Pull the problem from Django API.
-        """
-        yield ProcessRequest(
-            status=Status.INFO, message="📥 Pulling reference solution..."
-        )
-        try:
-            url = f"{self.backend_url}/api/internal/v1/problems/{self.problem_id}/"
-            headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                data = response.json()['data']
-                if not data:
-                    raise ValueError("No reference solution found.")
-                self.logger.info(f"Reference solution data: {data}")
-                self.problem = data
-                yield ProcessRequest(
-                    status=Status.SUCCESS,
-                    message="✅ Problem pulled successfully",
-                )
-        except Exception as e:
-            yield ProcessRequest(
-                status=Status.ERROR,
-                message="❌ Error pulling reference solution",
-            )
-            raise e
-
     def collect_reference_solution(self) -> Generator[ProcessRequest, None, None]:
         """
         STEP 4:
@@ -159,10 +205,7 @@ class ReferenceSolutionValidationProcessor:
             self.logger.info(f"Reference solution: {self.reference_solution}")
             # reference_solution.code holds the code of the reference solution
             # we need to save it into a file
-            path = os.path.join(
-            self.download_dir,
-            self.problem_id, "reference_solution.py"
-            )
+            path = os.path.join(self.workspace.path, "reference_solution.py")
             with open(path, "w") as f:
                 f.write(self.reference_solution["code"])
             
@@ -246,9 +289,16 @@ class ReferenceSolutionValidationProcessor:
                     user="sandbox", # Default is "nobody"
                     docker_image=language_image_map[normalized_language_key],
                     volume=os.environ.get("DOCKER_VOLUME"),
-                    src_in_volume=self.problem_id,
-                    src=os.path.join(self.download_dir, self.problem_id),
+                    src_in_volume=os.path.relpath(
+                        self.workspace.path, self.download_dir
+                    ),
+                    src=self.workspace.path,
+                    container_name=(
+                        f"reference-solution-{self.reference_solution_id}-"
+                        f"{uuid4().hex}"
+                    ),
                     constraints=constraints,
+                    checker=get_checker(self.checker_name),
                     disable_compile=True,
                     log_file="arbiterx.log"
             ) as executor:
@@ -262,11 +312,6 @@ class ReferenceSolutionValidationProcessor:
                         execution_time_s = int(result["stats"]["cpu_stat"]["usage_usec"]) / 1_000_000
                         self.execution_time = max(self.execution_time, execution_time_s)
 
-                        # Limit the input, actual_output, and expected_output to 1000 characters
-                        for key in ["input", "actual_output", "expected_output"]:
-                            if key in result and isinstance(result[key], str) and len(result[key]) > 100:
-                                result[key] = result[key][:100] + "..."
-
                         yield ProcessRequest(
                             status=Status.VERDICT,
                             message=json.dumps(result)
@@ -306,14 +351,13 @@ class ReferenceSolutionValidationProcessor:
             yield ProcessRequest(
                 status=Status.INFO, message="Updating verdict..."
             )
-            url = f"{self.backend_url}/api/internal/v1/problems/{self.problem_id}/reference-solutions/{self.reference_solution_id}/"
-            headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
+            path = f"/problems/{self.problem_id}/reference-solutions/{self.reference_solution_id}/"
             data = {
                 "verdict": _convert_verdict(self.verdict),
                 "memory_usage": self.memory_usage,
                 "execution_time": self.execution_time
             }
-            response = requests.patch(url, headers=headers, json=data)
+            response = InternalAPIClient().patch(path, json=data)
             if response.status_code == 200:
                 yield ProcessRequest(
                     status=Status.SUCCESS,
@@ -330,16 +374,13 @@ class ReferenceSolutionValidationProcessor:
     
     def cleanup(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 7: Cleanup the downloaded files.
+        STEP 7: Remove the workspace.
         """
         try:
             yield ProcessRequest(
                 status=Status.INFO, message="Cleaning up..."
             )
-            path = os.path.join(self.download_dir, self.problem_id)
-            if os.path.exists(path):
-                self.logger.info(f"Removing {path}")
-                shutil.rmtree(path)
+            self.workspace.cleanup()
             yield ProcessRequest(
                 status=Status.SUCCESS,
                 message="✅ Cleanup successful",
@@ -357,41 +398,60 @@ class ReferenceSolutionValidationProcessor:
 
     def process(self) -> Iterator[ProcessRequest]:
         steps = [
+            self.pull_problem,
             self.download_hidden_test_data,
             self.unzip_hidden_test_data,
-            self.pull_problem,
             self.collect_reference_solution,
             self.collect_constraints,
             self.run,
             self.update_verdict,
             self.cleanup,
         ]
-        yield ProcessRequest(
-            status=Status.INFO, message="⚙️ Started processing hidden test data"
+        self.workspace = Workspace(
+            self.workspace_root,
+            f"reference-solution-{self.reference_solution_id}",
+            self.logger,
         )
+        try:
+            yield ProcessRequest(
+                status=Status.INFO, message="⚙️ Started processing hidden test data"
+            )
 
-        for idx, step in enumerate(steps, start=1):
-            try:
-                self.logger.info(f"Processing step {idx}/{len(steps)}")
-                yield from step()
-                sleep(randint(1, 3))
-            except Exception as e:
-                self.logger.error(f"Error processing hidden test data: {e}")
-                yield from self.update_verdict()
-                yield from self.cleanup()
-                # yield ProcessRequest(status=Status.ERROR, message="❌ Error processing")
-                yield ProcessRequest(status=Status.INFO, message="FINISHED_ERROR")
-                return
-        yield ProcessRequest(
-            status=Status.FINAL_VERDICT,
-            message=json.dumps({
-                "verdict": self.verdict,
-                "memory_usage": self.memory_usage,
-                "execution_time": self.execution_time,
-            })
-        )
-        yield ProcessRequest(status=Status.SUCCESS, message="🎉 Finished")
-        yield ProcessRequest(status=Status.INFO, message="FINISHED_SUCCESS")
+            for idx, step in enumerate(steps, start=1):
+                try:
+                    self.logger.info(f"Processing step {idx}/{len(steps)}")
+                    started_at = perf_counter()
+                    yield from step()
+                    self.step_timings[step.__name__] = perf_counter() - started_at
+                    self.logger.info(
+                        f"Step {idx}/{len(steps)} ({step.__name__}) took "
+                        f"{self.step_timings[step.__name__]:.3f}s"
+                    )
+                    if self.step_delay:
+                        sleep(self.step_delay)
+                except Exception as e:
+                    self.logger.error(f"Error processing hidden test data: {e}")
+                    yield from self.update_verdict()
+                    yield from self.cleanup()
+                    # yield ProcessRequest(status=Status.ERROR, message="❌ Error processing")
+                    yield ProcessRequest(status=Status.INFO, message="FINISHED_ERROR")
+                    return
+            yield ProcessRequest(
+                status=Status.FINAL_VERDICT,
+                message=json.dumps({
+                    "verdict": self.verdict,
+                    "memory_usage": self.memory_usage,
+                    "execution_time": self.execution_time,
+                })
+            )
+            self.logger.info(
+                f"Pipeline finished in {sum(self.step_timings.values()):.3f}s"
+            )
+            yield ProcessRequest(status=Status.SUCCESS, message="🎉 Finished")
+            yield ProcessRequest(status=Status.INFO, message="FINISHED_SUCCESS")
+        finally:
+            # also covers a crash in a step or the client going away mid-stream
+            self.workspace.cleanup()
 
     def initiate(self):
         with grpc.insecure_channel(self.grpc_server) as channel:
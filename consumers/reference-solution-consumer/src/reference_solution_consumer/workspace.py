@@ -0,0 +1,99 @@
+import fcntl
+import logging
+import os
+import shutil
+from typing import Optional
+from uuid import uuid4
+
+
+class Workspace:
+    """
+    Isolated scratch directory of a single judge job.
+
+    Every job gets a uniquely named directory, so jobs of the same problem never
+    overwrite each other's source code or test data. A lock file is held for
+    the lifetime of the job; `sweep` uses it to tell leftovers of crashed jobs
+    apart from workspaces that are still in use.
+
+    Expected directory structure:
+    {root}/
+    ├── {prefix}-{uuid}/         # the workspace, mounted into the sandbox
+    ├── {prefix}-{uuid}.lock     # locked while the job is running
+    └── .trash-{uuid}/           # workspaces that are being removed
+    """
+
+    def __init__(
+        self, root: str, prefix: str, logger: Optional[logging.Logger] = None
+    ):
+        self.root = root
+        self.name = f"{prefix}-{uuid4().hex}"
+        self.path = os.path.join(root, self.name)
+        self.logger = logger or logging.getLogger(__name__)
+
+        os.makedirs(self.root, exist_ok=True)
+        self._lock_path = f"{self.path}.lock"
+        self._lock_file = open(self._lock_path, "w")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.makedirs(self.path)
+        self.logger.info(f"Created workspace {self.path}")
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
+
+    @property
+    def closed(self) -> bool:
+        return self._lock_file is None
+
+    def cleanup(self) -> None:
+        """
+        Remove the workspace. Safe to call more than once.
+
+        The directory is first renamed out of the way, which is atomic, so the
+        workspace disappears in one step even if the removal itself is
+        interrupted. Anything left behind is removed by the next `sweep`.
+        """
+        if self.closed:
+            return
+        Workspace._discard(self.root, self.path)
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+        self._lock_file = None
+        os.remove(self._lock_path)
+        self.logger.info(f"Removed workspace {self.path}")
+
+    @staticmethod
+    def _discard(root: str, path: str) -> None:
+        if not os.path.exists(path):
+            return
+        trash = os.path.join(root, f".trash-{uuid4().hex}")
+        os.rename(path, trash)
+        shutil.rmtree(trash, ignore_errors=True)
+
+    @staticmethod
+    def sweep(root: str, logger: Optional[logging.Logger] = None) -> None:
+        """
+        Remove workspaces left behind by jobs that are no longer running,
+        e.g. after the consumer crashed.
+        """
+        logger = logger or logging.getLogger(__name__)
+        if not os.path.isdir(root):
+            return
+        for entry in os.listdir(root):
+            path = os.path.join(root, entry)
+            if entry.startswith(".trash-"):
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            if not entry.endswith(".lock"):
+                continue
+            with open(path, "a") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # the job owning this workspace is still running
+                    continue
+                logger.info(f"Removing stale workspace {path[:-len('.lock')]}")
+                Workspace._discard(root, path[: -len(".lock")])
+                os.remove(path)
@@ -0,0 +1,52 @@
+"""
+Report the end-to-end latency of every pipeline step of `SubmissionProcessor`.
+
+The processor is driven directly, without the gRPC stream, against the backend,
+S3 bucket and sandbox configured in the environment (`.env`). Run it from the
+consumer container so that the sandbox volume is available:
+
+    poetry run python3 benchmarks/step_latency.py \
+        --problem-id 3 --submission-id 10 --runs 5
+"""
+
+import argparse
+import statistics
+from collections import defaultdict
+from time import perf_counter
+
+from submission_consumer.process import SubmissionProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--problem-id", type=int, required=True)
+    parser.add_argument("--submission-id", type=int, required=True)
+    parser.add_argument("--bucket-name", default="codesirius-tests-data")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    timings = defaultdict(list)
+    totals = []
+    for _ in range(args.runs):
+        processor = SubmissionProcessor(
+            problem_id=args.problem_id,
+            client_id="benchmark",
+            bucket_name=args.bucket_name,
+            grpc_server="unused",
+            submission_id=args.submission_id,
+        )
+        started_at = perf_counter()
+        for _ in processor.process():
+            pass
+        totals.append(perf_counter() - started_at)
+        for step, elapsed in processor.step_timings.items():
+            timings[step].append(elapsed)
+
+    print(f"{'step':<28}{'mean (s)':>10}{'max (s)':>10}")
+    for step, values in timings.items():
+        print(f"{step:<28}{statistics.mean(values):>10.3f}{max(values):>10.3f}")
+    print(f"{'end-to-end':<28}{statistics.mean(totals):>10.3f}{max(totals):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
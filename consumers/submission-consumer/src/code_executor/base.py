@@ -0,0 +1,91 @@
+import os
+from typing import Optional
+
+from arbiterx import CodeExecutor as BaseCodeExecutor
+from arbiterx.types import Stats, TestResult
+from arbiterx.verdicts import Verdict
+
+from code_executor.checker import Checker, SpecialJudge, get_checker
+
+# characters of the input and outputs of a test kept in its result
+PREVIEW_SIZE = 100
+
+
+def preview(path: str) -> str:
+    """
+    The start of the file at `path`, without reading the rest of it.
+    """
+    with open(path, "r", errors="replace") as f:
+        text = f.read(PREVIEW_SIZE + 1)
+    if len(text) > PREVIEW_SIZE:
+        return text[:PREVIEW_SIZE] + "..."
+    return text
+
+
+class CodeExecutor(BaseCodeExecutor):
+    """
+    `arbiterx.CodeExecutor` that compares outputs with a streaming `Checker`
+    instead of reading both of them into memory.
+
+    The input and outputs of a test are only previewed in its result.
+    """
+
+    def __init__(self, *args, checker: Optional[Checker] = None, **kwargs):
+        """
+        Args:
+            checker: Checker of the outputs; outputs are compared trimmed
+                     by default.
+        """
+        super().__init__(*args, **kwargs)
+        self.checker = checker or get_checker(None)
+
+    def _evaluate(
+        self,
+        index: int,
+        input_file: str,
+        expected_output_file: str,
+        actual_output_file: str,
+        stderr: str,
+        exit_code: int,
+        stats: Stats,
+        checker_executable_path: Optional[str],
+    ) -> TestResult:
+        self.logger.info(f"[Test {index}] Evaluating")
+
+        def _build_test_result(verdict: Verdict) -> TestResult:
+            return TestResult(
+                test_case=index,
+                exit_code=exit_code,
+                stats=stats,
+                verdict=verdict.name,
+                verdict_label=verdict.label,
+                verdict_details=verdict.details,
+                input=preview(input_file),
+                actual_output=preview(actual_output_file),
+                expected_output=preview(expected_output_file),
+            )
+
+        match exit_code:
+            case 0:
+                time_limit_usec = self.constraints["time_limit"] * 1_000_000
+                if stats["cpu_stat"]["usage_usec"] > time_limit_usec:
+                    return _build_test_result(Verdict.TLE)
+                checker = self.checker
+                if checker_executable_path:
+                    checker = SpecialJudge(
+                        os.path.join(
+                            self._resolve_path("host"), checker_executable_path
+                        )
+                    )
+                if checker.check(input_file, expected_output_file, actual_output_file):
+                    return _build_test_result(Verdict.AC)
+                return _build_test_result(Verdict.WA)
+            case 124:
+                # the fallback timeout of the run command
+                return _build_test_result(Verdict.ILE)
+            case 137:
+                if stats["memory_events"]["oom"] > 0:
+                    return _build_test_result(Verdict.MLE)
+                return _build_test_result(Verdict.RE)
+            case _:
+                return _build_test_result(Verdict.RE)
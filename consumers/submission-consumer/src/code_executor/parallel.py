@@ -0,0 +1,250 @@
+import logging
+import os
+import shutil
+import threading
+from collections import deque
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+from arbiterx import CodeExecutor
+from arbiterx.exceptions import EarlyExitError
+from arbiterx.types import TestResult
+from arbiterx.verdicts import Verdict
+
+from code_executor.pool import SandboxPool
+
+if TYPE_CHECKING:
+    from submission_consumer.hidden_test_pack import HiddenTestPack
+
+
+class ParallelCodeExecutor:
+    """
+    Runs the tests of one solution across several sandboxes at once.
+
+    Every sandbox is a separate `CodeExecutor` container working on the same
+    source directory. Tests are handed out in order to whichever sandbox is
+    free. Each test still runs in its own cgroup, so time and memory are
+    accounted per test exactly like `CodeExecutor.run` does, and results are
+    yielded in test order regardless of the order they finish in.
+
+    Sandboxes are taken from `pool` when one is given and it has an idle
+    container of the image; otherwise the executor starts its own.
+
+    The tests are read from the `input` and `output` directories of the
+    source directory, or from `tests` when a hidden test pack is given. The
+    files of a test from a pack are only written right before it runs and
+    removed right after, so tests that are skipped are never written.
+
+    Usage:
+        with ParallelCodeExecutor(PythonCodeExecutor, sandboxes=4, ...) as executor:
+            for result in executor.run():
+                ...
+    """
+
+    def __init__(
+        self,
+        executor_class: type[CodeExecutor],
+        sandboxes: int,
+        container_name: str,
+        pool: Optional[SandboxPool] = None,
+        tests: Optional["HiddenTestPack"] = None,
+        logger: Optional[logging.Logger] = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            executor_class: `CodeExecutor` subclass of the solution's language.
+            sandboxes: Maximum number of sandboxes to run tests in.
+            container_name: Prefix of the container names of the sandboxes.
+            pool: Pool of warm sandbox containers.
+            tests: Pack of the tests to run.
+            kwargs: Passed on to `executor_class`.
+        """
+        self.executor_class = executor_class
+        self.sandboxes = max(1, sandboxes)
+        self.container_name = container_name
+        self.pool = pool
+        self.tests = tests
+        self.logger = logger or logging.getLogger(__name__)
+        self.kwargs = kwargs
+
+        self.executors: list[CodeExecutor] = []
+        self._stack = ExitStack()
+
+    def __enter__(self) -> "ParallelCodeExecutor":
+        # never start more sandboxes than there are tests
+        if self.tests is not None:
+            tests = self.tests.test_count
+        else:
+            tests = len(os.listdir(os.path.join(self.kwargs["src"], "input")))
+        sandboxes = max(1, min(self.sandboxes, tests))
+        self.logger.info(f"Running {tests} tests in {sandboxes} sandboxes")
+        try:
+            for i in range(sandboxes):
+                self.executors.append(
+                    self._stack.enter_context(self._create_executor(i))
+                )
+        except Exception:
+            self._stack.close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stack.close()
+
+    def _create_executor(self, i: int) -> CodeExecutor:
+        if self.pool is not None:
+            name = self.pool.acquire(
+                self.kwargs["docker_image"], self.kwargs["constraints"]
+            )
+            if name is not None:
+                # the executor does not stop containers it has not started
+                self._stack.callback(self.pool.release, name)
+                return self.executor_class(
+                    container_name=name, lazy_container=True, **self.kwargs
+                )
+        return self.executor_class(
+            container_name=f"{self.container_name}-{i}", **self.kwargs
+        )
+
+    def run(
+        self,
+        early_exit: bool = True,
+        checker: Optional[str] = None,
+        timeout: Optional[int] = None,
+        should_run: Optional[Callable[[int], bool]] = None,
+    ) -> Iterator[TestResult]:
+        """
+        Run all the tests, yielding the results in test order.
+
+        Args:
+            early_exit: If True, no further tests are started once a test
+                        fails, and EarlyExitError is raised after the result of
+                        the first failing test has been yielded.
+            checker: Path to the checker executable (if any).
+            timeout: Fallback timeout of the run command of each test.
+            should_run: Called with the index of a test before starting it.
+                        Tests it returns False for are skipped and yield
+                        no result.
+        """
+        if self.tests is not None:
+            tests = self._initialize_pack_queue()
+        else:
+            tests = self.executors[0]._initialize_queue()
+        total = len(tests)
+        actual_output_dir = os.path.join(self.executors[0].src, "actual")
+        os.makedirs(actual_output_dir, exist_ok=True)
+
+        results: dict[int, TestResult | Exception | None] = {}
+        # index of the first failing test found so far; tests after it are
+        # not started when exiting early
+        first_failure = total + 1
+        done = threading.Condition()
+
+        def work(executor: CodeExecutor, queue: deque) -> None:
+            nonlocal first_failure
+            while True:
+                with done:
+                    if not queue or queue[0][0] > first_failure:
+                        return
+                    idx, input_on_host, output_on_host, input_on_container, \
+                        output_on_container = queue.popleft()
+                    if should_run is not None and not should_run(idx):
+                        results[idx] = None
+                        done.notify_all()
+                        continue
+                try:
+                    self._write_test(idx, input_on_host, output_on_host)
+                    result = executor._run(
+                        index=idx,
+                        input_file_on_host=input_on_host,
+                        expected_output_file_on_host=output_on_host,
+                        input_file_on_container=input_on_container,
+                        expected_output_file_on_container=output_on_container,
+                        actual_output_file=os.path.join(
+                            actual_output_dir, f"output{idx}.txt"
+                        ),
+                        timeout=timeout,
+                        checker=checker,
+                    )
+                except Exception as e:
+                    result = e
+                finally:
+                    self._remove_test(input_on_host, output_on_host)
+                with done:
+                    results[idx] = result
+                    failed = (
+                        isinstance(result, Exception)
+                        or result["verdict"] != Verdict.AC.name
+                    )
+                    if failed and early_exit:
+                        first_failure = min(first_failure, idx)
+                    done.notify_all()
+
+        workers = [
+            threading.Thread(
+                target=work,
+                args=(executor, tests),
+                name=f"{self.container_name}-{i}",
+                daemon=True,
+            )
+            for i, executor in enumerate(self.executors)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            for idx in range(1, total + 1):
+                with done:
+                    done.wait_for(lambda: idx in results)
+                    result = results.pop(idx)
+                if result is None:
+                    continue
+                if isinstance(result, Exception):
+                    raise result
+                yield result
+                self.logger.info(f"[Test {idx}] verdict: {result['verdict']}")
+                if result["verdict"] != Verdict.AC.name and early_exit:
+                    raise EarlyExitError(f"Test {idx} failed")
+        finally:
+            with done:
+                # stop handing out tests, e.g. when the caller stopped iterating
+                tests.clear()
+            for worker in workers:
+                worker.join()
+            shutil.rmtree(actual_output_dir, ignore_errors=True)
+
+    def _initialize_pack_queue(self) -> deque:
+        """
+        The queue `CodeExecutor._initialize_queue` would build if the tests
+        of the pack were in the source directory.
+        """
+        host = self.executors[0]._resolve_path("host")
+        container = self.executors[0]._resolve_path("container")
+        for sub_dir in ("input", "output"):
+            os.makedirs(os.path.join(host, sub_dir), exist_ok=True)
+        return deque(
+            (
+                i,
+                f"{host}/input/input{i}.txt",
+                f"{host}/output/output{i}.txt",
+                f"{container}/input/input{i}.txt",
+                f"{container}/output/output{i}.txt",
+            )
+            for i in range(1, self.tests.test_count + 1)
+        )
+
+    def _write_test(self, idx: int, input_on_host: str, output_on_host: str) -> None:
+        if self.tests is None:
+            return
+        self.tests.extract(f"input/input{idx}.txt", input_on_host)
+        self.tests.extract(f"output/output{idx}.txt", output_on_host)
+
+    def _remove_test(self, input_on_host: str, output_on_host: str) -> None:
+        if self.tests is None:
+            return
+        for path in (input_on_host, output_on_host):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
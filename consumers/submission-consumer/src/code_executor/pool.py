@@ -0,0 +1,190 @@
+import logging
+import subprocess
+import threading
+from collections import Counter, defaultdict, deque
+from typing import Optional
+from uuid import uuid4
+
+from arbiterx import Constraints
+
+
+class SandboxPool:
+    """
+    Pre-started sandbox containers, kept per docker image.
+
+    Starting a container is the slowest part of judging a short solution, so
+    the pool keeps `size` idle containers of every image it has been asked
+    for. A container is handed out to a single job only: once the job is done
+    it is removed and a fresh one is started in the background. Every job
+    therefore gets a pristine filesystem layer and no processes left over
+    from earlier code, while the start-up cost stays off the critical path.
+    Per test cgroups (and so their counters) are created by the executor
+    itself for every test.
+
+    Containers are started like `CodeExecutor` starts them with a docker
+    volume, so a pooled container can serve any job whose files are in that
+    volume and can be handed to an executor with `lazy_container=True`.
+    """
+
+    # seconds to wait for a health check
+    HEALTH_CHECK_TIMEOUT = 5
+
+    def __init__(
+        self,
+        size: int,
+        volume: str,
+        working_dir_in_container: str = "/app",
+        cgroup_mount_path: str = "/sys/fs/cgroup",
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.size = size
+        self.volume = volume
+        self.working_dir_in_container = working_dir_in_container
+        self.cgroup_mount_path = cgroup_mount_path
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self._idle: dict[str, deque[str]] = defaultdict(deque)
+        self._starting: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {
+                image: {
+                    "hits": self.hits[image],
+                    "misses": self.misses[image],
+                    "idle": len(self._idle[image]),
+                }
+                for image in set(self.hits) | set(self.misses) | set(self._idle)
+            }
+
+    def warm(self, docker_image: str) -> None:
+        """
+        Start containers in the background until the pool of `docker_image`
+        is full again.
+        """
+        with self._lock:
+            missing = (
+                self.size - len(self._idle[docker_image]) - self._starting[docker_image]
+            )
+            self._starting[docker_image] += max(0, missing)
+        for _ in range(missing):
+            threading.Thread(
+                target=self._start, args=(docker_image,), daemon=True
+            ).start()
+
+    def acquire(self, docker_image: str, constraints: Constraints) -> Optional[str]:
+        """
+        Take an idle, healthy container of `docker_image` out of the pool and
+        apply `constraints` to it.
+        Returns its name, or None if the pool had none to offer.
+        """
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle[docker_image]:
+                        self.misses[docker_image] += 1
+                        self.logger.info(
+                            f"Sandbox pool miss for {docker_image} "
+                            f"(hits: {self.hits[docker_image]}, "
+                            f"misses: {self.misses[docker_image]})"
+                        )
+                        return None
+                    name = self._idle[docker_image].popleft()
+                if self._is_healthy(name) and self._apply(name, constraints):
+                    with self._lock:
+                        self.hits[docker_image] += 1
+                        self.logger.info(
+                            f"Sandbox pool hit for {docker_image}: {name} "
+                            f"(hits: {self.hits[docker_image]}, "
+                            f"misses: {self.misses[docker_image]})"
+                        )
+                    return name
+                self.logger.warning(f"Discarding unhealthy sandbox {name}")
+                self.release(name)
+        finally:
+            self.warm(docker_image)
+
+    def release(self, name: str) -> None:
+        """
+        Remove a container that has been handed out. Never reused.
+        """
+        threading.Thread(target=self._remove, args=(name,), daemon=True).start()
+
+    def shutdown(self) -> None:
+        """
+        Remove all idle containers.
+        """
+        with self._lock:
+            names = [name for idle in self._idle.values() for name in idle]
+            self._idle.clear()
+        for name in names:
+            self._remove(name)
+        self.logger.info(f"Sandbox pool stats: {self.stats()}")
+
+    def _start(self, docker_image: str) -> None:
+        name = f"sandbox-{uuid4().hex}"
+        docker_command = [
+            "docker", "run",
+            "--rm",
+            "--interactive",
+            "--tty",
+            "--detach",
+            "--mount",
+            f"type=volume,source={self.volume},target={self.working_dir_in_container}",
+            "--mount",
+            f"type=bind,source={self.cgroup_mount_path},target={self.cgroup_mount_path}",
+            "--cgroupns", "host",
+            "--workdir", self.working_dir_in_container,
+            "--user", "0:0",
+            "--name", name,
+            docker_image,
+            "sleep", "infinity",
+        ]
+        try:
+            subprocess.run(docker_command, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Error starting sandbox for {docker_image}: {e.stderr}")
+            return
+        finally:
+            with self._lock:
+                self._starting[docker_image] -= 1
+        with self._lock:
+            self._idle[docker_image].append(name)
+        self.logger.debug(f"Sandbox {name} for {docker_image} is ready")
+
+    def _is_healthy(self, name: str) -> bool:
+        try:
+            proc = subprocess.run(
+                ["docker", "exec", name, "true"],
+                capture_output=True,
+                timeout=self.HEALTH_CHECK_TIMEOUT,
+            )
+        except subprocess.TimeoutExpired:
+            return False
+        return proc.returncode == 0
+
+    def _apply(self, name: str, constraints: Constraints) -> bool:
+        """
+        Limit the container like `CodeExecutor` limits the containers it starts.
+        """
+        memory = constraints["memory_limit"] + 100
+        memory_swap = memory + constraints["memory_swap_limit"]
+        proc = subprocess.run(
+            [
+                "docker", "update",
+                "--memory", f"{memory}m",
+                "--memory-swap", f"{memory_swap}m",
+                name,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            self.logger.error(f"Error limiting sandbox {name}: {proc.stderr}")
+        return proc.returncode == 0
+
+    def _remove(self, name: str) -> None:
+        subprocess.run(["docker", "rm", "--force", name], capture_output=True)
@@ -1,7 +1,9 @@
 import json
 import os
 
-from arbiterx import CodeExecutor, Constraints
+from arbiterx import Constraints
+
+from code_executor.base import CodeExecutor
 
 
 class PythonCodeExecutor(CodeExecutor):
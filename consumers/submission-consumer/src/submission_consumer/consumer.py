@@ -1,7 +1,57 @@
+import json
 import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, SimpleQueue
+from typing import Optional
 
 from base_consumer import BaseKafkaConsumer
+from code_executor.pool import SandboxPool
+from confluent_kafka import KafkaException, TopicPartition
 from submission_consumer.process import SubmissionProcessor
+from submission_consumer.workspace import Workspace
+
+
+class OffsetTracker:
+    """
+    Tracks in-flight messages per partition.
+
+    Submissions finish out of order, but a Kafka offset commit acknowledges
+    every message before it. So the committable offset of a partition is the
+    oldest offset still in flight, or the offset after the newest finished
+    message once nothing is in flight.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[tuple[str, int], set[int]] = defaultdict(set)
+        self._finished: dict[tuple[str, int], int] = {}
+        self._committed: dict[tuple[str, int], int] = {}
+
+    def __len__(self) -> int:
+        return sum(len(offsets) for offsets in self._in_flight.values())
+
+    def start(self, topic: str, partition: int, offset: int) -> None:
+        self._in_flight[(topic, partition)].add(offset)
+
+    def finish(self, topic: str, partition: int, offset: int) -> Optional[int]:
+        """
+        Mark a message as processed.
+        Returns the offset to commit for its partition, if it moved forward.
+        """
+        key = (topic, partition)
+        self._in_flight[key].discard(offset)
+        self._finished[key] = max(self._finished.get(key, -1), offset)
+
+        if self._in_flight[key]:
+            committable = min(self._in_flight[key])
+        else:
+            committable = self._finished[key] + 1
+
+        if committable <= self._committed.get(key, -1):
+            return None
+        self._committed[key] = committable
+        return committable
+
 
 class SubmissionConsumer(BaseKafkaConsumer):
     def __init__(self):
@@ -14,6 +64,41 @@ class SubmissionConsumer(BaseKafkaConsumer):
         log_level = os.environ.get("LOG_LEVEL", "INFO")
         self.set_logger_level(log_level)
 
+        # every sandbox is limited to one CPU, so by default judge as many
+        # submissions at once as there are cores for their sandboxes
+        sandboxes = int(os.environ.get("SANDBOXES_PER_SUBMISSION", "1"))
+        self.max_workers = int(
+            os.environ.get(
+                "MAX_CONCURRENT_SUBMISSIONS",
+                max(1, (os.cpu_count() or 1) // max(1, sandboxes)),
+            )
+        )
+        self.offsets = OffsetTracker()
+        self.finished: SimpleQueue[tuple[str, int, int]] = SimpleQueue()
+        self.paused = False
+
+        # warm sandbox containers, enough for every sandbox of every
+        # submission judged at once by default; 0 disables the pool
+        pool_size = int(
+            os.environ.get("SANDBOX_POOL_SIZE", self.max_workers * max(1, sandboxes))
+        )
+        self.sandbox_pool = None
+        if pool_size > 0 and os.environ.get("DOCKER_VOLUME"):
+            self.sandbox_pool = SandboxPool(
+                size=pool_size,
+                volume=os.environ.get("DOCKER_VOLUME"),
+                logger=self.logger,
+            )
+            with open(os.environ.get("LANGUAGE_IMAGE_MAP_PATH"), "r") as f:
+                for docker_image in set(json.load(f).values()):
+                    self.sandbox_pool.warm(docker_image)
+
+        # remove workspaces left behind by a previous run that crashed
+        Workspace.sweep(
+            os.path.join(os.environ.get("DOWNLOAD_DIR", "/tmp"), "workspaces"),
+            self.logger,
+        )
+
     def process_message(self, message: dict):
         self.logger.info(f"Processing message: {message}")
         processor = SubmissionProcessor(
@@ -22,7 +107,88 @@ class SubmissionConsumer(BaseKafkaConsumer):
             client_id=message["client_id"],
             bucket_name=message["bucket_name"],
             # grpc_server=message["grpc_server"],
-            grpc_server="100.64.65.66:50051"
+            grpc_server="100.64.65.66:50051",
+            sandbox_pool=self.sandbox_pool,
         )
         processor.initiate()
         self.logger.info("Message processed successfully")
+
+    def _handle(self, topic: str, partition: int, offset: int, value: bytes):
+        """
+        Runs in a worker thread. Mirrors the error handling of
+        `BaseKafkaConsumer.consume`, then reports the message as finished.
+        """
+        try:
+            self.process_message(json.loads(value))
+        except json.JSONDecodeError:
+            self.logger.error("Failed to decode message")
+        except Exception as e:
+            self.logger.error(f"Error processing message: {e}")
+        finally:
+            self.finished.put((topic, partition, offset))
+
+    def _commit_finished(self):
+        """
+        Commit the offsets of submissions that finished since the last poll.
+        """
+        while True:
+            try:
+                topic, partition, offset = self.finished.get_nowait()
+            except Empty:
+                return
+            committable = self.offsets.finish(topic, partition, offset)
+            if committable is None:
+                continue
+            try:
+                self.consumer.commit(
+                    offsets=[TopicPartition(topic, partition, committable)],
+                    asynchronous=False,
+                )
+            except KafkaException as e:
+                # the partition may have been revoked by a rebalance meanwhile
+                self.logger.error(f"Failed to commit offset {committable}: {e}")
+
+    def _apply_backpressure(self):
+        """
+        Stop fetching while every worker is busy. The consumer keeps polling
+        while paused so that it is not considered dead by the group.
+        """
+        busy = len(self.offsets) >= self.max_workers
+        if busy and not self.paused:
+            self.consumer.pause(self.consumer.assignment())
+            self.paused = True
+        elif not busy and self.paused:
+            self.consumer.resume(self.consumer.assignment())
+            self.paused = False
+
+    def consume(self):
+        self.logger.info(f"Judging up to {self.max_workers} submissions at once")
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="submission"
+        )
+        try:
+            while True:
+                self._commit_finished()
+                self._apply_backpressure()
+                msg = self.consumer.poll(timeout=1.0)
+                if msg is None:
+                    continue
+                if msg.error():
+                    self.logger.error(f"Consumer error: {msg.error()}")
+                    continue
+                self.logger.debug(f"Received message: {msg.value()}")
+                self.offsets.start(msg.topic(), msg.partition(), msg.offset())
+                executor.submit(
+                    self._handle,
+                    msg.topic(),
+                    msg.partition(),
+                    msg.offset(),
+                    msg.value(),
+                )
+        except KeyboardInterrupt:
+            self.logger.info("Consumer interrupted. Exiting...")
+        finally:
+            executor.shutdown(wait=True)
+            self._commit_finished()
+            if self.sandbox_pool is not None:
+                self.sandbox_pool.shutdown()
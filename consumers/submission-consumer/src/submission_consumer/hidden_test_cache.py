@@ -0,0 +1,483 @@
+import fcntl
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import stat
+import threading
+import time
+import uuid
+import zipfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from botocore.exceptions import ClientError
+
+from submission_consumer.aws_client import AWSClient, download_file, download_files
+from submission_consumer.hidden_test_pack import (
+    CHUNK_SIZE,
+    BadPackError,
+    HiddenTestPack,
+    HiddenTestPackWriter,
+    pack_archive,
+)
+
+
+class HiddenTestCache:
+    """
+    Persistent on-disk cache for processed hidden test bundles.
+
+    Each entry is a single read-only hidden test pack (see hidden_test_pack.py),
+    shared by every submission of the problem.
+
+    Bundles with a manifest are keyed by the hash of the manifest, which names
+    the SHA-256 of every file, so a lookup needs no request at all. A new
+    version of the bundle is packed from the files of the cached version that
+    did not change, and only the others are downloaded.
+
+    Bundles without a manifest are keyed by the ETag of the S3 object, so a
+    re-processed bundle (new ETag) never serves stale tests. Every lookup is
+    validated with a conditional HEAD request; only a changed or missing bundle
+    is downloaded. The pack uploaded next to the bundle is downloaded as is;
+    bundles processed before packs existed are downloaded as zip and packed
+    here.
+
+    Expected directory structure:
+    {root}/
+    ├── .lock
+    └── {problem_id}/
+        └── {version}/           # manifest hash or ETag
+            ├── hidden-tests.pack
+            └── manifest.json    # only for bundles with a manifest
+
+    The total size of the cache is capped at `max_bytes`. When the cap is
+    exceeded, the least recently used entries are evicted. Outdated versions
+    of a bundle are removed once a newer one is cached.
+
+    An entry is never removed while a submission has its pack open (see
+    `open`), nor shortly after it was handed out by `get`, so a submission
+    never loses its tests mid-judge. Such entries are removed later.
+    """
+
+    # entries used more recently than this are never removed, so that a
+    # submission can still open the entry it has just been handed
+    EVICTION_GRACE_SECONDS = 60
+
+    _thread_lock = threading.Lock()
+
+    def __init__(
+        self,
+        root: str,
+        bucket_name: str,
+        max_bytes: int,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.root = root
+        self.bucket_name = bucket_name
+        self.max_bytes = max_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        os.makedirs(self.root, exist_ok=True)
+
+    PACK_NAME = "hidden-tests.pack"
+    MANIFEST_NAME = "manifest.json"
+
+    @staticmethod
+    def object_key(problem_id: str) -> str:
+        return f"processed/{problem_id}/hidden-tests.zip"
+
+    @staticmethod
+    def pack_key(key: str) -> str:
+        return f"{os.path.splitext(key)[0]}.pack"
+
+    @staticmethod
+    def open(path: str) -> HiddenTestPack:
+        """
+        Open the pack of an entry returned by `get`. The entry is kept in the
+        cache until the pack is closed.
+        """
+        return CachedHiddenTestPack(os.path.join(path, HiddenTestCache.PACK_NAME))
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Serialize cache mutations across threads and processes
+        sharing the same cache directory.
+        """
+        with self._thread_lock:
+            with open(os.path.join(self.root, ".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _problem_dir(self, problem_id: str) -> str:
+        return os.path.join(self.root, problem_id)
+
+    def _cached_version(self, problem_id: str) -> Optional[str]:
+        problem_dir = self._problem_dir(problem_id)
+        if not os.path.isdir(problem_dir):
+            return None
+        entries = [
+            entry
+            for entry in os.listdir(problem_dir)
+            if os.path.isdir(os.path.join(problem_dir, entry))
+        ]
+        if not entries:
+            return None
+        # keep the most recently used entry if there are several versions
+        return max(
+            entries,
+            key=lambda entry: os.stat(os.path.join(problem_dir, entry)).st_mtime,
+        )
+
+    def _remote_etag(
+        self, key: str, cached_etag: Optional[str]
+    ) -> Optional[str]:
+        """
+        Conditional HEAD on the bundle.
+        Returns None if the cached ETag is still valid, otherwise the current ETag.
+        """
+        aws_client = AWSClient("s3").get_client()
+        kwargs = {"Bucket": self.bucket_name, "Key": key}
+        if cached_etag:
+            kwargs["IfNoneMatch"] = f'"{cached_etag}"'
+        try:
+            response = aws_client.head_object(**kwargs)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "304":
+                return None
+            raise e
+        return response["ETag"].strip('"')
+
+    @staticmethod
+    def manifest_version(manifest: dict) -> str:
+        encoded = json.dumps(manifest, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def get(
+        self,
+        problem_id: str,
+        key: Optional[str] = None,
+        manifest: Optional[dict] = None,
+    ) -> str:
+        """
+        Return the path of the cached hidden tests of a problem,
+        downloading them only if the cached copy is missing or outdated.
+        `key` is the S3 key of the bundle, `object_key(problem_id)` by default,
+        or the prefix of the files of its `manifest`.
+        """
+        problem_id = str(problem_id)
+        if manifest:
+            return self._get_manifest(problem_id, key, manifest)
+        key = key or self.object_key(problem_id)
+        cached_etag = self._cached_version(problem_id)
+        try:
+            etag = self._remote_etag(self.pack_key(key), cached_etag)
+            key = self.pack_key(key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey"):
+                raise e
+            # bundle processed before packs were uploaded
+            etag = self._remote_etag(key, cached_etag)
+
+        if etag is None:
+            path = os.path.join(self._problem_dir(problem_id), cached_etag)
+            self.logger.info(f"Hidden test cache hit for problem {problem_id}: {path}")
+            self._touch(path)
+            return path
+
+        self.logger.info(
+            f"Hidden test cache miss for problem {problem_id} "
+            f"(cached: {cached_etag}, remote: {etag})"
+        )
+        path = self._fill(
+            problem_id,
+            etag,
+            lambda tmp_dir, entry_dir: self._download(tmp_dir, entry_dir, key),
+        )
+        self._evict(keep=path)
+        return path
+
+    def _get_manifest(self, problem_id: str, prefix: str, manifest: dict) -> str:
+        version = self.manifest_version(manifest)
+        path = os.path.join(self._problem_dir(problem_id), version)
+        if os.path.isdir(path):
+            self.logger.info(f"Hidden test cache hit for problem {problem_id}: {path}")
+            self._touch(path)
+            return path
+
+        cached = self._cached_version(problem_id)
+        self.logger.info(
+            f"Hidden test cache miss for problem {problem_id} "
+            f"(cached: {cached}, manifest: {version})"
+        )
+        previous = None
+        if cached is not None:
+            previous = os.path.join(self._problem_dir(problem_id), cached)
+        path = self._fill(
+            problem_id,
+            version,
+            lambda tmp_dir, entry_dir: self._pack_manifest(
+                tmp_dir, entry_dir, prefix, manifest, previous
+            ),
+        )
+        self._evict(keep=path)
+        return path
+
+    def _download(self, tmp_dir: str, entry_dir: str, key: str) -> None:
+        """
+        Download a pack, or a bundle to pack, into `entry_dir`.
+        """
+        pack_path = os.path.join(entry_dir, self.PACK_NAME)
+        if key.endswith(".pack"):
+            download_path = pack_path
+        else:
+            download_path = os.path.join(tmp_dir, "hidden-tests.zip")
+        # s3transfer does not accept IfMatch. If the object changed since the
+        # HEAD, the entry holds newer tests under the old ETag and is replaced
+        # on the next lookup, whose conditional HEAD no longer matches.
+        download_file(AWSClient("s3").get_client(), self.bucket_name, key, download_path)
+        if download_path != pack_path:
+            with zipfile.ZipFile(download_path) as hidden_test_bundle:
+                pack_archive(hidden_test_bundle, pack_path)
+
+    def _pack_manifest(
+        self,
+        tmp_dir: str,
+        entry_dir: str,
+        prefix: str,
+        manifest: dict,
+        previous: Optional[str],
+    ) -> None:
+        """
+        Pack the files of `manifest` into `entry_dir`. Files already in the
+        `previous` entry are copied from its pack; the others are downloaded.
+        """
+        members = {}
+        for i, test in enumerate(manifest["tests"], start=1):
+            members[f"input/input{i}.txt"] = test["input"]
+            members[f"output/output{i}.txt"] = test["output"]
+
+        previous_pack, reusable = self._open_previous(previous)
+        try:
+            missing = {
+                digest for digest in members.values() if digest not in reusable
+            }
+            self.logger.info(
+                f"Reusing {len(set(members.values()) - missing)} cached files, "
+                f"downloading {len(missing)}"
+            )
+            blob_dir = os.path.join(tmp_dir, "blobs")
+            os.makedirs(blob_dir)
+            download_files(
+                AWSClient("s3").get_client(),
+                self.bucket_name,
+                {
+                    f"{prefix}{digest}": os.path.join(blob_dir, digest)
+                    for digest in missing
+                },
+            )
+            for digest in missing:
+                self._verify(os.path.join(blob_dir, digest), digest)
+
+            subtasks = manifest.get("subtasks")
+            names = list(members)
+            if subtasks is not None:
+                names.append("subtasks.json")
+            with HiddenTestPackWriter(
+                os.path.join(entry_dir, self.PACK_NAME), names
+            ) as writer:
+                for name, digest in members.items():
+                    if digest in missing:
+                        with open(os.path.join(blob_dir, digest), "rb") as f:
+                            writer.add(name, f)
+                    else:
+                        writer.add(
+                            name, io.BytesIO(previous_pack.read(reusable[digest]))
+                        )
+                if subtasks is not None:
+                    writer.add(
+                        "subtasks.json", io.BytesIO(json.dumps(subtasks).encode())
+                    )
+        finally:
+            if previous_pack is not None:
+                previous_pack.close()
+
+        with open(os.path.join(entry_dir, self.MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f)
+
+    def _open_previous(
+        self, previous: Optional[str]
+    ) -> tuple[Optional[HiddenTestPack], dict[str, str]]:
+        """
+        Open the pack of a cached entry with a manifest.
+        Returns the pack and the member of it holding each digest.
+        """
+        if previous is None:
+            return None, {}
+        try:
+            with open(os.path.join(previous, self.MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+            pack = HiddenTestPack(os.path.join(previous, self.PACK_NAME))
+        except (OSError, ValueError, BadPackError):
+            # an entry without a manifest, or removed meanwhile
+            return None, {}
+        reusable = {}
+        for i, test in enumerate(manifest["tests"], start=1):
+            reusable.setdefault(test["input"], f"input/input{i}.txt")
+            reusable.setdefault(test["output"], f"output/output{i}.txt")
+        return pack, reusable
+
+    @staticmethod
+    def _verify(path: str, digest: str) -> None:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                sha256.update(chunk)
+        if sha256.hexdigest() != digest:
+            raise ValueError(f"Hidden test file {digest} is corrupt")
+
+    def _fill(
+        self,
+        problem_id: str,
+        version: str,
+        write_entry: Callable[[str, str], None],
+    ) -> str:
+        """
+        Add version `version` of the hidden tests of a problem to the cache.
+        `write_entry` is called with a temporary directory and the directory
+        to write the entry to, which is then renamed into place, so a
+        half-written entry is never visible to other submissions.
+        """
+        path = os.path.join(self._problem_dir(problem_id), version)
+        tmp_dir = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            entry_dir = os.path.join(tmp_dir, "entry")
+            os.makedirs(entry_dir)
+            write_entry(tmp_dir, entry_dir)
+            # fail before the entry is shared rather than in every submission
+            HiddenTestPack(os.path.join(entry_dir, self.PACK_NAME)).close()
+            self._make_read_only(entry_dir)
+
+            with self._locked():
+                if os.path.isdir(path):
+                    # another worker filled the same version meanwhile
+                    self.logger.info(f"Hidden test cache already filled: {path}")
+                else:
+                    os.makedirs(self._problem_dir(problem_id), exist_ok=True)
+                    os.rename(entry_dir, path)
+                # drop outdated versions of the bundle nobody is using
+                for entry in os.listdir(self._problem_dir(problem_id)):
+                    outdated = os.path.join(self._problem_dir(problem_id), entry)
+                    if entry != version and self._removable(outdated):
+                        self._remove(outdated)
+        finally:
+            self._remove(tmp_dir)
+        self._touch(path)
+        return path
+
+    def _evict(self, keep: str) -> None:
+        """
+        Evict the least recently used entries until the cache fits `max_bytes`.
+        """
+        with self._locked():
+            entries = []
+            for problem_id in os.listdir(self.root):
+                problem_dir = self._problem_dir(problem_id)
+                if problem_id.startswith(".") or not os.path.isdir(problem_dir):
+                    continue
+                for etag in os.listdir(problem_dir):
+                    path = os.path.join(problem_dir, etag)
+                    entries.append((os.stat(path).st_mtime, self._size(path), path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep or not self._removable(path):
+                    continue
+                self.logger.info(f"Evicting hidden test cache entry: {path}")
+                self._remove(path)
+                total -= size
+                parent = os.path.dirname(path)
+                if not os.listdir(parent):
+                    os.rmdir(parent)
+
+    def _removable(self, path: str) -> bool:
+        """
+        Whether the entry at `path` is neither recently handed out nor open.
+        Must be called with the cache locked.
+        """
+        if time.time() - os.stat(path).st_mtime < self.EVICTION_GRACE_SECONDS:
+            return False
+        try:
+            with open(os.path.join(path, self.PACK_NAME), "rb") as pack_file:
+                fcntl.flock(pack_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # a submission holds a shared lock on the pack
+            return False
+        except FileNotFoundError:
+            pass
+        return True
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        os.utime(path)
+
+    @staticmethod
+    def _size(path: str) -> int:
+        total = 0
+        for dir_path, _, files in os.walk(path):
+            for file in files:
+                total += os.lstat(os.path.join(dir_path, file)).st_size
+        return total
+
+    @staticmethod
+    def _make_read_only(path: str) -> None:
+        """
+        Make the contents of `path` read-only.
+        `path` itself stays writable so that it can still be renamed into place.
+        """
+        read_only_file = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+        read_only_dir = read_only_file | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+        for dir_path, _, files in os.walk(path, topdown=False):
+            for file in files:
+                os.chmod(os.path.join(dir_path, file), read_only_file)
+            if dir_path != path:
+                os.chmod(dir_path, read_only_dir)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        if not os.path.exists(path):
+            return
+        # directories must be writable before their entries can be removed
+        for dir_path, _, _ in os.walk(path):
+            os.chmod(dir_path, stat.S_IRWXU)
+        shutil.rmtree(path)
+
+
+class CachedHiddenTestPack(HiddenTestPack):
+    """
+    Pack of a cache entry. A shared lock on the pack file is held while the
+    pack is open, so that the cache does not remove the entry meanwhile.
+    """
+
+    def __init__(self, path: str):
+        self._lock_file = open(path, "rb")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_SH)
+            super().__init__(path)
+        except Exception:
+            self._lock_file.close()
+            raise
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            # releases the lock
+            self._lock_file.close()
@@ -0,0 +1,258 @@
+"""
+Hidden test pack: every file of a hidden test bundle in a single file, laid
+out so that a judge can memory-map it and read any test without unpacking.
+
+Layout (little-endian):
+
+    header   magic "CSTP" | version u8 | compression u8 | reserved u16
+             | member count u32
+    index    per member: name length u16 | name (utf-8) | offset u64
+             | stored length u64 | size u64
+    payloads the stored bytes of the members, one after another
+
+Members keep the names they have in the bundle (`input/input1.txt`,
+`output/output1.txt`, `subtasks.json`). With compression a member is a
+single zstd frame; without it the stored bytes are the file itself and can
+be used in place.
+"""
+
+import mmap
+import os
+import shutil
+import struct
+import zipfile
+from typing import BinaryIO, Iterable, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstd packs are optional
+    zstandard = None
+
+MAGIC = b"CSTP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHI")
+ENTRY = struct.Struct("<QQQ")
+NAME_LENGTH = struct.Struct("<H")
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+COMPRESSIONS = {"none": COMPRESSION_NONE, "zstd": COMPRESSION_ZSTD}
+
+# bytes copied at a time
+CHUNK_SIZE = 1024 * 1024
+
+
+class BadPackError(Exception):
+    pass
+
+
+def _require_zstd() -> None:
+    if zstandard is None:
+        raise BadPackError("zstd compression requires the zstandard package")
+
+
+class HiddenTestPackWriter:
+    """
+    Write a pack member by member. The names of all the members are needed
+    up front to reserve the index; it is filled in when the writer is closed.
+
+    Usage:
+        with HiddenTestPackWriter(path, names) as writer:
+            for name in names:
+                writer.add(name, stream)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        names: Iterable[str],
+        compression: str = "none",
+        level: int = 3,
+    ):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.compression = COMPRESSIONS[compression]
+        if self.compression == COMPRESSION_ZSTD:
+            _require_zstd()
+            self._compressor = zstandard.ZstdCompressor(level=level)
+
+        self.names = list(names)
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("Duplicate member names")
+        self.entries: dict[str, tuple[int, int, int]] = {}
+
+        self._file = open(path, "wb")
+        index_size = sum(
+            NAME_LENGTH.size + len(name.encode()) + ENTRY.size for name in self.names
+        )
+        self._file.seek(HEADER.size + index_size)
+
+    def __enter__(self) -> "HiddenTestPackWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def add(self, name: str, stream: BinaryIO) -> None:
+        """
+        Append the contents of `stream` as member `name`.
+        """
+        if name not in self.names or name in self.entries:
+            raise ValueError(f"Unexpected member: {name}")
+        offset = self._file.tell()
+        size = 0
+        if self.compression == COMPRESSION_ZSTD:
+            with self._compressor.stream_writer(self._file, closefd=False) as writer:
+                while chunk := stream.read(CHUNK_SIZE):
+                    writer.write(chunk)
+                    size += len(chunk)
+        else:
+            while chunk := stream.read(CHUNK_SIZE):
+                self._file.write(chunk)
+                size += len(chunk)
+        self.entries[name] = (offset, self._file.tell() - offset, size)
+
+    def close(self) -> None:
+        missing = [name for name in self.names if name not in self.entries]
+        if missing:
+            self._file.close()
+            raise ValueError(f"Members not added: {missing}")
+        self._file.seek(0)
+        self._file.write(
+            HEADER.pack(MAGIC, VERSION, self.compression, 0, len(self.names))
+        )
+        for name in self.names:
+            encoded = name.encode()
+            self._file.write(NAME_LENGTH.pack(len(encoded)))
+            self._file.write(encoded)
+            self._file.write(ENTRY.pack(*self.entries[name]))
+        self._file.close()
+
+
+def pack_archive(
+    archive: zipfile.ZipFile,
+    path: str,
+    members: Optional[Iterable[zipfile.ZipInfo]] = None,
+    compression: str = "none",
+) -> None:
+    """
+    Write `members` of a hidden test bundle (all its files by default) to a
+    pack at `path`.
+    """
+    if members is None:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+    members = list(members)
+    with HiddenTestPackWriter(
+        path, [info.filename for info in members], compression
+    ) as writer:
+        for info in members:
+            with archive.open(info) as stream:
+                writer.add(info.filename, stream)
+
+
+class HiddenTestPack:
+    """
+    Read-only view of a pack. The file is memory-mapped once; members are
+    read straight from the mapping, so opening a pack costs the same for one
+    test or thousands.
+
+    Usage:
+        with HiddenTestPack(path) as pack:
+            pack.extract("input/input1.txt", dest)
+
+    Raises:
+        BadPackError: If the file is not a pack or is truncated.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise BadPackError(f"{path} is not a hidden test pack")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.entries = self._read_index(size)
+        except (BadPackError, struct.error, UnicodeDecodeError) as e:
+            self._map.close()
+            raise BadPackError(f"{path} is not a valid hidden test pack: {e}")
+
+    def _read_index(self, size: int) -> dict[str, tuple[int, int, int]]:
+        magic, version, self.compression, _, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise BadPackError("bad magic or version")
+        if self.compression == COMPRESSION_ZSTD:
+            _require_zstd()
+        elif self.compression != COMPRESSION_NONE:
+            raise BadPackError(f"unknown compression {self.compression}")
+
+        entries = {}
+        position = HEADER.size
+        for _ in range(count):
+            (name_length,) = NAME_LENGTH.unpack_from(self._map, position)
+            position += NAME_LENGTH.size
+            name = self._map[position : position + name_length].decode()
+            position += name_length
+            offset, length, member_size = ENTRY.unpack_from(self._map, position)
+            position += ENTRY.size
+            if offset + length > size:
+                raise BadPackError(f"{name} is truncated")
+            entries[name] = (offset, length, member_size)
+        return entries
+
+    def __enter__(self) -> "HiddenTestPack":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    @property
+    def test_count(self) -> int:
+        return sum(
+            1
+            for name in self.entries
+            if name.startswith("input/input") and name.endswith(".txt")
+        )
+
+    def size(self, name: str) -> int:
+        return self.entries[name][2]
+
+    def view(self, name: str) -> memoryview:
+        """
+        The stored bytes of member `name`, without copying them. These are the
+        contents of the member unless the pack is compressed.
+
+        The view must be released before the pack is closed.
+        """
+        offset, length, _ = self.entries[name]
+        return memoryview(self._map)[offset : offset + length]
+
+    def read(self, name: str) -> bytes:
+        with self.view(name) as view:
+            if self.compression == COMPRESSION_ZSTD:
+                return zstandard.ZstdDecompressor().decompress(
+                    view, max_output_size=self.size(name)
+                )
+            return bytes(view)
+
+    def extract(self, name: str, dest: str) -> None:
+        """
+        Write member `name` to the file `dest`, straight from the mapping.
+        """
+        with self.view(name) as view, open(dest, "wb") as f:
+            if self.compression == COMPRESSION_ZSTD:
+                with zstandard.ZstdDecompressor().stream_reader(
+                    view, closefd=False
+                ) as reader:
+                    shutil.copyfileobj(reader, f, CHUNK_SIZE)
+            else:
+                f.write(view)
+
+    def close(self) -> None:
+        self._map.close()
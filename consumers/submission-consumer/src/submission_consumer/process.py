@@ -1,19 +1,23 @@
 import json
 import os
-import shutil
 import logging
-import zipfile
-from random import randint
-from time import sleep
+from time import perf_counter, sleep
+from uuid import uuid4
+from code_executor.parallel import ParallelCodeExecutor
+from code_executor.pool import SandboxPool
+from code_executor.checker import get_checker
 from code_executor.python312 import PythonCodeExecutor
-import requests
-from typing import Iterator, Generator, TypedDict
+from typing import Iterator, Generator, Optional, TypedDict
 from submission_consumer.logger import setup_logger
+from submission_consumer.internal_api_client import InternalAPIClient
 import grpc
 
 from arbiterx.exceptions import EarlyExitError
 
-from submission_consumer.aws_client import AWSClient
+from submission_consumer.hidden_test_cache import HiddenTestCache
+from submission_consumer.hidden_test_pack import HiddenTestPack
+from submission_consumer.verdict_policy import VerdictPolicy, get_verdict_policy
+from submission_consumer.workspace import Workspace
 from submission_consumer.submission_process_pb2 import (
     ProcessRequest,
     Status,
@@ -29,7 +33,8 @@ class SubmissionProcessor:
         client_id: str,
         bucket_name: str,
         grpc_server: str,
-        submission_id: int
+        submission_id: int,
+        sandbox_pool: Optional[SandboxPool] = None,
     ):
         log_level = os.environ.get("LOG_LEVEL", "INFO")
         self.logger = setup_logger("SubmissionProcessor", log_level, "consumer.log")
@@ -39,11 +44,35 @@ class SubmissionProcessor:
         self.bucket_name = bucket_name
         self.grpc_server = grpc_server
         self.submission_id = submission_id 
+        self.sandbox_pool = sandbox_pool
 
         self.download_dir = os.environ.get("DOWNLOAD_DIR", "/tmp")
-        # TODO: implement data persistence by leveraging env variable
-        self.backend_url = os.environ.get("BACKEND_URL", "http://localhost:8000")
-        self.api_key = os.environ.get("API_KEY", None)
+        # every submission is judged in its own workspace inside the download
+        # directory, which is also the sandbox volume
+        self.workspace_root = os.path.join(self.download_dir, "workspaces")
+        self.workspace = None
+        # number of sandboxes the hidden tests of a submission are spread over
+        self.sandboxes = int(os.environ.get("SANDBOXES_PER_SUBMISSION", "1"))
+        # stop-on-first-failure, run-all or subtask; see verdict_policy.py
+        self.verdict_policy_name = os.environ.get("VERDICT_POLICY")
+        # exact, trimmed, tokens, float[:epsilon] or special:<path>; see
+        # code_executor/checker.py. Outputs are compared trimmed by default.
+        self.checker_name = os.environ.get("CHECKER")
+        # optional pause (in seconds) between pipeline steps, e.g. to pace the
+        # progress shown to the client during demos; disabled by default
+        self.step_delay = float(os.environ.get("PIPELINE_STEP_DELAY", "0"))
+        self.step_timings: dict[str, float] = {}
+        self.hidden_test_cache = HiddenTestCache(
+            root=os.environ.get(
+                "HIDDEN_TEST_CACHE_DIR",
+                os.path.join(self.download_dir, ".hidden-test-cache"),
+            ),
+            bucket_name=self.bucket_name,
+            max_bytes=int(
+                os.environ.get("HIDDEN_TEST_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+            ),
+            logger=self.logger,
+        )
 
         if not self.problem_id:
             raise ValueError("Problem ID is required.")
@@ -54,97 +83,45 @@ class SubmissionProcessor:
         if not self.grpc_server:
             raise ValueError("gRPC server is required.")
         
-        self.problem = None
-        self.submission = None
+        self.hidden_tests_path = None
+        self.hidden_tests: Optional[HiddenTestPack] = None
+        self.judge_job = None
         self.constraints = None
         self.memory_usage = -1
         self.execution_time = -1
         self.verdict = None
+        self.verdict_policy: VerdictPolicy | None = None
 
-    def download_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
-        """
-        STEP 1: Download the hidden test data from the S3 bucket.
-        """
-
-        aws_client = AWSClient("s3").get_client()
-        self.logger.info(f"AWS Client: {aws_client}")
-
-        try:
-            self.logger.info(
-                f"Collecting hidden test data for problem ID: {self.problem_id}"
-            )
-            path = os.path.join(self.download_dir, self.problem_id, "hidden-tests.zip")
-            # clear from local if exists
-            if os.path.exists(path):
-                self.logger.info("Removing existing hidden-tests.zip")
-                os.remove(path)
-
-            self.logger.info(f"Downloading hidden test into {path}")
-            os.makedirs(os.path.join(self.download_dir, self.problem_id), exist_ok=True)
-            aws_client.download_file(
-                Bucket=self.bucket_name,
-                Key=f"processed/{self.problem_id}/hidden-tests.zip",
-                Filename=path,
-            )
-            yield ProcessRequest(
-                status=Status.SUCCESS,
-                message="✅ Hidden test data downloaded successfully",
-            )
-        except Exception as e:
-            raise e
-
-    def unzip_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
-        """
-        STEP 2: Unzip the downloaded hidden test data.
-        """
-
-        yield ProcessRequest(
-            status=Status.INFO, message="📦 Unzipping hidden test data..."
-        )
-
-        try:
-            path = os.path.join(self.download_dir, self.problem_id, "hidden-tests.zip")
-            with zipfile.ZipFile(
-                path
-            ) as hidden_test_bundle:
-                hidden_test_bundle.extractall(os.path.join(self.download_dir, self.problem_id))
-        except Exception as e:
-            yield ProcessRequest(
-                status=Status.ERROR, message="❌ Error unzipping hidden test data"
-            )
-            raise e
-
-    def pull_submission(self) -> Generator[ProcessRequest, None, None]:
+    def pull_judge_job(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 3: Pull the submission from Django API.
+        STEP 1: Pull the judge job of the submission from Django API.
+        The judge job holds the code, the language, the execution constraints
+        for that language and the hidden test bundle of the problem.
         """
         try:
             yield ProcessRequest(
                 status=Status.INFO, message="Pulling submission..."
             )
-            url = f"{self.backend_url}/api/internal/v1/submissions/{self.submission_id}/"
-            headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
-            response = requests.get(url, headers=headers)
+            path = f"/submissions/{self.submission_id}/judge-job/"
+            response = InternalAPIClient().get(path)
             if response.status_code == 200:
                 data = response.json()['data']
                 if not data:
                     raise ValueError("No submission found")
-                self.logger.info(f"Submission data: {data}")
-                self.submission = data
+                self.logger.info(f"Judge job: {data}")
+                self.judge_job = data
             else:
                 raise ValueError("Error pulling submission")
-            # response.code holds the code of the submission
-            # we need to save it into a file
-            path = os.path.join(
-            self.download_dir,
-            self.problem_id, "solution.py"
-            )
-            with open(path, "w") as f:
-                f.write(data["code"])
-            
-            with open(path, "r") as f:
-                self.logger.info(f"Submission code: {f.read()}")
+            if not self.judge_job["constraints"]:
+                raise ValueError("Constraints not found.")
+            if not self.judge_job["hidden_test_bundle"]:
+                raise ValueError("Hidden test bundle not found.")
+            self.constraints = self.judge_job["constraints"]
+            self.logger.info(f"Constraints: {self.constraints}")
 
+            path = os.path.join(self.workspace.path, "solution.py")
+            with open(path, "w") as f:
+                f.write(self.judge_job["code"])
             self.logger.info(f"Submission code saved to {path}")
             yield ProcessRequest(
                 status=Status.SUCCESS,
@@ -156,72 +133,57 @@ class SubmissionProcessor:
                 message="❌ Error pulling submission",
             )
             raise e
-        
-    def pull_problem(self) -> Generator[ProcessRequest, None, None]:
+
+    def download_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 4: Pull the problem from Django API.
+        STEP 2: Collect the hidden test data through the local cache.
+        Only the files missing from the cached copy are downloaded from the S3
+        bucket.
         """
-        yield ProcessRequest(
-            status=Status.INFO, message="📥 Pulling problem...."
-        )
         try:
-            url = f"{self.backend_url}/api/internal/v1/problems/{self.problem_id}/"
-            headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                data = response.json()['data']
-                if not data:
-                    raise ValueError("No problem found")
-                self.logger.info(f"Problem data: {data}")
-                self.problem = data
-                yield ProcessRequest(
-                    status=Status.SUCCESS,
-                    message="✅ Problem pulled successfully",
-                )
-        except Exception as e:
+            self.logger.info(
+                f"Collecting hidden test data for problem ID: {self.problem_id}"
+            )
+            bundle = self.judge_job["hidden_test_bundle"]
+            self.hidden_tests_path = self.hidden_test_cache.get(
+                self.problem_id,
+                key=bundle["s3_path"],
+                manifest=bundle.get("manifest"),
+            )
+            self.logger.info(f"Hidden test data available at {self.hidden_tests_path}")
             yield ProcessRequest(
-                status=Status.ERROR,
-                message="❌ Error pulling problem",
+                status=Status.SUCCESS,
+                message="✅ Hidden test data downloaded successfully",
             )
+        except Exception as e:
             raise e
-    
-    def collect_constraints(self) -> Generator[ProcessRequest, None, None]:
+
+    def open_hidden_test_data(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 5: Collect the constraints from the submission.
+        STEP 3: Memory-map the pack of the cached hidden test data.
+        The tests are written into the workspace one at a time while they run;
+        only subtasks.json is written up front.
         """
+
+        yield ProcessRequest(
+            status=Status.INFO, message="📦 Preparing hidden test data..."
+        )
+
         try:
-            yield ProcessRequest(
-                status=Status.INFO, message="Collecting constraints..."
-            )
-            # first, we need to get the language ID from the submission
-            language_id = self.submission["language_id"]
-            if not language_id:
-                raise ValueError("Language ID not found.")
-            self.logger.info(f"Language ID: {language_id}")
-            # then, we need to get the constraints from the problem
-            # by filtering the execution_constraints list
-            # by the language_id
-            self.constraints = next(filter(
-                lambda x: x["language_id"] == language_id,
-                self.problem["execution_constraints"],
-            ), None)
-            if not self.constraints:
-                raise ValueError("Constraints not found.")
-            self.logger.info(f"Constraints: {self.constraints}")
-            yield ProcessRequest(
-                status=Status.SUCCESS,
-                message="✅ Constraints collected successfully",
-            )
+            self.hidden_tests = HiddenTestCache.open(self.hidden_tests_path)
+            if "subtasks.json" in self.hidden_tests:
+                self.hidden_tests.extract(
+                    "subtasks.json", os.path.join(self.workspace.path, "subtasks.json")
+                )
         except Exception as e:
             yield ProcessRequest(
-                status=Status.ERROR,
-                message="❌ Error collecting constraints",
+                status=Status.ERROR, message="❌ Error preparing hidden test data"
             )
             raise e
 
     def run(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 6: Run the submission.
+        STEP 4: Run the submission.
         """
         try:
             yield ProcessRequest(
@@ -238,28 +200,43 @@ class SubmissionProcessor:
             with open(os.environ.get("LANGUAGE_IMAGE_MAP_PATH"), "r") as f:
                 language_image_map = json.load(f)
             self.logger.info(f"Language image map: {language_image_map}")
-            # Now find the language by self.submission["language_id"]
-            lang = next(filter(
-                lambda x: x["id"] == self.submission["language_id"],
-                self.problem["languages"]
-            ), None)
-            self.logger.info(f"Language: {lang}")
-            
-            normalized_language_key = f"{lang['name'].lower()}:{lang['version'].lower()}"
+            normalized_language_key = self.judge_job["language"]["key"]
+            self.logger.info(f"Language: {normalized_language_key}")
 
-            with PythonCodeExecutor(
+            # the tests are written from the pack only while they run
+            self.verdict_policy = get_verdict_policy(
+                self.verdict_policy_name,
+                self.workspace.path,
+                self.hidden_tests.test_count,
+            )
+            self.logger.info(f"Verdict policy: {self.verdict_policy.name}")
+
+            with ParallelCodeExecutor(
+                    PythonCodeExecutor,
+                    sandboxes=self.sandboxes,
+                    pool=self.sandbox_pool,
+                    tests=self.hidden_tests,
+                    container_name=f"submission-{self.submission_id}-{uuid4().hex}",
+                    logger=self.logger,
                     user="sandbox", # Default is "nobody"
                     docker_image=language_image_map[normalized_language_key],
                     volume=os.environ.get("DOCKER_VOLUME"),
-                    src_in_volume=self.problem_id,
-                    src=os.path.join(self.download_dir, self.problem_id),
+                    src_in_volume=os.path.relpath(
+                        self.workspace.path, self.download_dir
+                    ),
+                    src=self.workspace.path,
                     constraints=constraints,
+                    checker=get_checker(self.checker_name),
                     disable_compile=True,
                     log_file="arbiterx.log"
             ) as executor:
                 try:
-                    for result in executor.run():
-                        self.verdict = result["verdict"]
+                    for result in executor.run(
+                        early_exit=self.verdict_policy.early_exit,
+                        should_run=self.verdict_policy.should_run,
+                    ):
+                        self.verdict_policy.add(result)
+                        self.verdict = self.verdict_policy.verdict
                         # convert the memory usage from byte to MB
                         memory_usage_mb = int(result["stats"]["memory_peak"]) >> 20
                         self.memory_usage = max(self.memory_usage, memory_usage_mb)
@@ -267,20 +244,15 @@ class SubmissionProcessor:
                         execution_time_s = int(result["stats"]["cpu_stat"]["usage_usec"]) / 1_000_000
                         self.execution_time = max(self.execution_time, execution_time_s)
 
-                        # Limit the input, actual_output, and expected_output to 1000 characters
-                        for key in ["input", "actual_output", "expected_output"]:
-                            if key in result and isinstance(result[key], str) and len(result[key]) > 100:
-                                result[key] = result[key][:100] + "..."
-
                         yield ProcessRequest(
                             status=Status.VERDICT,
                             message=json.dumps(result)
                         )
                 except EarlyExitError as e:
-                    self.logger.error(
-                        f"Error running submission: {e}"
+                    # the verdict is already known, the remaining tests are skipped
+                    self.logger.info(
+                        f"Stopped running submission: {e}"
                     )
-                    raise e
         except Exception as e:
             yield ProcessRequest(
                 status=Status.ERROR,
@@ -290,7 +262,7 @@ class SubmissionProcessor:
 
     def update_verdict(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 8: Update the verdict in the Django API.
+        STEP 5: Update the verdict in the Django API.
         """
 
         def _convert_verdict(verdict: str) -> str:
@@ -300,7 +272,7 @@ class SubmissionProcessor:
                 return "ACCEPTED"
             elif verdict == "MLE":
                 return "MEMORY_LIMIT_EXCEEDED"
-            elif verdict == "TLE":
+            elif verdict in ("TLE", "ILE"):
                 return "TIME_LIMIT_EXCEEDED"
             elif verdict == "RE":
                 return "RUNTIME_ERROR"
@@ -311,14 +283,13 @@ class SubmissionProcessor:
             yield ProcessRequest(
                 status=Status.INFO, message="Updating verdict..."
             )
-            url = f"{self.backend_url}/api/internal/v1/submissions/{self.submission_id}/"
-            headers = {"X-API-KEY": self.api_key, "Content-Type": "application/json"}
+            path = f"/submissions/{self.submission_id}/"
             data = {
                 "verdict": _convert_verdict(self.verdict),
                 "memory_usage": self.memory_usage,
                 "execution_time": self.execution_time
             }
-            response = requests.patch(url, headers=headers, json=data)
+            response = InternalAPIClient().patch(path, json=data)
             if response.status_code == 200:
                 yield ProcessRequest(
                     status=Status.SUCCESS,
@@ -335,16 +306,13 @@ class SubmissionProcessor:
     
     def cleanup(self) -> Generator[ProcessRequest, None, None]:
         """
-        STEP 7: Cleanup the downloaded files.
+        STEP 6: Remove the workspace.
         """
         try:
             yield ProcessRequest(
                 status=Status.INFO, message="Cleaning up..."
             )
-            path = os.path.join(self.download_dir, self.problem_id)
-            if os.path.exists(path):
-                self.logger.info(f"Removing {path}")
-                shutil.rmtree(path)
+            self.workspace.cleanup()
             yield ProcessRequest(
                 status=Status.SUCCESS,
                 message="✅ Cleanup successful",
@@ -362,41 +330,62 @@ class SubmissionProcessor:
 
     def process(self) -> Iterator[ProcessRequest]:
         steps = [
+            self.pull_judge_job,
             self.download_hidden_test_data,
-            self.unzip_hidden_test_data,
-            self.pull_submission,
-            self.pull_problem,
-            self.collect_constraints,
+            self.open_hidden_test_data,
             self.run,
             self.update_verdict,
             self.cleanup,
         ]
-        yield ProcessRequest(
-            status=Status.INFO, message="⚙️ Started processing hidden test data"
+        self.workspace = Workspace(
+            self.workspace_root, f"submission-{self.submission_id}", self.logger
         )
+        try:
+            yield ProcessRequest(
+                status=Status.INFO, message="⚙️ Started processing hidden test data"
+            )
 
-        for idx, step in enumerate(steps, start=1):
-            try:
-                self.logger.info(f"Processing step {idx}/{len(steps)}")
-                yield from step()
-                sleep(randint(1, 3))
-            except Exception as e:
-                self.logger.error(f"Error processing step {idx}: {e}")
-                yield from self.update_verdict()
-                yield from self.cleanup()
-                # yield ProcessRequest(status=Status.ERROR, message="❌ Error processing")
+            for idx, step in enumerate(steps, start=1):
+                try:
+                    self.logger.info(f"Processing step {idx}/{len(steps)}")
+                    started_at = perf_counter()
+                    yield from step()
+                    self.step_timings[step.__name__] = perf_counter() - started_at
+                    self.logger.info(
+                        f"Step {idx}/{len(steps)} ({step.__name__}) took "
+                        f"{self.step_timings[step.__name__]:.3f}s"
+                    )
+                    if self.step_delay:
+                        sleep(self.step_delay)
+                except Exception as e:
+                    self.logger.error(f"Error processing step {idx}: {e}")
+                    yield from self.update_verdict()
+                    yield from self.cleanup()
+                    # yield ProcessRequest(status=Status.ERROR, message="❌ Error processing")
+                    yield ProcessRequest(status=Status.INFO, message="FINISHED_ERROR")
+                    return
+            yield ProcessRequest(
+                status=Status.FINAL_VERDICT,
+                message=json.dumps({
+                    "verdict": self.verdict,
+                    "memory_usage": self.memory_usage,
+                    "execution_time": self.execution_time,
+                    **(self.verdict_policy.details() if self.verdict_policy else {}),
+                })
+            )
+            self.logger.info(
+                f"Pipeline finished in {sum(self.step_timings.values()):.3f}s"
+            )
+            yield ProcessRequest(status=Status.SUCCESS, message="🎉 Finished")
+            if self.verdict == "AC":
+                yield ProcessRequest(status=Status.INFO, message="FINISHED_SUCCESS")
+            else:
                 yield ProcessRequest(status=Status.INFO, message="FINISHED_ERROR")
-                return
-        yield ProcessRequest(
-            status=Status.FINAL_VERDICT,
-            message=json.dumps({
-                "verdict": self.verdict,
-                "memory_usage": self.memory_usage,
-                "execution_time": self.execution_time,
-            })
-        )
-        yield ProcessRequest(status=Status.SUCCESS, message="🎉 Finished")
-        yield ProcessRequest(status=Status.INFO, message="FINISHED_SUCCESS")
+        finally:
+            # also covers a crash in a step or the client going away mid-stream
+            self.workspace.cleanup()
+            if self.hidden_tests is not None:
+                self.hidden_tests.close()
 
     def initiate(self):
         with grpc.insecure_channel(self.grpc_server) as channel:
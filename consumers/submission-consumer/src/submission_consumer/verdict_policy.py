@@ -0,0 +1,147 @@
+import json
+import os
+from typing import Optional
+
+from arbiterx.types import TestResult
+from arbiterx.verdicts import Verdict
+
+
+class VerdictPolicy:
+    """
+    Decides which tests of a submission are run and what its final verdict is.
+
+    The final verdict is the verdict of the first failing test in test order,
+    or AC if every test that was run passed.
+    """
+
+    name = ""
+    # stop running tests as soon as one of them fails
+    early_exit = False
+
+    def __init__(self):
+        self.results: dict[int, str] = {}
+
+    def add(self, result: TestResult) -> None:
+        self.results[result["test_case"]] = result["verdict"]
+
+    def should_run(self, test_case: int) -> bool:
+        return True
+
+    @property
+    def verdict(self) -> Optional[str]:
+        if not self.results:
+            return None
+        for test_case in sorted(self.results):
+            if self.results[test_case] != Verdict.AC.name:
+                return self.results[test_case]
+        return Verdict.AC.name
+
+    def details(self) -> dict:
+        """
+        Extra information to report along with the final verdict.
+        """
+        return {}
+
+
+class StopOnFirstFailurePolicy(VerdictPolicy):
+    """
+    Pass/fail judging. No test is run after the first failing one.
+    """
+
+    name = "stop-on-first-failure"
+    early_exit = True
+
+
+class RunAllPolicy(VerdictPolicy):
+    """
+    Every test is run, e.g. to show the full test report.
+    """
+
+    name = "run-all"
+
+
+class SubtaskPolicy(VerdictPolicy):
+    """
+    Tests are grouped into subtasks worth a number of points each. A subtask
+    scores its points only if all of its tests pass, so the remaining tests of
+    a subtask are skipped once one of them fails.
+
+    Subtasks are defined by a `subtasks.json` file next to the `input` and
+    `output` directories of the hidden tests:
+    [
+        {"tests": [1, 2, 3], "points": 30},
+        {"tests": [4, 5], "points": 70}
+    ]
+    """
+
+    name = "subtask"
+
+    def __init__(self, subtasks: list[dict]):
+        super().__init__()
+        self.subtasks = subtasks
+        self._subtask_of = {
+            test_case: i
+            for i, subtask in enumerate(subtasks)
+            for test_case in subtask["tests"]
+        }
+
+    def _failed(self, subtask: dict) -> bool:
+        return any(
+            self.results.get(test_case, Verdict.AC.name) != Verdict.AC.name
+            for test_case in subtask["tests"]
+        )
+
+    def should_run(self, test_case: int) -> bool:
+        if test_case not in self._subtask_of:
+            return True
+        return not self._failed(self.subtasks[self._subtask_of[test_case]])
+
+    def details(self) -> dict:
+        passed = [not self._failed(subtask) for subtask in self.subtasks]
+        return {
+            "score": sum(
+                subtask["points"]
+                for subtask, ok in zip(self.subtasks, passed)
+                if ok
+            ),
+            "subtasks": [
+                {"points": subtask["points"], "passed": ok}
+                for subtask, ok in zip(self.subtasks, passed)
+            ],
+        }
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (StopOnFirstFailurePolicy, RunAllPolicy, SubtaskPolicy)
+}
+
+
+def get_verdict_policy(
+    name: Optional[str], tests_path: str, test_count: int
+) -> VerdictPolicy:
+    """
+    Build the verdict policy for the `test_count` hidden tests at `tests_path`.
+    Only `subtasks.json` is read from there; the tests themselves may not have
+    been written yet.
+
+    Without an explicit `name`, tests that define subtasks are scored per
+    subtask and all other tests are judged pass/fail.
+    """
+    subtasks_path = os.path.join(tests_path, "subtasks.json")
+    subtasks = None
+    if os.path.exists(subtasks_path):
+        with open(subtasks_path, "r") as f:
+            subtasks = json.load(f)
+
+    if not name:
+        name = SubtaskPolicy.name if subtasks else StopOnFirstFailurePolicy.name
+    if name not in POLICIES:
+        raise ValueError(f"Unknown verdict policy: {name}")
+
+    if name == SubtaskPolicy.name:
+        if not subtasks:
+            # a single subtask with all the tests
+            subtasks = [{"tests": list(range(1, test_count + 1)), "points": 100}]
+        return SubtaskPolicy(subtasks)
+    return POLICIES[name]()
@@ -0,0 +1,123 @@
+import io
+import os
+import zipfile
+from unittest.mock import MagicMock
+
+import pytest
+
+from submission_consumer.aws_client import (
+    TRANSFER_CONFIG,
+    S3RangeReader,
+    download_file,
+    upload_file,
+    upload_fileobj,
+)
+
+
+def make_archive(tests=50, size=10_000):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i in range(1, tests + 1):
+            archive.writestr(f"input/input{i}.txt", os.urandom(size))
+    return buffer.getvalue()
+
+
+def s3_client(data):
+    client = MagicMock()
+    client.head_object.return_value = {"ContentLength": len(data), "ETag": '"e"'}
+
+    def get_object(Range, **kwargs):
+        start, end = map(int, Range[len("bytes="):].split("-"))
+        return {"Body": io.BytesIO(data[start : end + 1])}
+
+    client.get_object.side_effect = get_object
+    return client
+
+
+def test_range_reader_reads_members():
+    data = make_archive()
+    client = s3_client(data)
+
+    with S3RangeReader(client, "bucket", "key", block_size=4096) as reader:
+        archive = zipfile.ZipFile(reader)
+        assert len(archive.infolist()) == 50
+        with zipfile.ZipFile(io.BytesIO(data)) as expected:
+            assert archive.read("input/input7.txt") == expected.read(
+                "input/input7.txt"
+            )
+        metrics = reader.metrics()
+
+    # the central directory and one member, not the whole archive
+    assert metrics.bytes < len(data) / 4
+    assert metrics.requests == client.get_object.call_count + 1
+    for call in client.get_object.call_args_list:
+        assert call.kwargs["IfMatch"] == '"e"'
+
+
+def test_range_reader_seek():
+    data = bytes(range(256)) * 4
+    client = s3_client(data)
+    reader = S3RangeReader(client, "bucket", "key", block_size=64)
+
+    reader.seek(-10, io.SEEK_END)
+    assert reader.read() == data[-10:]
+    assert reader.read() == b""
+    reader.seek(100)
+    assert reader.read(5) == data[100:105]
+    assert reader.read(5) == data[105:110]
+    # served from the cached block
+    assert client.get_object.call_count == 2
+    with pytest.raises(ValueError):
+        reader.seek(-1)
+
+
+def test_range_reader_passes_etag():
+    client = s3_client(b"data")
+    S3RangeReader(client, "bucket", "key", etag="abc")
+    client.head_object.assert_called_once_with(
+        Bucket="bucket", Key="key", IfMatch='"abc"'
+    )
+
+
+def test_download_file(tmp_path):
+    filename = str(tmp_path / "file")
+    client = MagicMock()
+    client.download_file.side_effect = lambda **kwargs: open(
+        kwargs["Filename"], "wb"
+    ).write(b"x" * 100)
+
+    metrics = download_file(client, "bucket", "key", filename, {"VersionId": "v1"})
+
+    client.download_file.assert_called_once_with(
+        Bucket="bucket",
+        Key="key",
+        Filename=filename,
+        ExtraArgs={"VersionId": "v1"},
+        Config=TRANSFER_CONFIG,
+    )
+    assert metrics.bytes == 100
+    assert metrics.requests == 1
+
+
+def test_upload_file(tmp_path):
+    filename = tmp_path / "file"
+    filename.write_bytes(b"x" * 100)
+    client = MagicMock()
+
+    metrics = upload_file(client, str(filename), "bucket", "key")
+
+    client.upload_file.assert_called_once_with(
+        Filename=str(filename), Bucket="bucket", Key="key", Config=TRANSFER_CONFIG
+    )
+    assert metrics.bytes == 100
+
+
+def test_upload_fileobj_is_not_seeked():
+    client = MagicMock()
+    client.upload_fileobj.side_effect = lambda Fileobj, **kwargs: Fileobj.read()
+
+    metrics = upload_fileobj(client, io.BytesIO(b"x" * 100), "bucket", "key", 100)
+
+    fileobj = client.upload_fileobj.call_args.kwargs["Fileobj"]
+    assert not fileobj.seekable()
+    assert metrics.bytes == 100
@@ -0,0 +1,156 @@
+import stat
+
+import pytest
+
+from code_executor import checker as checker_module
+from code_executor.base import PREVIEW_SIZE, preview
+from code_executor.checker import (
+    CheckerError,
+    ExactChecker,
+    FloatChecker,
+    SpecialJudge,
+    TokenChecker,
+    TrimmedChecker,
+    get_checker,
+)
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # split tokens and whitespace runs across chunk boundaries
+    monkeypatch.setattr(checker_module, "CHUNK_SIZE", 3)
+
+
+@pytest.fixture
+def check(tmp_path):
+    def check(checker, expected, actual):
+        (tmp_path / "input.txt").write_bytes(b"")
+        (tmp_path / "expected.txt").write_bytes(expected)
+        (tmp_path / "actual.txt").write_bytes(actual)
+        return checker.check(
+            str(tmp_path / "input.txt"),
+            str(tmp_path / "expected.txt"),
+            str(tmp_path / "actual.txt"),
+        )
+
+    return check
+
+
+@pytest.mark.parametrize(
+    "expected, actual, same",
+    [
+        (b"1 2 3\n", b"1 2 3\n", True),
+        (b"1 2 3\n", b"1 2 3", False),
+        (b"1 2 3\n", b"1 2 4\n", False),
+        (b"", b"", True),
+        (b"abcdef", b"abcdefg", False),
+    ],
+)
+def test_exact(check, expected, actual, same):
+    assert check(ExactChecker(), expected, actual) is same
+
+
+@pytest.mark.parametrize(
+    "expected, actual, same",
+    [
+        (b"1 2 3\n", b"  \n1 2 3", True),
+        (b"1 2 3\n\n\n\n", b"1 2 3 \t \n", True),
+        (b"1 2 3\n", b"1  2 3\n", False),
+        (b"1\n2\n", b"1\n2\n3", False),
+        (b"\n\n", b"", True),
+        # tests written on Windows
+        (b"1 2\r\n3 4\r\n", b"1 2\n3 4\n", True),
+        (b"1\r\r\n2", b"1\n\n2", True),
+        (b"1\r2", b"1\n2", True),
+        (b"1\r\n2", b"1\n\n2", False),
+    ],
+)
+def test_trimmed(check, expected, actual, same):
+    assert check(TrimmedChecker(), expected, actual) is same
+
+
+@pytest.mark.parametrize(
+    "expected, actual, same",
+    [
+        (b"hello world\n42\n", b"hello\n\n  world 42", True),
+        (b"hello world", b"helloworld", False),
+        (b"123456 7", b"123456 7 8", False),
+        (b"123456 7 8", b"123456 7", False),
+    ],
+)
+def test_tokens(check, expected, actual, same):
+    assert check(TokenChecker(), expected, actual) is same
+
+
+@pytest.mark.parametrize(
+    "expected, actual, same",
+    [
+        (b"0.333333333 yes", b"0.3333334\nyes", True),
+        (b"1000000.0", b"1000000.5", True),
+        (b"0.5", b"0.51", False),
+        (b"0.5 yes", b"0.5 no", False),
+        (b"0.5", b"half", False),
+    ],
+)
+def test_float(check, expected, actual, same):
+    assert check(FloatChecker(), expected, actual) is same
+
+
+def test_stops_at_first_mismatch(tmp_path, monkeypatch):
+    reads = []
+    chunks = checker_module._chunks
+
+    def counting_chunks(f):
+        for chunk in chunks(f):
+            reads.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(checker_module, "_chunks", counting_chunks)
+    (tmp_path / "expected.txt").write_bytes(b"x" + b"1" * 3000)
+    (tmp_path / "actual.txt").write_bytes(b"y" + b"1" * 3000)
+
+    assert not ExactChecker().check(
+        "", str(tmp_path / "expected.txt"), str(tmp_path / "actual.txt")
+    )
+    assert len(reads) == 2
+
+
+def test_special_judge(check, tmp_path):
+    judge = tmp_path / "judge.sh"
+    # accepts when the actual output (the second argument) is "ok"
+    judge.write_text('#!/bin/sh\n[ "$(cat "$2")" = ok ] && exit 0\nexit 1\n')
+    judge.chmod(judge.stat().st_mode | stat.S_IEXEC)
+
+    assert check(SpecialJudge(str(judge)), b"anything", b"ok")
+    assert not check(SpecialJudge(str(judge)), b"anything", b"not ok")
+
+
+def test_special_judge_failure(check, tmp_path):
+    judge = tmp_path / "judge.sh"
+    judge.write_text("#!/bin/sh\nexit 3\n")
+    judge.chmod(judge.stat().st_mode | stat.S_IEXEC)
+
+    with pytest.raises(CheckerError):
+        check(SpecialJudge(str(judge)), b"", b"")
+    with pytest.raises(CheckerError):
+        check(SpecialJudge(str(tmp_path / "missing")), b"", b"")
+
+
+def test_get_checker():
+    assert isinstance(get_checker(None), TrimmedChecker)
+    assert isinstance(get_checker("tokens"), TokenChecker)
+    assert get_checker("float").epsilon == 1e-6
+    assert get_checker("float:1e-9").epsilon == 1e-9
+    assert get_checker("special:/judges/checker").path == "/judges/checker"
+    for spec in ("unknown", "special", "exact:1"):
+        with pytest.raises(ValueError):
+            get_checker(spec)
+
+
+def test_preview(tmp_path):
+    path = tmp_path / "output.txt"
+    path.write_text("a" * 10)
+    assert preview(str(path)) == "a" * 10
+
+    path.write_text("a" * (PREVIEW_SIZE * 100))
+    assert preview(str(path)) == "a" * PREVIEW_SIZE + "..."
@@ -0,0 +1,33 @@
+from submission_consumer.consumer import OffsetTracker
+
+
+def test_offset_tracker_commits_in_order():
+    tracker = OffsetTracker()
+    for offset in (10, 11, 12):
+        tracker.start("python_submission", 0, offset)
+
+    assert len(tracker) == 3
+    # 11 finished first, but 10 is still being judged
+    assert tracker.finish("python_submission", 0, 11) == 10
+    assert tracker.finish("python_submission", 0, 10) == 12
+    assert tracker.finish("python_submission", 0, 12) == 13
+    assert len(tracker) == 0
+
+
+def test_offset_tracker_does_not_move_backwards():
+    tracker = OffsetTracker()
+    tracker.start("python_submission", 0, 5)
+    tracker.start("python_submission", 0, 6)
+
+    assert tracker.finish("python_submission", 0, 6) == 5
+    tracker.start("python_submission", 0, 7)
+    assert tracker.finish("python_submission", 0, 7) is None
+
+
+def test_offset_tracker_is_per_partition():
+    tracker = OffsetTracker()
+    tracker.start("python_submission", 0, 1)
+    tracker.start("python_submission", 1, 1)
+
+    assert tracker.finish("python_submission", 1, 1) == 2
+    assert tracker.finish("python_submission", 0, 1) == 2
@@ -0,0 +1,282 @@
+import hashlib
+import io
+import os
+import stat
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from submission_consumer.hidden_test_cache import HiddenTestCache
+from submission_consumer.hidden_test_pack import pack_archive
+
+
+def write_bundle(filename, tests=2, payload="1"):
+    with zipfile.ZipFile(filename, "w") as bundle:
+        for i in range(1, tests + 1):
+            bundle.writestr(f"input/input{i}.txt", payload)
+            bundle.writestr(f"output/output{i}.txt", payload)
+
+
+def write_object(Filename, Key, **kwargs):
+    if Key.endswith(".pack"):
+        write_bundle(f"{Filename}.zip")
+        with zipfile.ZipFile(f"{Filename}.zip") as bundle:
+            pack_archive(bundle, Filename)
+        os.remove(f"{Filename}.zip")
+    else:
+        write_bundle(Filename)
+
+
+def not_modified(**kwargs):
+    raise ClientError({"Error": {"Code": "304"}}, "HeadObject")
+
+
+def no_pack(**kwargs):
+    if kwargs["Key"].endswith(".pack"):
+        raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+    return {"ETag": '"etag-zip"'}
+
+
+@pytest.fixture
+def s3_client():
+    client = MagicMock()
+    client.head_object.return_value = {"ETag": '"etag-1"'}
+    client.download_file.side_effect = write_object
+    with patch("submission_consumer.hidden_test_cache.AWSClient") as aws_client:
+        aws_client.return_value.get_client.return_value = client
+        yield client
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HiddenTestCache(
+        root=str(tmp_path / "cache"), bucket_name="bucket", max_bytes=1024 * 1024
+    )
+
+
+def test_get_downloads_pack_on_miss(cache, s3_client):
+    path = cache.get("3")
+
+    assert path == os.path.join(cache.root, "3", "etag-1")
+    with HiddenTestCache.open(path) as pack:
+        assert pack.test_count == 2
+        assert pack.read("input/input1.txt") == b"1"
+    s3_client.head_object.assert_called_once_with(
+        Bucket="bucket", Key="processed/3/hidden-tests.pack"
+    )
+    assert (
+        s3_client.download_file.call_args.kwargs["Key"]
+        == "processed/3/hidden-tests.pack"
+    )
+
+
+def test_get_packs_bundle_without_pack(cache, s3_client):
+    s3_client.head_object.side_effect = no_pack
+
+    path = cache.get("3")
+
+    assert path == os.path.join(cache.root, "3", "etag-zip")
+    assert os.listdir(path) == [HiddenTestCache.PACK_NAME]
+    with HiddenTestCache.open(path) as pack:
+        assert pack.read("output/output2.txt") == b"1"
+    assert (
+        s3_client.download_file.call_args.kwargs["Key"]
+        == "processed/3/hidden-tests.zip"
+    )
+
+
+def test_get_reuses_entry_when_etag_unchanged(cache, s3_client):
+    path = cache.get("3")
+    s3_client.head_object.side_effect = not_modified
+
+    assert cache.get("3") == path
+    s3_client.head_object.assert_called_with(
+        Bucket="bucket", Key="processed/3/hidden-tests.pack", IfNoneMatch='"etag-1"'
+    )
+    s3_client.download_file.assert_called_once()
+
+
+def test_get_replaces_outdated_entry(cache, s3_client):
+    cache.EVICTION_GRACE_SECONDS = 0
+    old_path = cache.get("3")
+    s3_client.head_object.return_value = {"ETag": '"etag-2"'}
+
+    new_path = cache.get("3")
+
+    assert new_path == os.path.join(cache.root, "3", "etag-2")
+    assert not os.path.exists(old_path)
+    assert s3_client.download_file.call_count == 2
+
+
+def test_get_keeps_outdated_entry_in_use(cache, s3_client):
+    cache.EVICTION_GRACE_SECONDS = 0
+    old_path = cache.get("3")
+    s3_client.head_object.return_value = {"ETag": '"etag-2"'}
+
+    with HiddenTestCache.open(old_path) as pack:
+        cache.get("3")
+        assert os.path.exists(old_path)
+        assert pack.read("input/input1.txt") == b"1"
+
+    # removed with the next version once it is closed
+    s3_client.head_object.return_value = {"ETag": '"etag-3"'}
+    cache.get("3")
+    assert not os.path.exists(old_path)
+
+
+def test_get_keeps_outdated_entry_just_handed_out(cache, s3_client):
+    old_path = cache.get("3")
+    s3_client.head_object.return_value = {"ETag": '"etag-2"'}
+
+    cache.get("3")
+
+    # a submission may not have opened it yet
+    assert os.path.exists(old_path)
+
+
+def test_entries_are_read_only(cache, s3_client):
+    path = cache.get("3")
+
+    mode = os.stat(os.path.join(path, HiddenTestCache.PACK_NAME)).st_mode
+    assert not mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+
+def test_evicts_least_recently_used_entry(tmp_path, s3_client):
+    cache = HiddenTestCache(root=str(tmp_path / "cache"), bucket_name="b", max_bytes=4)
+    cache.EVICTION_GRACE_SECONDS = 0
+    first = cache.get("1")
+    os.utime(first, (0, 0))
+
+    second = cache.get("2")
+
+    assert not os.path.exists(first)
+    assert os.path.exists(second)
+
+
+
+def digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def manifest(*tests, subtasks=None):
+    return {
+        "tests": [
+            {"input": digest(input), "output": digest(output)}
+            for input, output in tests
+        ],
+        "subtasks": subtasks,
+    }
+
+
+@pytest.fixture
+def blobs(s3_client):
+    """
+    Serves every file of a manifest bundle from processed/3/tests/<digest>.
+    """
+    contents = {}
+
+    def download_file(Filename, Key, **kwargs):
+        with open(Filename, "wb") as f:
+            f.write(contents[Key.rsplit("/", 1)[1]])
+
+    def add(*files):
+        contents.update({digest(content): content for content in files})
+
+    s3_client.download_file.side_effect = download_file
+    add.downloaded = lambda: [
+        call.kwargs["Key"].rsplit("/", 1)[1]
+        for call in s3_client.download_file.call_args_list
+    ]
+    return add
+
+
+def test_get_packs_manifest_files(cache, s3_client, blobs):
+    blobs(b"1", b"2", b"[]")
+    bundle = manifest((b"1", b"2"), (b"2", b"2"), subtasks=[])
+
+    path = cache.get("3", key="processed/3/tests/", manifest=bundle)
+
+    with HiddenTestCache.open(path) as pack:
+        assert pack.test_count == 2
+        assert pack.read("input/input2.txt") == b"2"
+        assert pack.read("subtasks.json") == b"[]"
+    # no HEAD request, and each file once
+    s3_client.head_object.assert_not_called()
+    assert sorted(blobs.downloaded()) == sorted([digest(b"1"), digest(b"2")])
+
+
+def test_get_reuses_manifest_entry(cache, s3_client, blobs):
+    blobs(b"1", b"2")
+    bundle = manifest((b"1", b"2"))
+    path = cache.get("3", key="processed/3/tests/", manifest=bundle)
+
+    assert cache.get("3", key="processed/3/tests/", manifest=bundle) == path
+    assert s3_client.download_file.call_count == 2
+
+
+def test_get_downloads_only_changed_files(cache, s3_client, blobs):
+    cache.EVICTION_GRACE_SECONDS = 0
+    blobs(b"1", b"2", b"3", b"6")
+    old = cache.get("3", key="processed/3/tests/", manifest=manifest((b"1", b"2")))
+    s3_client.download_file.reset_mock()
+
+    path = cache.get(
+        "3",
+        key="processed/3/tests/",
+        manifest=manifest((b"1", b"2"), (b"3", b"6")),
+    )
+
+    assert sorted(blobs.downloaded()) == sorted([digest(b"3"), digest(b"6")])
+    assert not os.path.exists(old)
+    with HiddenTestCache.open(path) as pack:
+        assert pack.read("input/input1.txt") == b"1"
+        assert pack.read("output/output2.txt") == b"6"
+
+
+def test_get_rejects_corrupt_file(cache, s3_client, blobs):
+    blobs(b"1")
+    s3_client.download_file.side_effect = lambda Filename, **kwargs: open(
+        Filename, "wb"
+    ).write(b"corrupt")
+
+    with pytest.raises(ValueError):
+        cache.get("3", key="processed/3/tests/", manifest=manifest((b"1", b"1")))
+    assert not os.path.exists(os.path.join(cache.root, "3"))
+
+
+def test_download_passes_s3transfer_validation(cache, tmp_path):
+    # a real client, so that s3transfer validates the download arguments
+    client = boto3.client(
+        "s3",
+        region_name="us-east-1",
+        aws_access_key_id="key",
+        aws_secret_access_key="secret",
+    )
+    write_object(str(tmp_path / "pack"), "hidden-tests.pack")
+    body = (tmp_path / "pack").read_bytes()
+    with Stubber(client) as stubber, patch(
+        "submission_consumer.hidden_test_cache.AWSClient"
+    ) as aws_client:
+        aws_client.return_value.get_client.return_value = client
+        stubber.add_response("head_object", {"ETag": '"etag-1"'})
+        stubber.add_response(
+            "head_object", {"ETag": '"etag-1"', "ContentLength": len(body)}
+        )
+        stubber.add_response(
+            "get_object",
+            {
+                "Body": StreamingBody(io.BytesIO(body), len(body)),
+                "ContentLength": len(body),
+                "ETag": '"etag-1"',
+            },
+        )
+
+        path = cache.get("3")
+
+    with HiddenTestCache.open(path) as pack:
+        assert pack.test_count == 2
@@ -0,0 +1,69 @@
+import io
+import zipfile
+
+import pytest
+
+from submission_consumer.hidden_test_pack import (
+    BadPackError,
+    HiddenTestPack,
+    HiddenTestPackWriter,
+    pack_archive,
+)
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    bundle = io.BytesIO()
+    with zipfile.ZipFile(bundle, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("input/", "")
+        for i in range(1, 4):
+            archive.writestr(f"input/input{i}.txt", f"{i} " * 1000)
+            archive.writestr(f"output/output{i}.txt", f"{i * 2}\n")
+        archive.writestr("subtasks.json", "[]")
+    path = str(tmp_path / "hidden-tests.pack")
+    with zipfile.ZipFile(bundle) as archive:
+        pack_archive(archive, path)
+    return path
+
+
+def test_pack_archive(pack_path, tmp_path):
+    with HiddenTestPack(pack_path) as pack:
+        assert pack.test_count == 3
+        assert "subtasks.json" in pack
+        assert "input/" not in pack
+        assert pack.read("output/output2.txt") == b"4\n"
+        assert pack.size("input/input1.txt") == 2000
+
+        pack.extract("input/input3.txt", str(tmp_path / "input3.txt"))
+        assert (tmp_path / "input3.txt").read_text() == "3 " * 1000
+
+
+def test_view_is_not_a_copy(pack_path):
+    with HiddenTestPack(pack_path) as pack:
+        with pack.view("output/output1.txt") as view:
+            assert view.readonly
+            assert view.obj is pack._map
+            assert bytes(view) == b"2\n"
+
+
+def test_writer_requires_all_members(tmp_path):
+    with pytest.raises(ValueError):
+        with HiddenTestPackWriter(str(tmp_path / "p"), ["a", "b"]) as writer:
+            writer.add("a", io.BytesIO(b"a"))
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "hidden-tests.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("input/input1.txt", "1")
+
+    with pytest.raises(BadPackError):
+        HiddenTestPack(str(path))
+
+
+def test_rejects_truncated_pack(pack_path):
+    with open(pack_path, "r+b") as f:
+        f.truncate(100)
+
+    with pytest.raises(BadPackError):
+        HiddenTestPack(pack_path)
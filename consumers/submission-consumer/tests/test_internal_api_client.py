@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from submission_consumer.internal_api_client import InternalAPIClient
+
+
+def response(status_code):
+    res = requests.Response()
+    res.status_code = status_code
+    return res
+
+
+@pytest.fixture
+def client():
+    InternalAPIClient._instance = None
+    client = InternalAPIClient()
+    client.session.request = MagicMock()
+    with patch("submission_consumer.internal_api_client.time.sleep") as sleep:
+        client.sleep = sleep
+        yield client
+    InternalAPIClient._instance = None
+
+
+def test_client_is_shared():
+    InternalAPIClient._instance = None
+    assert InternalAPIClient() is InternalAPIClient()
+    assert InternalAPIClient().session.headers["Content-Type"] == "application/json"
+    InternalAPIClient._instance = None
+
+
+def test_get_is_retried_on_connection_errors_and_gateway_errors(client):
+    client.session.request.side_effect = [
+        requests.ConnectionError("reset"),
+        response(503),
+        response(200),
+    ]
+
+    res = client.get("/submissions/1/judge-job/")
+
+    assert res.status_code == 200
+    assert client.session.request.call_count == 3
+    assert client.sleep.call_count == 2
+    method, url = client.session.request.call_args.args
+    assert method == "GET"
+    assert url.endswith("/api/internal/v1/submissions/1/judge-job/")
+    assert client.session.request.call_args.kwargs["timeout"]
+
+
+def test_retries_are_bounded(client):
+    client.session.request.side_effect = requests.Timeout("slow")
+
+    with pytest.raises(requests.Timeout):
+        client.patch("/submissions/1/", json={"verdict": "ACCEPTED"})
+
+    assert client.session.request.call_count == 4
+
+
+def test_post_is_not_retried(client):
+    client.session.request.return_value = response(503)
+
+    res = client.post("/problems/1/hidden-test-bundle/", json={})
+
+    assert res.status_code == 503
+    assert client.session.request.call_count == 1
+    assert not client.sleep.called
+
+
+def test_backoff_has_jitter_and_cap(client):
+    delays = [client._backoff(10) for _ in range(20)]
+
+    assert all(0 <= delay <= InternalAPIClient.BACKOFF_MAX for delay in delays)
+    assert len(set(delays)) > 1
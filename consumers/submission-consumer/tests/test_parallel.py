@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+
+import pytest
+from arbiterx.exceptions import EarlyExitError
+
+from code_executor.parallel import ParallelCodeExecutor
+from submission_consumer.hidden_test_pack import HiddenTestPack, pack_archive
+
+
+class FakeExecutor:
+    """
+    Stands in for a sandbox container. Test `i` takes `delays[i]` seconds and
+    gets `verdicts[i]` (AC by default).
+    """
+
+    delays: dict[int, float] = {}
+    verdicts: dict[int, str] = {}
+    started: list[int] = []
+    containers: list[str] = []
+    inputs: dict[int, str] = {}
+
+    def __init__(self, container_name, src):
+        self.container_name = container_name
+        self.src = src
+
+    def __enter__(self):
+        FakeExecutor.containers.append(self.container_name)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def _resolve_path(self, where):
+        return self.src
+
+    def _initialize_queue(self):
+        k = len(os.listdir(os.path.join(self.src, "input")))
+        return deque((i, "", "", "", "") for i in range(1, k + 1))
+
+    def _run(self, index, **kwargs):
+        FakeExecutor.started.append(index)
+        if os.path.exists(kwargs["input_file_on_host"]):
+            with open(kwargs["input_file_on_host"]) as f:
+                FakeExecutor.inputs[index] = f.read()
+        time.sleep(FakeExecutor.delays.get(index, 0))
+        return {
+            "test_case": index,
+            "verdict": FakeExecutor.verdicts.get(index, "AC"),
+            "thread": threading.current_thread().name,
+        }
+
+
+@pytest.fixture
+def src(tmp_path):
+    os.makedirs(tmp_path / "input")
+    for i in range(1, 7):
+        (tmp_path / "input" / f"input{i}.txt").write_text("")
+    FakeExecutor.delays = {}
+    FakeExecutor.verdicts = {}
+    FakeExecutor.started = []
+    FakeExecutor.containers = []
+    FakeExecutor.inputs = {}
+    return str(tmp_path)
+
+
+def test_results_are_yielded_in_test_order(src):
+    # later tests finish first
+    FakeExecutor.delays = {1: 0.05, 2: 0.03}
+    with ParallelCodeExecutor(
+        FakeExecutor, sandboxes=3, container_name="c", src=src
+    ) as executor:
+        results = list(executor.run())
+
+    assert [r["test_case"] for r in results] == [1, 2, 3, 4, 5, 6]
+    assert len({r["thread"] for r in results}) > 1
+    assert not os.path.exists(os.path.join(src, "actual"))
+
+
+def test_sandboxes_are_capped_by_number_of_tests(src):
+    with ParallelCodeExecutor(FakeExecutor, sandboxes=10, container_name="c", src=src):
+        pass
+
+    assert FakeExecutor.containers == [f"c-{i}" for i in range(6)]
+
+
+def test_early_exit_stops_at_first_failure_in_test_order(src):
+    FakeExecutor.verdicts = {2: "TLE", 3: "WA"}
+    FakeExecutor.delays = {2: 0.05}
+    results = []
+    with ParallelCodeExecutor(
+        FakeExecutor, sandboxes=2, container_name="c", src=src
+    ) as executor:
+        with pytest.raises(EarlyExitError):
+            for result in executor.run():
+                results.append(result)
+
+    assert [r["verdict"] for r in results] == ["AC", "TLE"]
+    # no test after the first failure is started
+    assert max(FakeExecutor.started) <= 3
+
+
+def test_skipped_tests_yield_no_result(src):
+    with ParallelCodeExecutor(
+        FakeExecutor, sandboxes=2, container_name="c", src=src
+    ) as executor:
+        results = list(executor.run(should_run=lambda idx: idx % 2 == 1))
+
+    assert [r["test_case"] for r in results] == [1, 3, 5]
+    assert sorted(FakeExecutor.started) == [1, 3, 5]
+
+
+def test_tests_are_written_from_pack_while_they_run(tmp_path):
+    with zipfile.ZipFile(tmp_path / "hidden-tests.zip", "w") as archive:
+        for i in range(1, 5):
+            archive.writestr(f"input/input{i}.txt", f"in{i}")
+            archive.writestr(f"output/output{i}.txt", f"out{i}")
+        pack_archive(archive, str(tmp_path / "hidden-tests.pack"))
+    src = tmp_path / "workspace"
+    src.mkdir()
+    FakeExecutor.started = []
+    FakeExecutor.inputs = {}
+
+    with HiddenTestPack(str(tmp_path / "hidden-tests.pack")) as tests:
+        with ParallelCodeExecutor(
+            FakeExecutor, sandboxes=2, container_name="c", src=str(src), tests=tests
+        ) as executor:
+            results = list(executor.run(should_run=lambda idx: idx != 3))
+
+    assert [r["test_case"] for r in results] == [1, 2, 4]
+    assert FakeExecutor.inputs == {1: "in1", 2: "in2", 4: "in4"}
+    assert os.listdir(src / "input") == []
+    assert os.listdir(src / "output") == []
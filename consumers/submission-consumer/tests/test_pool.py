@@ -0,0 +1,68 @@
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from code_executor.pool import SandboxPool
+
+CONSTRAINTS = {
+    "time_limit": 1,
+    "memory_limit": 256,
+    "memory_swap_limit": 0,
+    "cpu_quota": 1000000,
+    "cpu_period": 1000000,
+}
+
+
+class ImmediateThread:
+    def __init__(self, target, args=(), daemon=None):
+        self.target = target
+        self.args = args
+
+    def start(self):
+        self.target(*self.args)
+
+
+@pytest.fixture
+def docker():
+    docker = MagicMock(return_value=subprocess.CompletedProcess([], 0, "", ""))
+    with patch("code_executor.pool.subprocess.run", docker), patch(
+        "code_executor.pool.threading.Thread", ImmediateThread
+    ):
+        yield docker
+
+
+def commands(docker, name):
+    return [c.args[0] for c in docker.call_args_list if c.args[0][1] == name]
+
+
+def test_warm_fills_pool(docker):
+    pool = SandboxPool(size=2, volume="submission_data")
+    pool.warm("python312:v1")
+    pool.warm("python312:v1")
+
+    assert len(commands(docker, "run")) == 2
+    assert pool.stats()["python312:v1"]["idle"] == 2
+
+
+def test_acquire_counts_hits_and_misses_and_refills(docker):
+    pool = SandboxPool(size=1, volume="submission_data")
+
+    assert pool.acquire("python312:v1", CONSTRAINTS) is None
+    name = pool.acquire("python312:v1", CONSTRAINTS)
+
+    assert name is not None
+    assert pool.stats()["python312:v1"] == {"hits": 1, "misses": 1, "idle": 1}
+    update = commands(docker, "update")[-1]
+    assert update[-1] == name and "356m" in update
+
+
+def test_unhealthy_containers_are_discarded(docker):
+    pool = SandboxPool(size=1, volume="submission_data")
+    pool.warm("python312:v1")
+    docker.side_effect = lambda cmd, **kwargs: subprocess.CompletedProcess(
+        cmd, 1 if cmd[1] == "exec" else 0, "", ""
+    )
+
+    assert pool.acquire("python312:v1", CONSTRAINTS) is None
+    assert len(commands(docker, "rm")) == 1
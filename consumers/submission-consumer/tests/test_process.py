@@ -0,0 +1,66 @@
+from time import perf_counter
+from unittest.mock import patch
+
+import pytest
+
+from submission_consumer.process import SubmissionProcessor
+from submission_consumer.submission_process_pb2 import ProcessRequest, Status
+
+STEPS = [
+    "pull_judge_job",
+    "download_hidden_test_data",
+    "open_hidden_test_data",
+    "run",
+    "update_verdict",
+    "cleanup",
+]
+
+
+def instant_step(name):
+    def step(self):
+        yield ProcessRequest(status=Status.INFO, message="done")
+
+    step.__name__ = name
+    return step
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DOWNLOAD_DIR", str(tmp_path))
+    monkeypatch.delenv("PIPELINE_STEP_DELAY", raising=False)
+    with patch.multiple(SubmissionProcessor, **{s: instant_step(s) for s in STEPS}):
+        yield SubmissionProcessor(
+            problem_id=1,
+            client_id="client",
+            bucket_name="bucket",
+            grpc_server="localhost:50051",
+            submission_id=1,
+        )
+
+
+def test_process_adds_no_idle_time_between_steps(processor):
+    processor.verdict = "AC"
+    started_at = perf_counter()
+    messages = list(processor.process())
+    elapsed = perf_counter() - started_at
+
+    assert messages[-1].message == "FINISHED_SUCCESS"
+    assert elapsed < 0.5
+    assert list(processor.step_timings) == STEPS
+
+
+def test_process_paces_steps_when_configured(processor):
+    processor.step_delay = 0.01
+    with patch("submission_consumer.process.sleep") as sleep:
+        list(processor.process())
+
+    assert sleep.call_count == len(STEPS)
+
+
+def test_process_reports_failed_submission(processor):
+    processor.verdict = "WA"
+    messages = list(processor.process())
+
+    assert messages[-1].message == "FINISHED_ERROR"
+    assert any(m.status == Status.FINAL_VERDICT for m in messages)
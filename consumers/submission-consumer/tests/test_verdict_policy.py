@@ -0,0 +1,85 @@
+import json
+import os
+
+import pytest
+
+from submission_consumer.verdict_policy import (
+    RunAllPolicy,
+    StopOnFirstFailurePolicy,
+    SubtaskPolicy,
+    get_verdict_policy,
+)
+
+
+def result(test_case, verdict):
+    return {"test_case": test_case, "verdict": verdict}
+
+
+@pytest.fixture
+def tests_path(tmp_path):
+    # the tests are only written from the pack while they run
+    return tmp_path
+
+
+def test_final_verdict_is_first_failure_in_test_order():
+    policy = RunAllPolicy()
+    for r in [result(3, "WA"), result(1, "AC"), result(2, "TLE"), result(4, "AC")]:
+        policy.add(r)
+
+    assert policy.verdict == "TLE"
+
+
+def test_final_verdict_is_accepted_when_all_tests_pass():
+    policy = StopOnFirstFailurePolicy()
+    assert policy.verdict is None
+
+    policy.add(result(1, "AC"))
+    policy.add(result(2, "AC"))
+
+    assert policy.verdict == "AC"
+
+
+def test_subtask_policy_skips_rest_of_failed_subtask():
+    policy = SubtaskPolicy(
+        [{"tests": [1, 2], "points": 40}, {"tests": [3, 4], "points": 60}]
+    )
+    policy.add(result(1, "WA"))
+
+    assert not policy.should_run(2)
+    assert policy.should_run(3)
+
+    policy.add(result(3, "AC"))
+    policy.add(result(4, "AC"))
+
+    assert policy.verdict == "WA"
+    assert policy.details() == {
+        "score": 60,
+        "subtasks": [
+            {"points": 40, "passed": False},
+            {"points": 60, "passed": True},
+        ],
+    }
+
+
+def test_default_policy_depends_on_subtasks(tests_path):
+    assert isinstance(
+        get_verdict_policy(None, str(tests_path), 4), StopOnFirstFailurePolicy
+    )
+
+    (tests_path / "subtasks.json").write_text(
+        json.dumps([{"tests": [1, 2, 3, 4], "points": 100}])
+    )
+    assert isinstance(get_verdict_policy(None, str(tests_path), 4), SubtaskPolicy)
+    assert isinstance(get_verdict_policy("run-all", str(tests_path), 4), RunAllPolicy)
+
+
+def test_subtask_policy_without_subtasks_uses_all_tests(tests_path):
+    policy = get_verdict_policy("subtask", str(tests_path), 4)
+
+    assert not os.path.exists(tests_path / "input")
+    assert policy.subtasks == [{"tests": [1, 2, 3, 4], "points": 100}]
+
+
+def test_unknown_policy(tests_path):
+    with pytest.raises(ValueError):
+        get_verdict_policy("best-of-three", str(tests_path), 4)
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from submission_consumer.workspace import Workspace
+
+
+def test_workspaces_are_unique(tmp_path):
+    first = Workspace(str(tmp_path), "submission-1")
+    second = Workspace(str(tmp_path), "submission-1")
+
+    assert first.path != second.path
+    assert os.path.isdir(first.path) and os.path.isdir(second.path)
+
+
+def test_cleanup_removes_everything(tmp_path):
+    workspace = Workspace(str(tmp_path), "submission-1")
+    os.makedirs(os.path.join(workspace.path, "input"))
+    with open(os.path.join(workspace.path, "input", "input1.txt"), "w") as f:
+        f.write("1 2")
+
+    workspace.cleanup()
+    workspace.cleanup()
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_context_manager_cleans_up_on_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        with Workspace(str(tmp_path), "submission-1"):
+            raise RuntimeError("sandbox crashed")
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_sweep_keeps_running_jobs(tmp_path):
+    running = Workspace(str(tmp_path), "submission-1")
+    # leftovers of a crashed job: the lock file is no longer held
+    stale = os.path.join(tmp_path, "submission-2-dead")
+    os.makedirs(os.path.join(stale, "input"))
+    open(f"{stale}.lock", "w").close()
+    os.makedirs(os.path.join(tmp_path, ".trash-dead"))
+
+    Workspace.sweep(str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [running.name, f"{running.name}.lock"]
+    )
+    running.cleanup()
@@ -26,7 +26,7 @@ const Page = async ({params}: {params: Promise<{ problemId: number }>}) => {
         }
 
         const submissionsData = await submissionsResponse.json();
-        const submissions= submissionsData.data;
+        const submissions= submissionsData.data.results;
 
         return <SubmissionsList submissions={submissions} />;
     } catch (error) {
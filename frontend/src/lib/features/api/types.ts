@@ -266,13 +266,18 @@ export interface GetSubmissionsRequest {
     page?: number;
 }
 
+export interface CursorPaginationInfo {
+    count: number | null;
+    next: string | null;
+}
+
 export interface GetSubmissionsResponse {
     status: number;
     message: string;
     timestamp: string;
     data: {
         results: Submission[];
-        pagination: PaginationInfo;
+        pagination: CursorPaginationInfo;
     }
 }
 